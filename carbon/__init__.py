@@ -23,7 +23,19 @@
     :copyright: (c) 2017 Red Hat, Inc.
     :license: GPLv3, see LICENSE for more details.
 """
-from .carbon import Carbon
+import sys
 
 __version__ = '1.9.0'
 __author__ = 'Red Hat Inc.'
+
+if sys.version_info < (3, 7):
+    from .carbon import Carbon
+else:
+    def __getattr__(name):
+        # Carbon pulls in ansible, paramiko, etc, it is only imported once
+        # used so the cli can start without them
+        if name == 'Carbon':
+            from .carbon import Carbon
+            globals()['Carbon'] = Carbon
+            return Carbon
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
@@ -25,6 +25,7 @@
     :license: GPLv3, see LICENSE for more details.
 """
 import sys
+import threading
 import ansible
 
 _ver = sys.version_info
@@ -58,20 +59,64 @@ except ImportError:
 
 try:
     string_types = (str, unicode)
+    text_type = unicode
 except NameError:
     string_types = (str, )
+    text_type = str
 
 try:
     from urlparse import urlparse
 except ImportError:
     from urllib.parse import urlparse
 
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
 try:
     from ConfigParser import ConfigParser
 except Exception:
     from configparser import ConfigParser
 
+
 try:
-    from ansible.parsing.vault import VaultLib
+    from importlib.metadata import entry_points as _entry_points
 except ImportError:
-    from ansible.utils.vault import VaultLib
+    try:
+        from importlib_metadata import entry_points as _entry_points
+    except ImportError:
+        _entry_points = None
+
+
+def group_entry_points(groups):
+    """Return the entry points of the given groups keyed by group.
+
+    The installed distributions are scanned once for all the groups.
+    """
+    if _entry_points is None:
+        import pkg_resources
+        return dict((group, list(pkg_resources.iter_entry_points(group))) for group in groups)
+
+    entry_points = _entry_points()
+    if hasattr(entry_points, 'select'):
+        return dict((group, list(entry_points.select(group=group))) for group in groups)
+    return dict((group, list(entry_points.get(group, []))) for group in groups)
+
+
+try:
+    from threading import main_thread as _main_thread
+except ImportError:
+    _main_thread = None
+
+
+def is_main_thread():
+    """Return whether the current thread is the main thread of the process."""
+    if _main_thread is None:
+        return threading.current_thread().name == 'MainThread'
+    return threading.current_thread() is _main_thread()
@@ -29,6 +29,7 @@ import collections
 import os
 import copy
 import json
+import time
 from string import Template
 from logging import getLogger
 from ruamel.yaml import YAML
@@ -44,10 +45,17 @@ from .helpers import ssh_retry, exec_local_cmd_pipe, DataInjector, get_ans_verbo
 from .static.playbooks import GIT_CLONE_PLAYBOOK, SYNCHRONIZE_PLAYBOOK, \
     ADHOC_SHELL_PLAYBOOK, ADHOC_SCRIPT_PLAYBOOK
 from .exceptions import AnsibleServiceError
+from .utils.timing import record
+from .utils.trace import tracer
 from ansible.parsing.vault import VaultSecret
 import sys
 from .exceptions import AnsibleVaultError
-from ._compat import RawConfigParser, VaultLib, ansible_ver, is_py2
+from ._compat import RawConfigParser, ansible_ver, is_py2
+
+try:
+    from ansible.parsing.vault import VaultLib
+except ImportError:
+    from ansible.utils.vault import VaultLib
 
 LOG = getLogger(__name__)
 
@@ -153,7 +161,11 @@ class AnsibleController(object):
             module_call += " -c local"
 
         logger.debug(module_call)
-        output = exec_local_cmd_pipe(module_call, logger)
+        start = time.time()
+        with tracer.span('ansible %s' % module, 'playbook', hosts=extra_vars.get('hosts')):
+            output = exec_local_cmd_pipe(module_call, logger)
+        record('playbooks')
+        record('playbook_time', time.time() - start)
         return output
 
     @ssh_retry
@@ -210,7 +222,12 @@ class AnsibleController(object):
             playbook_call += " -%s" % ans_verbosity
 
         logger.debug(playbook_call)
-        output = exec_local_cmd_pipe(playbook_call, logger, env_var=env_var)
+        start = time.time()
+        with tracer.span('ansible-playbook %s' % os.path.basename(playbook), 'playbook', playbook=playbook,
+                         hosts=(extra_vars or {}).get('hosts')):
+            output = exec_local_cmd_pipe(playbook_call, logger, env_var=env_var)
+        record('playbooks')
+        record('playbook_time', time.time() - start)
         return output
 
 
@@ -26,17 +26,30 @@
 import errno
 import os
 import sys
+import time
+from collections import OrderedDict
 
-import blaster
-import yaml
 from glob import glob
 from . import __name__ as __carbon_name__
-from .constants import TASKLIST, RESULTS_FILE, DATA_FOLDER, DEFAULT_INVENTORY, DEFAULT_ARTIFACT
+from .constants import TASKLIST, RESULTS_FILE, DATA_FOLDER, DEFAULT_INVENTORY, DEFAULT_ARTIFACT, DAG_TASKLIST, \
+    JOURNAL_FILE, LOGGING_CONFIG, TRACE_FILE, SLOWEST_RESOURCES, PROFILE_FOLDER, PROFILE_REPORT_FILE, \
+    METRICS_TIMINGS, VALIDATE_CACHE_FOLDER, TEMPLATE_CACHE_FOLDER
 from .core import CarbonError, LoggerMixin, TimeMixin, Inventory
-from .helpers import file_mgmt, gen_random_str, sort_tasklist
+from .exceptions import CarbonSchedulerError
+from .helpers import gen_random_str, sort_tasklist, copy_data, load_scenario_stream, schema_validator_batch
 from .resources import Scenario, Asset, Action, Report, Execute, Notification
+from .utils.archiver import ResultsArchiver
 from .utils.config import Config
+from .utils.engine import EngineFactory, failed_task
+from .utils.journal import RunJournal
+from .utils.log_queue import log_queue
+from .utils.metrics import MetricsFile
+from .utils.results import ResultsWriter
 from .utils.pipeline import PipelineFactory
+from .utils.profiler import profiler
+from .utils.trace import tracer
+from .utils.scheduler import DagScheduler
+from .utils.validation_cache import ValidationCache
 
 
 class Carbon(LoggerMixin, TimeMixin):
@@ -105,6 +118,12 @@ class Carbon(LoggerMixin, TimeMixin):
                 self._carbon_options['skip_notify'] = value
             if key == 'no_notify' and value:
                 self._carbon_options['no_notify'] = value
+            if key == 'resume' and value:
+                self._carbon_options['resume'] = value
+            if key == 'profile' and value:
+                self._carbon_options['profile'] = value
+            if key == 'force_validate' and value:
+                self._carbon_options['force_validate'] = value
 
         if log_level:
             self.config['LOG_LEVEL'] = log_level
@@ -113,10 +132,21 @@ class Carbon(LoggerMixin, TimeMixin):
         if data_folder:
             self.config['DATA_FOLDER'] = data_folder
 
+        # Resuming a run reuses the data folder of the run, its name being the run UID
+        if self._carbon_options.get('resume'):
+            resume_folder = os.path.abspath(self._carbon_options['resume'])
+            if not os.path.isfile(os.path.join(resume_folder, JOURNAL_FILE)):
+                raise CarbonError('Unable to resume the run, %s does not contain a run journal.' % resume_folder)
+            self.config['DATA_FOLDER'], self._uid = os.path.split(resume_folder)
+
         # define the results folder
         self.config['RESULTS_FOLDER'] = os.path.join(
             self.config['DATA_FOLDER'], '.results')
 
+        # validation verdicts and compiled templates are kept next to the results folder, shared by the runs
+        validate_cache_folder = os.path.join(self.config['DATA_FOLDER'], VALIDATE_CACHE_FOLDER)
+        self.config['TEMPLATE_CACHE_FOLDER'] = os.path.join(self.config['DATA_FOLDER'], TEMPLATE_CACHE_FOLDER)
+
         # define the artifacts folder under the results folder
         self.config['ARTIFACT_FOLDER'] = os.path.join(self.config.get('RESULTS_FOLDER'), 'artifacts')
 
@@ -173,6 +203,24 @@ class Carbon(LoggerMixin, TimeMixin):
 
         # configure loggers
         self.create_logger(__carbon_name__, self.config)
+        if str(self.config['LOG_QUEUE']).lower() == 'true':
+            if not log_queue.supported:
+                self.logger.warning('Queued logging requires python 3, the worker processes write their '
+                                    'records themselves.')
+            # worker processes hand their records to the main process
+            resource_logs = str(self.config['RESOURCE_LOGS']).lower() == 'true'
+            log_queue.start(list(LOGGING_CONFIG['loggers'].keys()),
+                            os.path.join(self.data_folder, 'logs', 'resources') if resource_logs else None)
+        else:
+            log_queue.stop()
+        if str(self.config['TRACE']).lower() == 'true':
+            # spans of the run get exported as a chrome trace file once done
+            tracer.start(os.path.join(self.data_folder, '.trace'))
+        else:
+            tracer.stop()
+        if self._carbon_options.get('profile'):
+            # profiles of carbon itself and of each task, merged into a report once done
+            profiler.start(os.path.join(self.data_folder, PROFILE_FOLDER))
         # pykwalify logging disabled for too much logging
         # self.create_logger('pykwalify.core', self.config)
 
@@ -193,6 +241,22 @@ class Carbon(LoggerMixin, TimeMixin):
         # creating one time inventory object
         self.cbn_inventory = Inventory.get_instance(self.config, self._uid)
 
+        # journal recording the tasks run, loading the tasks completed by the run being resumed
+        self.journal = RunJournal(os.path.join(self.data_folder, JOURNAL_FILE),
+                                  resume=bool(self._carbon_options.get('resume')))
+
+        # execution engines running the tasks of the pipelines, keyed by name
+        self.engines = OrderedDict()
+
+        # writer of the results files, optionally along with a json sidecar
+        self.results_writer = ResultsWriter(json_sidecar=str(self.config['RESULTS_JSON']).lower() == 'true')
+
+        # verdicts of the resources which passed validation in previous runs
+        self.validation_cache = None
+        if str(self.config['VALIDATE_CACHE']).lower() == 'true':
+            self.validation_cache = ValidationCache(validate_cache_folder,
+                                                    force=bool(self._carbon_options.get('force_validate')))
+
         self.scenario = Scenario(config=self.config)
 
     @property
@@ -228,7 +292,9 @@ class Carbon(LoggerMixin, TimeMixin):
 
     def _populate_scenario_resources(self, scenario_obj, scenario_stream):
 
-        scenario_data = yaml.safe_load(scenario_stream)
+        # the resources pop their parameters, they are loaded from a copy so the
+        # data parsed stays whole for the scenario validation
+        scenario_data = copy_data(load_scenario_stream(scenario_stream) or dict())
         pro_items = scenario_data.pop('provision', None)
         orc_items = scenario_data.pop('orchestrate', None)
         exe_items = scenario_data.pop('execute', None)
@@ -358,7 +424,7 @@ class Carbon(LoggerMixin, TimeMixin):
         of them has a task to be loaded in the pipelines.
 
         Once a task is found, it is loaded within its respective
-        pipeline and then each pipeline is sent to blaster blastoff.
+        pipeline and then each pipeline is sent to the execution engine.
         For every pipeline within ~self.pipelines,
         """
         # lists to control which tasks passed or failed
@@ -374,52 +440,68 @@ class Carbon(LoggerMixin, TimeMixin):
         self._print_header(tasklist)
 
         try:
-            for task in sort_tasklist(tasklist):
-                self.logger.info(' * Task    : %s' % task)
+            for stages in self._group_tasklist(sort_tasklist(tasklist)):
+                for task in stages:
+                    self.logger.info(' * Task    : %s' % task)
 
-                # initially update list of passed tasks
-                passed_tasks.append(task)
-                if not self.carbon_options.get('no_notify', False):
-                    self.notify('on_start', status, passed_tasks, failed_tasks)
-                data = self._run_pipeline(task)
+                    # initially update list of passed tasks
+                    passed_tasks.append(task)
+                    if not self.carbon_options.get('no_notify', False):
+                        self.notify('on_start', status, passed_tasks, failed_tasks)
 
-                # reload resource objects
-                self.scenario.reload_resources(data)
-
-                if self.scenario.child_scenarios:
-                    [sc.reload_resources(data) for sc in self.scenario.child_scenarios]
-
-                # Creating inventory only when task is provision
-                if task == 'provision':
-                    try:
-                        # create the master inventory
-                        for host in self.scenario.get_all_assets():
-                            if (hasattr(host, 'role') or hasattr(host, 'groups')) and hasattr(host, 'ip_address'):
-                                self.logger.info('Populating master inventory file with host(s) %s'
-                                                 % getattr(host, 'name'))
-
-                        self.cbn_inventory.create_master(all_hosts=self.scenario.get_all_assets())
-                    except Exception as ex:
-                        raise CarbonError("Error while creating the master inventory %s" % ex)
+                if len(stages) > 1:
+                    stage_data = self._run_dag(stages)
+                else:
+                    stage_data = {stages[0]: self._run_pipeline(stages[0])}
+
+                for task in stages:
+                    data = stage_data[task]
+
+                    # reload resource objects
+                    self._reload_resources(data)
+
+                    # Creating inventory only when task is provision
+                    if task == 'provision':
+                        try:
+                            # create the master inventory
+                            for host in self.scenario.get_all_assets():
+                                if (hasattr(host, 'role') or hasattr(host, 'groups')) and hasattr(host, 'ip_address'):
+                                    self.logger.info('Populating master inventory file with host(s) %s'
+                                                     % getattr(host, 'name'))
+
+                            # the scheduler, or the run being resumed, may already have written a master
+                            # inventory, which is replaced once the new one is written
+                            self.cbn_inventory.create_master(all_hosts=self.scenario.get_all_assets(), rebuild=True)
+                        except Exception as ex:
+                            raise CarbonError("Error while creating the master inventory %s" % ex)
+
+                # keep the results file up to date with the tasks completed so far
+                self._write_out_results()
+                if str(self.config['METRICS_LIVE']).lower() == 'true':
+                    self._write_metrics(passed_tasks, failed_tasks)
 
                 self.logger.info("." * 50)
         except Exception as ex:
             # set overall status
             status = 1
 
-            # pop task from passed list since it failed
-            passed_tasks.pop(-1)
+            # the scheduler reports which of its tasks failed
+            if isinstance(ex, CarbonSchedulerError):
+                task = ex.task
 
-            # update list of failed tasks
-            failed_tasks.append(task)
+            # pop task, and any task scheduled after it, from passed list since it failed
+            dropped_tasks = passed_tasks[passed_tasks.index(task):]
+            del passed_tasks[passed_tasks.index(task):]
 
-            self.logger.error(ex)
+            # update list of failed tasks, the tasks scheduled after it were stopped before completing
+            failed_tasks.extend(dropped_tasks)
 
-            # reload resource objects
-            self.scenario.reload_resources(ex.results)
+            self.logger.error(ex)
+            for item in dropped_tasks[1:]:
+                self.logger.error('Task %s did not complete since task %s failed.' % (item, task))
 
-            if self.scenario.child_scenarios:
-                [sc.reload_resources(ex.results) for sc in self.scenario.child_scenarios]
+            # reload resource objects, errors raised outside of the engines have no task results
+            self._reload_resources(getattr(ex, 'results', list()))
 
             # roll back by cleaning up any resources that might have been provisioned
             if 'cleanup' in tasklist and [item for item in failed_tasks if item != 'cleanup']:
@@ -435,9 +517,7 @@ class Carbon(LoggerMixin, TimeMixin):
                         data = self._run_pipeline(task)
 
                         # reload resource objects
-                        self.scenario.reload_resources(data)
-                        if self.scenario.child_scenarios:
-                            [sc.reload_resources(data) for sc in self.scenario.child_scenarios]
+                        self._reload_resources(data)
                         passed_tasks.append(task)
                     except Exception as ex:
                         self.logger.error(ex)
@@ -455,10 +535,18 @@ class Carbon(LoggerMixin, TimeMixin):
             if not self.carbon_options.get('no_notify', False):
                 self.notify('on_complete', status, passed_tasks, failed_tasks)
 
+            self._shutdown_engines()
+
             self._write_out_results()
 
+            self._write_metrics(passed_tasks, failed_tasks, status)
+
             self._print_footer(passed_tasks, failed_tasks, state)
 
+            self._export_trace()
+
+            self._export_profile()
+
             self._archive_results()
 
             sys.exit(status)
@@ -487,20 +575,14 @@ class Carbon(LoggerMixin, TimeMixin):
             data = self._run_pipeline(task)
 
             # reload resource objects
-            self.scenario.reload_resources(data)
-
-            if self.scenario.child_scenarios:
-                [sc.reload_resources(data) for sc in self.scenario.child_scenarios]
+            self._reload_resources(data)
         except Exception as ex:
             status = 1
             self.logger.error(ex)
             self.logger.error('One or more notifications failed. Refer to the scenario.log')
 
-            # reload resource objects
-            self.scenario.reload_resources(ex.results)
-
-            if self.scenario.child_scenarios:
-                [sc.reload_resources(ex.results) for sc in self.scenario.child_scenarios]
+            # reload resource objects, errors raised outside of the engines have no task results
+            self._reload_resources(getattr(ex, 'results', list()))
         finally:
             if task == 'on_demand':
                 # save end time
@@ -508,12 +590,21 @@ class Carbon(LoggerMixin, TimeMixin):
                 # determine state
                 state = 'FAILED' if status else 'PASSED'
 
+                self._shutdown_engines()
+
                 self._write_out_results()
 
+                self._write_metrics(getattr(self.scenario, 'passed_tasks'),
+                                    getattr(self.scenario, 'failed_tasks'), status)
+
                 self._print_footer(getattr(self.scenario, 'passed_tasks'),
                                    getattr(self.scenario, 'failed_tasks'),
                                    state)
 
+                self._export_trace()
+
+                self._export_profile()
+
                 self._archive_results()
 
                 sys.exit(status)
@@ -541,17 +632,179 @@ class Carbon(LoggerMixin, TimeMixin):
             self.logger.warning('... no tasks to be executed ...')
             return data
 
-        # create blaster object with pipeline to run
-        blast = blaster.Blaster(pipeline.tasks)
-
-        # blast off the pipeline list of tasks reload_resources
-        data = blast.blastoff(
-            serial=not pipeline.type.__concurrent__,
-            raise_on_failure=True
-        )
+        # skip validating the resources which passed validation in previous runs
+        tasks = pipeline.tasks
+        skipped = list()
+        cache = self.validation_cache if pipeline.type.__task_name__ == 'validate' else None
+        if cache:
+            skipped, tasks = cache.split(tasks)
+            if not tasks:
+                self.logger.info('... all resources passed validation in previous runs ...')
+                return skipped
+
+        # validate the resources against the schemas of their plugins in batches, the ones failing are not run
+        failed = list()
+        if pipeline.type.__task_name__ == 'validate':
+            failed, tasks = self._validate_schemas(tasks)
+
+        # run the pipeline list of tasks using the execution engine
+        data = list()
+        error = None
+        try:
+            if tasks:
+                with tracer.span(pipeline.name, 'stage', stage=pipeline.type.__task_name__, tasks=len(tasks)):
+                    data = self._get_engine(pipeline.type.__task_name__).run(
+                        pipeline.name,
+                        tasks,
+                        serial=not pipeline.type.__concurrent__,
+                        workers=pipeline.type.__concurrency__
+                    )
+        except CarbonSchedulerError as ex:
+            error = ex
+            data = ex.results
+
+        # keep the verdicts of the resources which passed, even when others failed
+        if cache:
+            cache.record(data)
+            data = skipped + data
+
+        if error is not None and not failed:
+            error.results = data
+            raise error
+
+        if failed:
+            raise CarbonSchedulerError('One or more tasks got a status of non zero.', task=pipeline.name,
+                                       results=failed + data)
 
         return data
 
+    def _validate_schemas(self, tasks):
+        """Validate the resources of validate tasks against the schemas of their plugins, in batches.
+
+        The resources whose plugin sets __schema_batch__, validating the
+        parameters built by its build_profile against its schema file, are
+        validated in a single pass per plugin, reporting the schema errors of
+        all of them at once. The tasks of the resources failing are not run,
+        the other ones still run every check of their plugin.
+
+        :param tasks: validate task definitions built by the pipeline builder
+        :type tasks: list
+        :return: results of the tasks failing and the task definitions to run
+        :rtype: tuple
+        """
+        batches = OrderedDict()
+        for task in tasks:
+            plugin = ValidationCache.get_plugin(task.get('resource'))
+            if plugin is not None and getattr(plugin, '__schema_batch__', False):
+                batches.setdefault(plugin, list()).append(task)
+
+        failed = dict()
+        for plugin, items in batches.items():
+            ext_file = getattr(plugin, '__schema_ext_path__', None)
+            errors = schema_validator_batch([plugin.build_profile(task['resource']) for task in items],
+                                            schema_files=[plugin.__schema_file_path__],
+                                            schema_ext_files=[ext_file] if ext_file else None,
+                                            raise_on_failure=False)
+            for task, error in zip(items, errors):
+                if error:
+                    self.logger.error('Failed to validate %s' % task['name'])
+                    failed[id(task)] = failed_task(task, 'Schema validation failed:\n - %s.' % '.\n - '.join(error))
+
+        return list(failed.values()), [task for task in tasks if id(task) not in failed]
+
+    def _group_tasklist(self, tasklist):
+        """Group the tasks which are run together.
+
+        With the dag scheduler enabled, consecutive provision, orchestrate
+        and execute tasks run by the same engine are grouped so they can be
+        scheduled as one dependency graph. Otherwise every task is a group on
+        its own.
+
+        :param tasklist: sorted list of tasks to run
+        :type tasklist: list
+        :return: list of task groups
+        :rtype: list
+        """
+        groups = list()
+        for task in tasklist:
+            if str(self.config['SCHEDULER']).lower() == 'dag' and task in DAG_TASKLIST \
+                    and groups and groups[-1][-1] in DAG_TASKLIST \
+                    and EngineFactory.get_engine_name(self.config, task) == \
+                    EngineFactory.get_engine_name(self.config, groups[-1][-1]):
+                groups[-1].append(task)
+            else:
+                groups.append([task])
+        return groups
+
+    def _get_engine(self, task):
+        """Return the execution engine set to run a task.
+
+        Engines are created once and shared by every task they are set to
+        run, so an engine keeping a worker pool keeps it for the whole run.
+
+        :param task: carbon task name
+        :type task: str
+        :return: execution engine
+        :rtype: carbon.utils.engine.Engine
+        """
+        name = EngineFactory.get_engine_name(self.config, task)
+        if name not in self.engines:
+            self.engines[name] = EngineFactory.get_engine(self.config, task)
+            self.engines[name].journal = self.journal
+        return self.engines[name]
+
+    def _shutdown_engines(self):
+        """Shutdown the execution engines once every task has run."""
+        for engine in self.engines.values():
+            engine.shutdown()
+        log_queue.stop()
+
+    def _reload_resources(self, data):
+        """Reload the scenario resources with the results of a pipeline.
+
+        Tasks run in process by the thread engine update the scenario
+        resources themselves. Their results only need to be reloaded when a
+        provision task returned new assets.
+
+        :param data: task results
+        :type data: list
+        """
+        if data and all(item.get('in_process') for item in data) and \
+                not [method for item in data for method in item['methods'] if method['rvalue'] is not None]:
+            return
+
+        self.scenario.reload_resources(data)
+
+        if self.scenario.child_scenarios:
+            [sc.reload_resources(data) for sc in self.scenario.child_scenarios]
+
+    def _run_dag(self, stages):
+        """Run a group of tasks using the dependency aware scheduler.
+
+        :param stages: the tasks to schedule together
+        :type stages: list
+        :return: task results keyed by task name
+        :rtype: dict
+        """
+        engine = self._get_engine(stages[0])
+        scheduler = DagScheduler(self.scenario, self.carbon_options, stages, inventory=self.cbn_inventory,
+                                 max_workers=engine.max_workers, engine=engine)
+
+        self.logger.info('.' * 50)
+        self.logger.info('Starting tasks on dependency graph: %s', stages)
+
+        try:
+            with tracer.span('dag %s' % ', '.join(stages), 'stage'):
+                return scheduler.run()
+        except CarbonSchedulerError as ex:
+            # reload the tasks which ran along with the failed one, the
+            # failed task itself gets reloaded by the caller
+            for task, data in ex.stage_results.items():
+                if task == ex.task:
+                    continue
+                self._reload_resources(data)
+            raise
+
     def _print_header(self, tasklist):
 
         self.logger.info('\n')
@@ -561,6 +814,8 @@ class Carbon(LoggerMixin, TimeMixin):
         self.logger.info(' * Workspace             : %s' % self.workspace)
         self.logger.info(' * Log Level             : %s' % self.config['LOG_LEVEL'])
         self.logger.info(' * Tasks                 : %s' % tasklist)
+        if self.journal.completed:
+            self.logger.info(' * Resumed Tasks         : %s' % len(self.journal.completed))
         self.logger.info(' * Scenario              : %s' % getattr(self.scenario, 'name'))
         if self.scenario.child_scenarios:
             self.logger.info(' * Included Scenario(s)  : %s' % [getattr(sc, 'name') for sc in
@@ -575,7 +830,7 @@ class Carbon(LoggerMixin, TimeMixin):
             for sc in self.scenario.child_scenarios:
                 ch_result_file_name = sc.name + '_results.yml'
                 ch_result_abs_name = os.path.join(self.data_folder, sc.name + '_results.yml')
-                file_mgmt('w', ch_result_abs_name, sc.profile())
+                self.results_writer.write(ch_result_abs_name, sc.profile())
                 # Adding child_result_list with results file in the RESULTS_FOLDER instead of absolute path
                 child_result_list.append(os.path.join(self.config['RESULTS_FOLDER'], ch_result_file_name))
 
@@ -583,7 +838,8 @@ class Carbon(LoggerMixin, TimeMixin):
             self.scenario.__setattr__('included_scenario_names', child_result_list)
 
         # Write the main scenario results
-        file_mgmt('w', self.results_file, self.scenario.profile())
+        self.results_writer.write(self.results_file, self.scenario.profile())
+        self.results_writer.flush_cache()
 
     def _print_footer(self, passed_tasks, failed_tasks, state):
 
@@ -600,6 +856,26 @@ class Carbon(LoggerMixin, TimeMixin):
                              failed_tasks)
         self.logger.info(' * Results Folder                 : %s' %
                          self.config['RESULTS_FOLDER'])
+        for engine in [item for item in self.engines.values() if item.stats]:
+            self.logger.info(' * Engine                         : %s%s' %
+                             (engine.__engine_name__,
+                              ' (startup %.2fs)' % engine.startup if engine.startup else ''))
+            for name, stats in engine.stats.items():
+                self.logger.info('   - %-28s : %s task(s) in %.2fs%s' %
+                                 (name, stats['tasks'], stats['wall'],
+                                  '' if stats['overhead'] is None else ', overhead %.2fs' % stats['overhead']))
+
+        slowest = self._slowest_resources(list(passed_tasks) + list(failed_tasks) + ['notify'])
+        if slowest:
+            self.logger.info(' * Slowest Resources              :')
+        for task, resources in slowest.items():
+            described = list()
+            for resource, timings in resources:
+                details = ['queued %.2fs' % timings['queued']] if timings['queued'] >= 0.01 else []
+                details.extend(['%s retries' % timings['retries']] if timings['retries'] else [])
+                described.append('%s %.2fs%s' % (resource.name, timings['run'],
+                                                 ' (%s)' % ', '.join(details) if details else ''))
+            self.logger.info('   - %-28s : %s' % (task, ', '.join(described)))
 
         self.logger.info(' * Included Scenario Definition   : %s' % self.scenario.included_scenario_names)
         self.logger.info(' * Final Scenario Definition      : %s' % os.path.join(self.config['RESULTS_FOLDER'],
@@ -607,14 +883,135 @@ class Carbon(LoggerMixin, TimeMixin):
         self.logger.info('-' * 79)
         self.logger.info('CARBON RUN (RESULT=%s)' % state)
 
+    def _export_trace(self):
+
+        if not tracer.enabled:
+            return
+
+        path = os.path.join(self.data_folder, TRACE_FILE)
+        try:
+            spans = tracer.export(path)
+            self.logger.info('Exported %s span(s) of the run to %s' % (spans, path))
+        except (IOError, OSError, ValueError) as ex:
+            self.logger.warning('Unable to export the trace of the run: %s' % ex)
+        finally:
+            tracer.stop()
+
+    def _all_resources(self):
+        """Return the resources of the scenario and of its included scenarios."""
+        resources, seen = list(), set()
+        for scenario in [self.scenario] + list(self.scenario.child_scenarios):
+            for items in [scenario.assets, scenario.actions, scenario.executes, scenario.reports,
+                          scenario.notifications]:
+                resources.extend([item for item in items if id(item) not in seen])
+                seen.update(id(item) for item in items)
+        return resources
+
+    def _write_metrics(self, passed_tasks, failed_tasks, status=None):
+        """Write the metrics of the run for the node_exporter textfile collector.
+
+        :param passed_tasks: names of the tasks which passed so far
+        :type passed_tasks: list
+        :param failed_tasks: names of the tasks which failed so far
+        :type failed_tasks: list
+        :param status: overall status of the run, None while it still runs
+        :type status: int
+        """
+        path = self.config['METRICS_FILE']
+        if not path:
+            return
+
+        scenario = self.scenario.name
+        now = time.time()
+        metrics = MetricsFile()
+        if self._start_time is not None:
+            metrics.add('carbon_run_duration_seconds', 'Time spent running the scenario.',
+                        (self._end_time if status is not None else now) - self._start_time, scenario=scenario)
+        if status is not None:
+            metrics.add('carbon_run_status', 'Overall status of the run, 0 when it passed.', status,
+                        scenario=scenario)
+        metrics.add('carbon_run_last_update_timestamp_seconds', 'Time the metrics file was last written at.',
+                    now, scenario=scenario)
+
+        for engine in self.engines.values():
+            for stage, stats in engine.stats.items():
+                metrics.add('carbon_stage_duration_seconds', 'Time spent running the tasks of a stage.',
+                            stats['wall'], scenario=scenario, stage=stage)
+                for state, count in stats.get('statuses', dict()).items():
+                    metrics.add('carbon_stage_tasks', 'Number of tasks of a stage, by status.',
+                                count, scenario=scenario, stage=stage, status=state)
+
+        resources = self._all_resources()
+        tasks = list(passed_tasks) + list(failed_tasks) + ['notify']
+        for task in [item for item in TASKLIST + ['notify'] if item in tasks]:
+            timings = [resource.timings[task] for resource in resources if task in resource.timings]
+            if not timings:
+                continue
+            for name, key, description in METRICS_TIMINGS:
+                metrics.add(name, description, sum(item.get(key, 0) for item in timings),
+                            scenario=scenario, stage=task)
+
+        for notification in self.scenario.notifications:
+            if 'notify' in notification.timings:
+                metrics.add('carbon_notification_seconds', 'Time spent sending a notification.',
+                            notification.timings['notify']['run'], scenario=scenario,
+                            notification=notification.name)
+
+        try:
+            metrics.write(path)
+        except (IOError, OSError) as ex:
+            self.logger.warning('Unable to write the metrics of the run to %s: %s' % (path, ex))
+
+    def _slowest_resources(self, tasks, count=SLOWEST_RESOURCES):
+        """Return the resources the given tasks took the longest to run on.
+
+        :param tasks: names of the tasks to look up
+        :type tasks: list
+        :param count: maximum number of resources to return per task
+        :type count: int
+        :return: resources along with the timings of the task, slowest
+            first, keyed by task name
+        :rtype: OrderedDict
+        """
+        resources = self._all_resources()
+
+        slowest = OrderedDict()
+        for task in [item for item in TASKLIST + ['notify'] if item in tasks]:
+            timed = [(resource, resource.timings[task]) for resource in resources if task in resource.timings]
+            if timed:
+                slowest[task] = sorted(timed, key=lambda item: item[1]['run'], reverse=True)[:count]
+        return slowest
+
+    def _export_profile(self):
+
+        folder = profiler.stop()
+        if folder is None:
+            return
+
+        path = os.path.join(folder, PROFILE_REPORT_FILE)
+        try:
+            profiles = profiler.report(folder, path)
+            self.logger.info('Merged %s profile(s) of the run into %s' % (profiles, path))
+        except (IOError, OSError, ValueError) as ex:
+            self.logger.warning('Unable to report the hotspots of the run: %s' % ex)
+
     def _archive_results(self):
 
+        archiver = ResultsArchiver()
+
         # archive everything from the data folder into the results folder
-        os.system('cp -r %s/* %s' % (self.data_folder, self.config['RESULTS_FOLDER']))
+        archiver.archive(self.data_folder, self.config['RESULTS_FOLDER'])
 
         # also archive the inventory file if a static inventory directory differnt thant default inventory dir
         # is specified
         if self.static_inv_dir:
             if os.listdir(self.config['INVENTORY_FOLDER']):
                 inv_results_dir = os.path.join(self.config['RESULTS_FOLDER'], 'inventory')
-                os.system('cp -r %s/* %s' % (self.config['INVENTORY_FOLDER'], inv_results_dir))
+                archiver.archive(self.config['INVENTORY_FOLDER'], inv_results_dir)
+
+        archived = ['%s %s file(s) of %s bytes' % (method, stats['files'], stats['bytes'])
+                    for method, stats in archiver.stats.items() if stats['files']]
+        saved, seconds = archiver.saved()
+        self.logger.info('Archived the results in %.2fs: %s' % (archiver.duration, ', '.join(archived) or 'no files'))
+        self.logger.info('Archiving saved copying %s bytes%s' %
+                         (saved, '' if seconds is None else ', about %.2fs' % seconds))
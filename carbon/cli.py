@@ -27,9 +27,7 @@
 
 import click
 from . import __version__
-from .carbon import Carbon
 from .constants import TASKLIST, TASK_LOGLEVEL_CHOICES
-from .helpers import validate_cli_scenario_option
 
 
 def print_header():
@@ -68,6 +66,9 @@ def create():
 @click.pass_context
 def show(ctx, scenario, list_labels):
     """Show information about the scenario."""
+    from .carbon import Carbon
+    from .helpers import validate_cli_scenario_option
+
     print_header()
     scenario_stream = validate_cli_scenario_option(ctx, scenario)
     # Create a new carbon compound
@@ -130,11 +131,18 @@ def show(ctx, scenario, list_labels):
               metavar="",
               help="Disable sending an notifications defined for the scenario."
               )
+@click.option("--force-validate",
+              is_flag=True,
+              help="Validate every resource, including the ones which passed validation "
+                   "in previous runs.")
 @click.pass_context
-def validate(ctx, scenario, data_folder, log_level, workspace, vars_data, labels, skip_labels, skip_notify, no_notify):
+def validate(ctx, scenario, data_folder, log_level, workspace, vars_data, labels, skip_labels, skip_notify, no_notify,
+             force_validate):
     """Validate a scenario configuration."""
+    from .carbon import Carbon
+    from .helpers import validate_cli_scenario_option
 
-    scenario_stream = validate_cli_scenario_option(ctx, scenario, vars_data)
+    scenario_stream = validate_cli_scenario_option(ctx, scenario, vars_data, data_folder)
 
     # checking if labels or skip_labels both are set
     if labels and skip_labels:
@@ -149,7 +157,8 @@ def validate(ctx, scenario, data_folder, log_level, workspace, vars_data, labels
         labels=labels,
         skip_labels=skip_labels,
         skip_notify=skip_notify,
-        no_notify=no_notify
+        no_notify=no_notify,
+        force_validate=force_validate
     )
 
     # This is the easiest way to configure a full scenario.
@@ -212,12 +221,30 @@ def validate(ctx, scenario, data_folder, log_level, workspace, vars_data, labels
               metavar="",
               help="Disable sending an notifications defined for the scenario."
               )
+@click.option("--resume",
+              default=None,
+              metavar="",
+              type=click.Path(exists=True, file_okay=False),
+              help="Data folder of a failed or interrupted run to resume. The tasks "
+                   "the run completed are skipped.")
+@click.option("--profile",
+              is_flag=True,
+              help="Profile carbon and each task it runs, saving the profiles along "
+                   "with a report of the hotspots of the run to the data folder.")
+@click.option("--force-validate",
+              is_flag=True,
+              help="Validate every resource, including the ones which passed validation "
+                   "in previous runs.")
 @click.pass_context
-def run(ctx, task, scenario, log_level, data_folder, workspace, vars_data, labels, skip_labels, skip_notify, no_notify):
+def run(ctx, task, scenario, log_level, data_folder, workspace, vars_data, labels, skip_labels, skip_notify, no_notify,
+        resume, profile, force_validate):
     """Run a scenario configuration."""
+    from .carbon import Carbon
+    from .helpers import validate_cli_scenario_option
+
     print_header()
 
-    scenario_stream = validate_cli_scenario_option(ctx, scenario, vars_data)
+    scenario_stream = validate_cli_scenario_option(ctx, scenario, vars_data, data_folder)
 
     # checking if labels or skip_labels both are set
     if labels and skip_labels:
@@ -233,7 +260,10 @@ def run(ctx, task, scenario, log_level, data_folder, workspace, vars_data, label
         labels=labels,
         skip_labels=skip_labels,
         skip_notify=skip_notify,
-        no_notify=no_notify
+        no_notify=no_notify,
+        resume=resume,
+        profile=profile,
+        force_validate=force_validate
     )
 
     # Sending the list of scenario streams to the carbon object
@@ -286,9 +316,12 @@ def run(ctx, task, scenario, log_level, data_folder, workspace, vars_data, label
 @click.pass_context
 def notify(ctx, scenario, log_level, data_folder, workspace, vars_data, skip_notify, no_notify):
     """Trigger notifications marked on demand for a scenario configuration."""
+    from .carbon import Carbon
+    from .helpers import validate_cli_scenario_option
+
     print_header()
 
-    scenario_stream = validate_cli_scenario_option(ctx, scenario, vars_data)
+    scenario_stream = validate_cli_scenario_option(ctx, scenario, vars_data, data_folder)
 
     # Create a new carbon compound
     cbn = Carbon(
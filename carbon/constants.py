@@ -44,6 +44,37 @@ TASKLIST = [
     "cleanup"
 ]
 
+# Tasks the dag scheduler is able to overlap with each other
+DAG_TASKLIST = [
+    "provision",
+    "orchestrate",
+    "execute"
+]
+
+# Tasks recorded in the run journal, skipped when resuming a run once completed
+JOURNAL_TASKLIST = [
+    "provision",
+    "orchestrate",
+    "execute",
+    "report"
+]
+
+# Available schedulers for running carbon tasks
+SCHEDULERS = [
+    "stage",
+    "dag"
+]
+
+# Available engines for running the tasks of carbon pipelines
+ENGINES = [
+    "blaster",
+    "pool",
+    "thread"
+]
+
+# Maximum number of tasks an engine runs at the same time
+DEFAULT_ENGINE_WORKERS = 10
+
 NOTIFYSTATES = [
     'on_start',
     'on_complete',
@@ -67,6 +98,41 @@ HOST_UPDATE_FIELDS = ["app_name", "routes", "ip_address", "hostname"]
 
 RESULTS_FILE = "results.yml"
 
+JOURNAL_FILE = "journal.jsonl"
+
+# Chrome trace event file the spans of a run are exported to
+TRACE_FILE = "trace.json"
+
+# Folder the profiles of a run are saved into, along with the report of its hotspots
+PROFILE_FOLDER = "profile"
+PROFILE_REPORT_FILE = "hotspots.txt"
+
+# Folder of the data folder the validation verdicts of the resources are kept in, across runs
+VALIDATE_CACHE_FOLDER = ".validate_cache"
+
+# Folder of the data folder the compiled jinja templates are kept in, across runs
+TEMPLATE_CACHE_FOLDER = ".template_cache"
+
+# Resource attributes holding the plugin class validating the resource
+VALIDATE_CACHE_PLUGINS = ["provisioner", "orchestrator", "executor", "importer_plugin", "notifier"]
+
+# Number of resources the footer lists as the slowest ones of each task
+SLOWEST_RESOURCES = 3
+
+# Metrics summing the timings of the tasks of a stage: metric name, timings key and help text
+METRICS_TIMINGS = [
+    ('carbon_task_run_seconds', 'run', 'Time spent running the tasks of a stage.'),
+    ('carbon_task_queued_seconds', 'queued', 'Time the tasks of a stage waited for a worker.'),
+    ('carbon_task_retries', 'retries', 'Number of SSH connections and provider calls retried.'),
+    ('carbon_ssh_wait_seconds', 'ssh_wait', 'Time spent waiting for SSH connections.'),
+    ('carbon_playbook_runs', 'playbooks', 'Number of ansible-playbook and ansible module runs.'),
+    ('carbon_playbook_seconds', 'playbook_time', 'Time spent running ansible-playbook and ansible modules.'),
+    ('carbon_artifact_bytes', 'artifact_bytes', 'Size of the artifacts fetched from the test machines.')
+]
+
+# Resource attributes set by the tasks which are restored when resuming a run
+JOURNAL_RESOURCE_FIELDS = ["status", "artifact_locations", "testrun_results"]
+
 # Rule for Carbon hosts naming convention
 RULE_HOST_NAMING = re.compile('[\\W]+')
 
@@ -102,11 +168,21 @@ DEFAULT_CONFIG = {
     'ANSIBLE_LOG_REMOVE': True,
     'DATA_FOLDER': DATA_FOLDER,
     'LOG_LEVEL': 'info',
+    'SCHEDULER': 'stage',
+    'ENGINE': 'blaster',
+    'RESULTS_JSON': False,
+    'LOG_QUEUE': False,
+    'RESOURCE_LOGS': False,
+    'TRACE': False,
+    'METRICS_FILE': '',
+    'METRICS_LIVE': False,
+    'VALIDATE_CACHE': True,
     'RESOURCE_CHECK_ENDPOINT': '',
     'INVENTORY_FOLDER': DEFAULT_INVENTORY,
     'RESULTS_FOLDER': os.path.join(DATA_FOLDER, '.results'),
     'ARTIFACT_FOLDER': DEFAULT_ARTIFACT,
     'TASK_CONCURRENCY': DEFAULT_TASK_CONCURRENCY,
+    'PROVIDER_CONCURRENCY': {},
     'TOGGLES': [],
     'CREDENTIALS': [],
     'SETUP_LOGGER': [],
@@ -117,7 +193,8 @@ DEFAULT_CONFIG = {
 
 # Default config sections
 DEFAULT_CONFIG_SECTIONS = ['defaults', 'credentials', 'orchestrator', 'feature_toggles', 'importer',
-                           'task_concurrency', 'setup_logger', 'executor', 'timeout', 'provisioner']
+                           'task_concurrency', 'provider_concurrency', 'setup_logger', 'executor', 'timeout',
+                           'provisioner']
 
 # options on how credentials can be set
 SET_CREDENTIALS_OPTIONS = ['config', 'scenario']
@@ -27,22 +27,25 @@
 import errno
 import inspect
 import os
-import yaml
-import inspect
 from glob import glob
 from logging import CRITICAL, DEBUG, ERROR, INFO, WARNING
 from logging import Formatter, getLogger, StreamHandler, FileHandler, Filter
 from logging import config as log_config
 from time import time, sleep
 from collections import OrderedDict
+from functools import wraps
 from .exceptions import CarbonError, CarbonResourceError, LoggerMixinError, \
     CarbonProvisionerError, CarbonImporterError
-from .helpers import get_core_tasks_classes
+from .helpers import is_core_task_class, load_schema_file, copy_data
 from traceback import format_exc
 from ._compat import RawConfigParser, string_types
 from uuid import uuid4
-from sys import exc_info
-from .constants import LOGGING_CONFIG
+from sys import exc_info, _getframe
+from .constants import LOGGING_CONFIG, DEFAULT_ENGINE_WORKERS
+from .utils.log_queue import log_queue
+from .utils.profiler import profiler
+from .utils.timing import TaskTimer
+from .utils.trace import tracer
 import threading
 
 
@@ -163,10 +166,22 @@ class LoggerMixin(object):
         # setup and initialize LOGGING_CONFIG
         cls.setup_logger(name, full_path, config)
 
+    # loggers by module name, getLogger always returns the same logger for a name
+    _loggers = dict()
+
     @property
     def logger(self):
-        """Returns the default logger (carbon logger) object."""
-        return getLogger(inspect.getmodule(inspect.stack()[1][0]).__name__)
+        """Returns the default logger (carbon logger) object.
+
+        The logger is named after the module of the code accessing it, which
+        is looked up in the globals of the calling frame rather than by
+        inspecting the whole stack.
+        """
+        name = _getframe(1).f_globals.get('__name__')
+        try:
+            return LoggerMixin._loggers[name]
+        except KeyError:
+            return LoggerMixin._loggers.setdefault(name, getLogger(name))
 
     class ExceptionFilter(Filter):
 
@@ -352,11 +367,31 @@ class CarbonTask(LoggerMixin, TimeMixin):
 
     __task_name__ = None
     __concurrent__ = True
+    __concurrency__ = DEFAULT_ENGINE_WORKERS
     __task_id__ = ''
 
-    def __init__(self, name=None, **kwargs):
+    def __init__(self, name=None, resource=None, **kwargs):
         if name is not None:
             self.name = name
+        log_queue.attach_task(self.__task_name__, name)
+
+        # save how long the task took on the resource it runs on
+        timer = None
+        if isinstance(resource, CarbonResource):
+            timer = TaskTimer(self.__task_name__, resource, kwargs.get('queued'))
+
+        if timer is not None or tracer.enabled or profiler.enabled:
+            for method in [item for item in kwargs.get('methods', []) if hasattr(self, item)]:
+                func = getattr(self, method)
+                if profiler.enabled:
+                    func = profiler.wrap(func, '%s.%s.%s' % (self.__task_name__, name, method))
+                if timer is not None:
+                    func = timer.wrap(func)
+                if tracer.enabled:
+                    # record a span each time a method of the task is run
+                    func = tracer.wrap(func, '%s %s' % (self.__task_name__, name), 'task',
+                                       stage=self.__task_name__, method=method)
+                setattr(self, method, func)
 
     def run(self):
         pass
@@ -374,6 +409,58 @@ class CarbonTask(LoggerMixin, TimeMixin):
         return format_exc()
 
 
+class ProfileView(OrderedDict):
+    """Profile cached by a resource, read only.
+
+    The profile is shared by every caller, copy it, i.e. with copy_data, to
+    change it. The lists and dicts it holds may be the ones of the resource.
+    Copies and pickles of it are ordered dicts.
+    """
+
+    def __init__(self, profile):
+        super(ProfileView, self).__init__()
+        for key, value in profile.items():
+            OrderedDict.__setitem__(self, key, value)
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('The profile of a resource is read only, copy it to change it.')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = move_to_end = _read_only
+
+    def copy(self):
+        return OrderedDict(self)
+
+    def __reduce__(self):
+        return OrderedDict, (list(self.items()),)
+
+
+def cached_profile(func):
+    """Decorator caching the profile of a resource until the resource changes.
+
+    The profile cached is built again once an attribute of the resource is
+    set, or once the key returned by the _profile_key method of the resource
+    changes. The key is made of the versions of the resources the profile
+    copies values out of, such as the hosts of an action, and of the few
+    values the profile copies out of the lists and dicts of the resource,
+    which setting an attribute does not catch. The profile is returned read
+    only, as is, see ~carbon.core.ProfileView.
+
+    :param func: profile method of the resource
+    :type func: function
+    :return: profile method using the profile cached
+    :rtype: function
+    """
+    @wraps(func)
+    def profile(self):
+        key = self._profile_key()
+        cached = self.__dict__.get('_profile')
+        if cached is None or cached[0] != key:
+            cached = (key, ProfileView(func(self)))
+            self.__dict__['_profile'] = cached
+        return cached[1]
+    return profile
+
+
 class CarbonResource(LoggerMixin, TimeMixin):
     """
     This is the base class for every resource created for Carbon Framework.
@@ -389,9 +476,6 @@ class CarbonResource(LoggerMixin, TimeMixin):
         # every resource has a name
         self._name = name
 
-        # A list of tasks that will be executed upon the reource.
-        self._tasks = []
-
         # Carbon configuration
         self._config = config
 
@@ -401,6 +485,47 @@ class CarbonResource(LoggerMixin, TimeMixin):
         # every resource can have optional labels
         self._labels = list()
 
+        # time taken by the tasks run on the resource, keyed by task name,
+        # created once a task gets timed
+        self._timings = None
+
+    def __setattr__(self, key, value):
+        # the profile cached is built again once an attribute is set, the version
+        # tells the resources copying values out of this one that it changed
+        self.__dict__.pop('_profile', None)
+        self.__dict__['_version'] = self.__dict__.get('_version', 0) + 1
+        object.__setattr__(self, key, value)
+
+    def __delattr__(self, key):
+        self.__dict__.pop('_profile', None)
+        self.__dict__['_version'] = self.__dict__.get('_version', 0) + 1
+        object.__delattr__(self, key)
+
+    @staticmethod
+    def _versions(resources):
+        """Return the versions of a list of resources, the names in it being their own version.
+
+        :param resources: resources or resource names
+        :type resources: list
+        :return: versions of the resources
+        :rtype: tuple
+        """
+        return tuple(item if isinstance(item, string_types) else (id(item), getattr(item, '_version', None))
+                     for item in resources)
+
+    def _profile_key(self):
+        """Return the key telling whether the profile cached is still valid.
+
+        The profile cached is built again once the key changes, see
+        ~carbon.core.cached_profile. It is computed on every profile call and
+        only holds versions of resources and values cheap to get.
+
+        :return: key to compare with the one the profile cached was built with
+        :rtype: tuple
+        """
+        # the timings of the tasks are recorded in place while they run
+        return bool(self._timings),
+
     @property
     def name(self):
         return self._name
@@ -409,6 +534,19 @@ class CarbonResource(LoggerMixin, TimeMixin):
     def name(self, value):
         raise AttributeError('You can set name after class is instantiated.')
 
+    @property
+    def timings(self):
+        """Timings of the tasks run on the resource.
+
+        :return: wait and run time, in seconds, and number of retries of
+            each task run on the resource, keyed by task name
+        :rtype: OrderedDict
+        """
+        if self._timings is None:
+            # set as is, creating it does not change the profile cached
+            self.__dict__['_timings'] = OrderedDict()
+        return self._timings
+
     @property
     def config(self):
         return self._config
@@ -484,15 +622,14 @@ class CarbonResource(LoggerMixin, TimeMixin):
             labels = labels.replace(' ', '').split(',')
         return labels
 
-    def _add_task(self, t):
+    def _check_task(self, t):
         """
-        Add a task to the list of tasks for the resource
+        Check the task class of a task of the resource is a core one
         """
-        if t['task'] not in set(get_core_tasks_classes()):
+        if not is_core_task_class(t['task']):
             raise CarbonResourceError(
                 'The task class "%s" used is not valid.' % t['task']
             )
-        self._tasks.append(t)
 
     def _extract_tasks_from_resource(self):
         """
@@ -533,15 +670,23 @@ class CarbonResource(LoggerMixin, TimeMixin):
                 for task_type in self._valid_tasks_types]
 
     def reload_tasks(self):
-        self._tasks = []
+        # the tasks are only checked here, they are built again and cached
+        # once they are requested, so the resources of large scenarios do not
+        # hold them before the pipelines are built
         for task_constructor in self._get_task_constructors():
-            self._add_task(task_constructor())
+            self._check_task(task_constructor())
+        self.__dict__.pop('_tasks', None)
 
     def dump(self):
         pass
 
     def get_tasks(self):
-        return self._tasks
+        tasks = self.__dict__.get('_tasks')
+        if tasks is None:
+            # set as is, like the profile cached, as it does not change the resource
+            tasks = [task_constructor() for task_constructor in self._get_task_constructors()]
+            self.__dict__['_tasks'] = tasks
+        return tasks
 
     def profile(self):
         raise NotImplementedError
@@ -1115,12 +1260,14 @@ class CarbonPlugin(LoggerMixin, TimeMixin):
 
     __schema_file_path__ = ''
 
+    # whether the plugin validates the parameters built by build_profile against its schema file, the
+    # validate pipeline then validating the resources of the plugin in a batch before running their tasks
+    __schema_batch__ = False
+
     @classmethod
     def get_schema_keys(cls):
 
-        with open(cls.__schema_file_path__) as f:
-            schema_data = f.read()
-        return yaml.safe_load(schema_data).get('mapping').keys()
+        return load_schema_file(cls.__schema_file_path__).get('mapping').keys()
 
     @classmethod
     def build_profile(cls, resource):
@@ -1189,10 +1336,10 @@ class ProvisionerPlugin(CarbonPlugin):
         # set commonly accessed data used by provisioners
         self.data_folder = getattr(self.asset, 'data_folder')
         if hasattr(self.asset, 'provider'):
-            self.provider_params = {k: v for k, v in self.asset.profile().items()
+            self.provider_params = {k: v for k, v in copy_data(self.asset.profile()).items()
                                     if k not in getattr(self.asset, '_fields')}.get('provider')
         else:
-            self.provider_params = {k: v for k, v in self.asset.profile().items()
+            self.provider_params = {k: v for k, v in copy_data(self.asset.profile()).items()
                                     if k not in getattr(self.asset, '_fields')}
 
         self.provider_credentials = getattr(self.asset, 'credential', {})
@@ -1233,9 +1380,9 @@ class ImporterPlugin(CarbonPlugin):
         # for backward compatibility, if provider key was used in the SDF get the provider attribute from report profile
         # if no provider key was used create teh provider_params  using the _fields attribute from report profile
         if hasattr(report, 'provider'):
-            self.provider_params = self.report.profile().get('provider')
+            self.provider_params = copy_data(self.report.profile().get('provider'))
         else:
-            self.provider_params = {k: v for k, v in self.report.profile().items()
+            self.provider_params = {k: v for k, v in copy_data(self.report.profile()).items()
                                     if k not in getattr(self.report, '_fields')}
         # credentials specific to plugin
         self.provider_credentials = getattr(self.report, 'credential', {})
@@ -1481,10 +1628,17 @@ class Inventory(LoggerMixin, FileLockMixin, SingletonMixin):
         # set the master inventory
         self.master_inv = os.path.join(self.inv_dir, 'master-%s' % self.uid)
 
-    def create_master(self, all_hosts):
+    def create_master(self, all_hosts, rebuild=False):
         """Create the master ansible inventory.
         This method will create a master inventory which contains all the
         hosts in the given scenario. Each host will have a group/group:vars.
+
+        :param all_hosts: hosts of the scenario
+        :type all_hosts: list
+        :param rebuild: build the inventory from the given hosts only rather
+            than adding them to the existing master inventory, which keeps
+            being used until the new one replaces it
+        :type rebuild: bool
         """
         try:
 
@@ -1513,7 +1667,7 @@ class Inventory(LoggerMixin, FileLockMixin, SingletonMixin):
 
             # do not create master inventory if already exists
             # load it and keep building upon it
-            if os.path.exists(self.master_inv):
+            if os.path.exists(self.master_inv) and not rebuild:
                 with open(self.master_inv) as f:
                     config.readfp(f)
 
@@ -1590,10 +1744,13 @@ class Inventory(LoggerMixin, FileLockMixin, SingletonMixin):
         self.logger.debug('\n' + cfg_str)
 
     def write_inventory(self, config=None):
-        # generic method to write out the inventory file
-        if config:
-            with open(self.master_inv, 'w') as f:
+        # generic method to write out the inventory file, a hidden file ansible
+        # ignores is written first and then replaces the inventory so the
+        # playbooks running meanwhile never read a partial inventory
+        tmp_inv = os.path.join(self.inv_dir, '.%s.tmp' % os.path.basename(self.master_inv))
+        with open(tmp_inv, 'w') as f:
+            if config:
                 config.write(f)
-        else:
-            with open(self.master_inv, 'w+') as inv_file:
-                inv_file.write(self.inv_dump)
+            else:
+                f.write(self.inv_dump)
+        os.rename(tmp_inv, self.master_inv)
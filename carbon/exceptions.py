@@ -298,3 +298,24 @@ class CarbonNotifierError(CarbonResourceError):
         :type message: str
         """
         super(CarbonNotifierError, self).__init__(message)
+
+
+class CarbonSchedulerError(CarbonError):
+    """Carbon's scheduler base exception class."""
+
+    def __init__(self, message, task=None, results=None, stage_results=None):
+        """Constructor.
+
+        :param message: error message
+        :type message: str
+        :param task: name of the carbon task which failed
+        :type task: str
+        :param results: task results of the carbon task which failed
+        :type results: list
+        :param stage_results: task results for every carbon task scheduled
+        :type stage_results: dict
+        """
+        super(CarbonSchedulerError, self).__init__(message)
+        self.task = task
+        self.results = results if results is not None else list()
+        self.stage_results = stage_results if stage_results is not None else dict()
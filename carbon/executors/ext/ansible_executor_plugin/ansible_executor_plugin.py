@@ -30,8 +30,9 @@ import os.path
 import textwrap
 from carbon.core import ExecutorPlugin
 from carbon.exceptions import ArchiveArtifactsError, CarbonExecuteError, AnsibleServiceError
-from carbon.helpers import DataInjector, get_ans_verbosity, create_testrun_results, schema_validator
-from carbon.ansible_helpers import AnsibleService
+from carbon.helpers import DataInjector, get_ans_verbosity, create_testrun_results, schema_validator, \
+    get_task_concurrency
+from carbon.utils.timing import record
 
 
 class AnsibleExecutorPlugin(ExecutorPlugin):
@@ -47,6 +48,7 @@ class AnsibleExecutorPlugin(ExecutorPlugin):
     __executor_name__ = 'runner'
     __schema_file_path__ = os.path.abspath(os.path.join(os.path.dirname(__file__), "files/schema.yml"))
     __schema_ext_path__ = os.path.abspath(os.path.join(os.path.dirname(__file__), "files/extensions.py"))
+    __schema_batch__ = True
 
     def __init__(self, package):
         """Constructor.
@@ -54,6 +56,8 @@ class AnsibleExecutorPlugin(ExecutorPlugin):
         :param package: execute resource
         :type package: object
         """
+        from carbon.ansible_helpers import AnsibleService
+
         super(AnsibleExecutorPlugin, self).__init__(package)
 
         # set required attributes
@@ -71,7 +75,7 @@ class AnsibleExecutorPlugin(ExecutorPlugin):
         self.injector = DataInjector(self.all_hosts)
 
         self.ans_service = AnsibleService(self.config, self.hosts, self.all_hosts, self.options,
-                                          concurrency=self.config['TASK_CONCURRENCY']['EXECUTE'].lower())
+                                          concurrency=str(get_task_concurrency(self.config, 'execute') > 1).lower())
 
         self.ans_verbosity = get_ans_verbosity(self.config)
 
@@ -234,6 +238,7 @@ class AnsibleExecutorPlugin(ExecutorPlugin):
 
         # Build Results
         sync_results = []
+        copied = set()
         for line in lines:
             host, artifact, dest, skipped, rc = ast.literal_eval(textwrap.dedent(line).strip())
             sync_results.append({'host': host, 'artifact': artifact, 'destination': dest, 'skipped': skipped, 'rc': rc})
@@ -265,11 +270,15 @@ class AnsibleExecutorPlugin(ExecutorPlugin):
                 # Adding the only the artifacts which are not already present
                 for artifact in art_list:
                     art = os.path.join(path, artifact)
+                    copied.add(os.path.join(self.config['RESULTS_FOLDER'], art))
                     if art not in artifact_location:
                         artifact_location.append(art)
             if r['skipped']:
                 self.logger.warning('Could not find artifact(s), %s, on %s. Make sure the file exists '
                                     'and defined properly in the definition file.' % (r['artifact'], r['host']))
+        # record the size of the files copied, each one counted once
+        record('artifact_bytes', sum(os.path.getsize(item) for item in copied if os.path.isfile(item)))
+
         # Update the execute resource with the location of artifacts
         if self.execute.artifact_locations:
             for item in artifact_location:
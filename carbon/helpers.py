@@ -24,6 +24,8 @@
     :copyright: (c) 2017 Red Hat, Inc.
     :license: GPLv3, see LICENSE for more details.
 """
+import bisect
+import copy
 import inspect
 import json
 import os
@@ -34,47 +36,81 @@ import socket
 import string
 import subprocess
 import sys
+import threading
 import time
 import click
 import warnings
 from logging import getLogger
 import fnmatch
 import stat
-import cachetclient.cachet as cachet
-import jinja2
-import requests
-import urllib3
-from paramiko import RSAKey
 from ruamel.yaml.comments import CommentedMap as OrderedDict
 from collections import OrderedDict
 from ruamel.yaml import YAML
 import yaml
-from paramiko import SSHClient, WarningPolicy
-from paramiko.ssh_exception import SSHException, BadHostKeyException, \
-    AuthenticationException
-from ._compat import string_types
+from ._compat import string_types, text_type, group_entry_points
 from .constants import PROVISIONERS, RULE_HOST_NAMING, IMPORTER, DEFAULT_TASK_CONCURRENCY, \
-    TASKLIST, NOTIFYSTATES
+    TASKLIST, NOTIFYSTATES, DEFAULT_ENGINE_WORKERS, DATA_FOLDER, TEMPLATE_CACHE_FOLDER
 from .exceptions import CarbonError, HelpersError
-from pykwalify.core import Core
-from pykwalify.errors import CoreError, SchemaError
+from .utils.timing import count_retry, record
+from .utils.trace import tracer
 from xml.etree import cElementTree as ET
 
-import pkg_resources
-
 LOG = getLogger(__name__)
 
 # sentinel
 _missing = object()
 
+# safe yaml loader, the one of libyaml when pyyaml was built with it
+_SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# core tasks classes, found once by get_core_tasks_classes
+_core_tasks = dict()
+
+# schema validators and schema files data, see get_schema_validator and load_schema_file
+_schema_validators = dict()
+_schema_files = dict()
+
+# guards the creation of the schema validators and the pykwalify partial schemas registry
+_schema_lock = threading.RLock()
+
+# jinja environments, keyed by templates folder and bytecode folder, see get_template_environment
+_template_environments = dict()
+
 
 def get_core_tasks_classes():
     """
     Go through all modules within carbon.tasks package and return
     the list of all tasks classes within it. All tasks within the carbon.tasks
     module are considered valid task class to be added into the pipeline.
+    The modules are only inspected once, see clear_core_tasks_cache.
     :return: List of all valid tasks classes
     """
+    if 'classes' not in _core_tasks:
+        _core_tasks['classes'] = _find_core_tasks_classes()
+        _core_tasks['set'] = frozenset(_core_tasks['classes'])
+    return list(_core_tasks['classes'])
+
+
+def is_core_task_class(task):
+    """
+    Return whether the given class is one of the carbon.tasks task classes.
+    :param task: The task class
+    :return: True when it is a core task class
+    """
+    if 'set' not in _core_tasks:
+        get_core_tasks_classes()
+    return task in _core_tasks['set']
+
+
+def clear_core_tasks_cache():
+    """
+    Forget the core tasks classes found, to be called once a new task
+    module was added to the carbon.tasks package.
+    """
+    _core_tasks.clear()
+
+
+def _find_core_tasks_classes():
     from .core import CarbonTask
     from . import tasks
 
@@ -98,15 +134,94 @@ def get_core_tasks_classes():
     return tasks_list
 
 
+class PluginRegistry(object):
+    """Registry of the plugins carbon discovers through entry points.
+
+    The installed distributions are scanned once for the entry points of all
+    the plugin groups, the plugins of a group are only loaded the first time
+    the group is used. Lookups of a plugin by name or name prefix are cached,
+    the plugins installed do not change while carbon runs.
+    """
+
+    GROUPS = ['provisioner_plugins', 'provider_plugins', 'orchestrator_plugins', 'executor_plugins',
+              'importer_plugins', 'notification_plugins']
+
+    def __init__(self):
+        self._entry_points = None
+        self._classes = dict()
+        self._lookups = dict()
+
+    def classes(self, group):
+        """Return the plugin classes of a group keyed by entry point name.
+
+        :param group: entry point group
+        :type group: str
+        :return: plugin classes
+        :rtype: OrderedDict
+        """
+        if group not in self._classes:
+            if self._entry_points is None:
+                self._entry_points = group_entry_points(self.GROUPS)
+            classes = OrderedDict()
+            for entry_point in self._entry_points.get(group, []):
+                classes[entry_point.name] = entry_point.load()
+            self._classes[group] = classes
+        return self._classes[group]
+
+    def find(self, group, name, attr='__plugin_name__', prefix=False):
+        """Return the first plugin class of a group named after the given name.
+
+        :param group: entry point group
+        :type group: str
+        :param name: plugin name
+        :type name: str
+        :param attr: class attribute holding the plugin name
+        :type attr: str
+        :param prefix: whether the name only needs to be a prefix of the
+            plugin name
+        :type prefix: bool
+        :return: plugin class or None
+        """
+        key = (group, attr, name, prefix)
+        if key not in self._lookups:
+            self._lookups[key] = None
+            for plugin in self.classes(group).values():
+                value = getattr(plugin, attr)
+                if value == name or (prefix and value.startswith(name)):
+                    self._lookups[key] = plugin
+                    break
+        return self._lookups[key]
+
+    def register(self, group, name, plugin):
+        """Register a plugin class which is not installed through an entry point.
+
+        :param group: entry point group
+        :type group: str
+        :param name: entry point name
+        :type name: str
+        :param plugin: plugin class
+        :type plugin: class
+        """
+        self.classes(group)[name] = plugin
+        self._lookups = dict()
+
+    def clear(self):
+        """Forget the plugins discovered, the next lookup scans the entry points again."""
+        self._entry_points = None
+        self._classes = dict()
+        self._lookups = dict()
+        clear_core_tasks_cache()
+
+
+plugin_registry = PluginRegistry()
+
+
 # Using entry point to get the provisioners defined in carbon's setup.py file
 def get_provisioners_plugin_classes():
     """Return all provisioner plugin classes discovered by carbon
     :return: The list of provisioner plugin classes
     """
-    provisioner_plugin_dict = {}
-    for entry_point in pkg_resources.iter_entry_points('provisioner_plugins'):
-        provisioner_plugin_dict[entry_point.name] = entry_point.load()
-    return provisioner_plugin_dict
+    return dict(plugin_registry.classes('provisioner_plugins'))
 
 
 def get_default_provisioner_plugin(provider=None):
@@ -150,9 +265,7 @@ def get_provisioner_plugin_class(name):
     :param name: The name of the provisioner
     :return: The provisioner gateway class
     """
-    for provisioner in get_provisioners_plugin_classes().values():
-        if provisioner.__plugin_name__.startswith(name):
-            return provisioner
+    return plugin_registry.find('provisioner_plugins', name, prefix=True)
 
 
 # Using entry point to get the providers from within carbon as well as the ones coming from the external plugins
@@ -160,10 +273,7 @@ def get_provider_plugin_classes():
     """Return all provider plugin classes discovered by carbon
     :return: The list of provider plugin classes
     """
-    provider_plugin_dict = {}
-    for entry_point in pkg_resources.iter_entry_points('provider_plugins'):
-        provider_plugin_dict[entry_point.name] = entry_point.load()
-    return provider_plugin_dict
+    return dict(plugin_registry.classes('provider_plugins'))
 
 
 def get_provider_plugin_class(name):
@@ -173,9 +283,7 @@ def get_provider_plugin_class(name):
     :param name: the name of the provider
     :return: the provider class
     """
-    for provider in get_provider_plugin_classes().values():
-        if provider.__provider_name__ == name:
-            return provider
+    return plugin_registry.find('provider_plugins', name, attr='__provider_name__')
 
 
 def get_provider_plugin_list():
@@ -192,10 +300,7 @@ def get_orchestrators_plugin_classes():
     """Return all orchestrator plugin classes discovered by carbon
     :return: The list of orchestrator plugin classes
     """
-    orchestrator_plugin_dict = {}
-    for entry_point in pkg_resources.iter_entry_points('orchestrator_plugins'):
-        orchestrator_plugin_dict[entry_point.name] = entry_point.load()
-    return orchestrator_plugin_dict.values()
+    return plugin_registry.classes('orchestrator_plugins').values()
 
 
 def get_orchestrator_plugin_class(name):
@@ -205,9 +310,7 @@ def get_orchestrator_plugin_class(name):
     :param name: the name of the orchestrator
     :return: the orchestrator class
     """
-    for orchestrator in get_orchestrators_plugin_classes():
-        if orchestrator.__plugin_name__ == name:
-            return orchestrator
+    return plugin_registry.find('orchestrator_plugins', name)
 
 
 def get_orchestrators_plugin_list():
@@ -225,10 +328,7 @@ def get_executors_plugin_classes():
     """Return all executor plugin classes discovered by carbon
     :return: The list of executor plugin classes
     """
-    executor_plugin_dict = {}
-    for entry_point in pkg_resources.iter_entry_points('executor_plugins'):
-        executor_plugin_dict[entry_point.name] = entry_point.load()
-    return executor_plugin_dict.values()
+    return plugin_registry.classes('executor_plugins').values()
 
 
 def get_executor_plugin_class(name):
@@ -238,9 +338,7 @@ def get_executor_plugin_class(name):
     :param name: the name of the executor
     :return: the executor class
     """
-    for executor in get_executors_plugin_classes():
-        if executor.__executor_name__ == name:
-            return executor
+    return plugin_registry.find('executor_plugins', name, attr='__executor_name__')
 
 
 def get_executors_plugin_list():
@@ -257,10 +355,7 @@ def get_importers_plugin_classes():
     """Return all importer plugin classes discovered by carbon
     :return: The list of importer plugin classes
     """
-    ext_plugin_dict = {}
-    for entry_point in pkg_resources.iter_entry_points('importer_plugins'):
-        ext_plugin_dict[entry_point.name] = entry_point.load()
-    return ext_plugin_dict.values()
+    return plugin_registry.classes('importer_plugins').values()
 
 
 def get_default_importer_plugin_class(provider):
@@ -268,9 +363,7 @@ def get_default_importer_plugin_class(provider):
     :param provider: The provider class
     :return: The importer plugin class
     """
-    for plugin_class in get_importers_plugin_classes():
-        if plugin_class.__plugin_name__.startswith(provider.__provider_name__):
-            return plugin_class
+    return plugin_registry.find('importer_plugins', provider.__provider_name__, prefix=True)
 
 
 def get_importers_plugin_list():
@@ -290,9 +383,7 @@ def get_importer_plugin_class(name):
     :param name: The name of the importer
     :return: The importer plugin class
     """
-    for reporter in get_importers_plugin_classes():
-        if reporter.__plugin_name__.startswith(name):
-            return reporter
+    return plugin_registry.find('importer_plugins', name, prefix=True)
 
 
 def is_provider_mapped_to_provisioner(provider, provisioner):
@@ -331,10 +422,7 @@ def get_notifiers_plugin_classes():
     """Return all notification plugin classes discovered by carbon
     :return: The list of notification plugin classes
     """
-    notifier_plugin_dict = {}
-    for entry_point in pkg_resources.iter_entry_points('notification_plugins'):
-        notifier_plugin_dict[entry_point.name] = entry_point.load()
-    return notifier_plugin_dict.values()
+    return plugin_registry.classes('notification_plugins').values()
 
 
 def get_notifier_plugin_class(name):
@@ -344,26 +432,177 @@ def get_notifier_plugin_class(name):
     :param name: the name of the notification
     :return: the notification class
     """
-    for notification in get_notifiers_plugin_classes():
-        if notification.__plugin_name__ == name or \
-                notification.__plugin_name__.startswith(name):
-            return notification
+    return plugin_registry.find('notification_plugins', name, prefix=True)
 
 
-def schema_validator(schema_data, schema_files, schema_creds=None, schema_ext_files=None):
+def _walk_schema_rules(core, data, rule, partial_schemas):
+    """Validate data against pykwalify rules built once, returning the errors found.
+
+    pykwalify has no public api validating data against rules already built,
+    this is the only place using its internals: the partial schemas registry
+    and the Core._validate rules walker. None is returned when the pykwalify
+    installed does not provide them, for the data to be validated through the
+    public api instead.
+
+    The registry is global to the process, a schema with partial schemas is
+    walked under the schema lock, its partial schemas being registered while
+    no other validation uses the registry.
+
+    :param core: pykwalify core holding the schema and extensions loaded
+    :type core: pykwalify.core.Core
+    :param data: the data to validate
+    :type data: dict
+    :param rule: root rule of the schema
+    :type rule: pykwalify.rule.Rule
+    :param partial_schemas: rules of the partial schemas, keyed by name
+    :type partial_schemas: dict
+    :return: the errors found, None if the rules cannot be walked
+    :rtype: list
     """
+    import pykwalify
 
-    :param schema_data: the schema dictionary data
-    :type dict
-    :param schema_files: the yaml schema file for the plugins
-    :type list of file paths
-    :param schema_creds: optional dictionary creds
-    :type dict
+    registry = getattr(pykwalify, 'partial_schemas', None)
+    if not callable(getattr(core, '_validate', None)) or not isinstance(registry, dict):
+        return None
+
+    # each validation gets its own core, the validators are shared by the tasks threads
+    core = copy.copy(core)
+    core.source = data
+    core.errors = list()
+    if partial_schemas:
+        with _schema_lock:
+            registry.update(partial_schemas)
+            core._validate(data, rule, '', list())
+    else:
+        core._validate(data, rule, '', list())
+    return core.errors
+
+
+class SchemaValidator(object):
+    """Schema loaded and compiled once, validating any number of documents.
+
+    The schema files are parsed, the extensions imported and the pykwalify
+    rules built when the validator is created, each validation only walks the
+    rules. The documents which passed are remembered, validating one of them
+    again, i.e. by its plugin once the validate pipeline checked it in a
+    batch, does not walk the rules again. Use get_schema_validator to share
+    the validators in the process.
+    """
+
+    def __init__(self, schema_files, schema_ext_files=None):
+        """Constructor.
+
+        :param schema_files: the yaml schema files
+        :type schema_files: list
+        :param schema_ext_files: optional list of extension file paths
+        :type schema_ext_files: list
+        """
+        from pykwalify.core import Core
+        from pykwalify.rule import Rule
+
+        self.schema_files = list(schema_files)
+        self.schema_ext_files = list(schema_ext_files or [])
+        self._core = Core(source_data=dict(), schema_files=self.schema_files, extensions=self.schema_ext_files)
+
+        # partial schemas are built before the root rule including them, as pykwalify does
+        self.partial_schemas = dict()
+        schema = dict()
+        for key, value in self._core.schema.items():
+            if key.startswith('schema;'):
+                self.partial_schemas[key.split(';', 1)[1]] = Rule(schema=value)
+            else:
+                schema[key] = value
+        self.root_rule = Rule(schema=schema)
+
+        # serialization of the documents which passed
+        self._passed = set()
+
+    def errors(self, data):
+        """Return the errors found validating the data against the schema.
+
+        :param data: the data to validate
+        :type data: dict
+        :return: the errors found
+        :rtype: list
+        """
+        key = json.dumps(data, sort_keys=True, default=str)
+        if key in self._passed:
+            return list()
+
+        errors = _walk_schema_rules(self._core, data, self.root_rule, self.partial_schemas)
+        if errors is None:
+            from pykwalify.core import Core
+
+            # the public api registers the partial schemas of each validation in the pykwalify registry
+            with _schema_lock:
+                core = Core(source_data=data, schema_files=self.schema_files, extensions=self.schema_ext_files)
+                core.validate(raise_exception=False)
+            errors = core.validation_errors
+
+        if not errors:
+            self._passed.add(key)
+        return [text_type(error) for error in errors]
+
+    def validate(self, data):
+        """Validate the data against the schema.
+
+        :param data: the data to validate
+        :type data: dict
+        :raises SchemaError: listing all the errors found
+        """
+        from pykwalify.errors import SchemaError
+
+        errors = self.errors(data)
+        if errors:
+            raise SchemaError(u'Schema validation failed:\n - {error_msg}.'.format(error_msg=u'.\n - '.join(errors)))
+
+
+def get_schema_validator(schema_files, schema_ext_files=None):
+    """
+    Return the validator of the given schema files and extensions, created once per process.
+
+    :param schema_files: the yaml schema files
+    :type schema_files: list
     :param schema_ext_files: optional list of extension file paths
-    :type: list of file paths
-    :return:
+    :type schema_ext_files: list
+    :return: schema validator
+    :rtype: SchemaValidator
+    """
+    key = (tuple(schema_files), tuple(schema_ext_files or []))
+    validator = _schema_validators.get(key)
+    if validator is None:
+        with _schema_lock:
+            validator = _schema_validators.get(key)
+            if validator is None:
+                validator = _schema_validators.setdefault(key, SchemaValidator(schema_files, schema_ext_files))
+    return validator
+
+
+def load_schema_file(schema_file):
     """
+    Return the data of a yaml schema file, parsed once per process.
 
+    :param schema_file: the yaml schema file
+    :type schema_file: str
+    :return: schema data
+    :rtype: dict
+    """
+    if schema_file not in _schema_files:
+        with open(schema_file) as f:
+            _schema_files[schema_file] = load_yaml(f)
+    return _schema_files[schema_file]
+
+
+def clear_schemas_cache():
+    """
+    Forget the schemas loaded and validators created, to be called once a
+    schema file or extension changed.
+    """
+    _schema_validators.clear()
+    _schema_files.clear()
+
+
+def _build_schema_data(schema_data, schema_creds=None):
     schema = {}
 
     if schema_creds:
@@ -375,18 +614,69 @@ def schema_validator(schema_data, schema_files, schema_creds=None, schema_ext_fi
         if creds:
             creds = dict(credential={x: y for k, v in creds.items() for x, y in v.items() if x != 'name'})
             schema.update(creds)
+    return schema
 
-    c = Core(source_data=schema,
-             schema_files=schema_files,
-             extensions=schema_ext_files)
+
+def schema_validator(schema_data, schema_files, schema_creds=None, schema_ext_files=None):
+    """
+
+    :param schema_data: the schema dictionary data
+    :type dict
+    :param schema_files: the yaml schema file for the plugins
+    :type list of file paths
+    :param schema_creds: optional dictionary creds
+    :type dict
+    :param schema_ext_files: optional list of extension file paths
+    :type: list of file paths
+    :return:
+    """
+    from pykwalify.errors import CoreError, SchemaError
 
     try:
-        c.validate(raise_exception=True)
+        get_schema_validator(schema_files, schema_ext_files).validate(_build_schema_data(schema_data, schema_creds))
     except (CoreError, SchemaError) as ex:
         LOG.error(ex.msg)
         raise
 
 
+def schema_validator_batch(schema_data_list, schema_files, schema_creds=None, schema_ext_files=None,
+                           raise_on_failure=True):
+    """
+    Validate the data of many resources of one type in a single pass, with
+    the schema loaded once, reporting the errors of all of them at once.
+
+    :param schema_data_list: the schema dictionary data of each resource
+    :type schema_data_list: list of dict
+    :param schema_files: the yaml schema file for the plugins
+    :type schema_files: list of file paths
+    :param schema_creds: optional dictionary creds
+    :type schema_creds: dict
+    :param schema_ext_files: optional list of extension file paths
+    :type schema_ext_files: list of file paths
+    :param raise_on_failure: whether to raise an error once any resource fails
+    :type raise_on_failure: bool
+    :return: the errors found for each resource, in the order given
+    :rtype: list of list
+    :raises SchemaError: listing the errors found for each resource
+    """
+    from pykwalify.errors import CoreError, SchemaError
+
+    try:
+        validator = get_schema_validator(schema_files, schema_ext_files)
+        errors = [validator.errors(_build_schema_data(schema_data, schema_creds)) for schema_data in schema_data_list]
+        messages = [u'%s: %s' % (schema_data.get('name', index), error)
+                    for index, schema_data in enumerate(schema_data_list) for error in errors[index]]
+        if messages:
+            ex = SchemaError(u'Schema validation failed:\n - {error_msg}.'.format(error_msg=u'.\n - '.join(messages)))
+            LOG.error(ex.msg)
+            if raise_on_failure:
+                raise ex
+        return errors
+    except CoreError as ex:
+        LOG.error(ex.msg)
+        raise
+
+
 def gen_random_str(char_num=8):
     """
     Generate a string with a specific number of characters, defined
@@ -488,6 +778,8 @@ def is_url_valid(url):
     :return: True if url exists or false if url does not exist.
     :rtype: bool
     """
+    import requests
+
     try:
         response = requests.get(url)
         response.raise_for_status()
@@ -497,18 +789,49 @@ def is_url_valid(url):
     return True
 
 
-def template_render(filepath, env_dict):
+def get_template_environment(path, bytecode_folder=None):
+    """
+    Return the jinja environment loading the templates of a folder, created
+    once per process. The environment keeps the templates it compiled, which
+    are also saved to the bytecode folder, when given, for the next runs.
+
+    :param path: folder of the templates
+    :type path: str
+    :param bytecode_folder: folder the compiled templates are saved to
+    :type bytecode_folder: str
+    :return: jinja environment
+    :rtype: jinja2.Environment
+    """
+    import jinja2
+
+    key = (path, bytecode_folder)
+    if key not in _template_environments:
+        bytecode_cache = None
+        if bytecode_folder:
+            try:
+                if not os.path.isdir(bytecode_folder):
+                    os.makedirs(bytecode_folder)
+                bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_folder)
+            except OSError as ex:
+                # templates only get compiled each run
+                LOG.debug('Unable to use %s to save the compiled templates: %s' % (bytecode_folder, ex))
+        _template_environments[key] = jinja2.Environment(loader=jinja2.FileSystemLoader(path), lstrip_blocks=True,
+                                                         trim_blocks=True, bytecode_cache=bytecode_cache)
+    return _template_environments[key]
+
+
+def template_render(filepath, env_dict, bytecode_folder=None):
     """
     A function to do jinja templating given a file and a dictionary of key/vars
 
     :param filepath: path to a file
     :param env_dict: dictionary of key/values used for data substitution
+    :param bytecode_folder: optional folder the compiled templates are saved to
     :return: stream of data with the templating complete
     :rtype: data stream
     """
     path, filename = os.path.split(filepath)
-    return jinja2.Environment(loader=jinja2.FileSystemLoader(
-        path), lstrip_blocks=True, trim_blocks=True).get_template(filename).render(env_dict)
+    return get_template_environment(path, bytecode_folder).get_template(filename).render(env_dict)
 
 
 def exec_local_cmd(cmd, env_var=None):
@@ -684,7 +1007,100 @@ def filter_resources_labels(res_list, carbon_options):
         return res_list
 
 
-def fetch_assets(hosts, task, all_hosts=True):
+class HostResolver(object):
+    """Host resolver class.
+
+    Resolves the hosts an action, execute or report task targets. The host
+    names, roles and groups are indexed once when the resolver is created so
+    each task lookup no longer walks every host of the scenario. A host name
+    is matched when any of the requested names is a substring of it, the
+    result of each substring search is cached as most tasks reference the
+    same few names, roles or groups.
+
+    The resolver needs to be created again whenever the hosts change, i.e.
+    once assets get provisioned.
+    """
+
+    def __init__(self, hosts):
+        """Constructor.
+
+        :param hosts: scenario hosts
+        :type hosts: list
+        """
+        self.hosts = list(hosts)
+        self._names = [host.name for host in self.hosts]
+        self._matches = dict()
+
+        # all the host names in one string, searched instead of each name
+        self._joined = '\n'.join(self._names)
+        self._starts = list()
+        position = 0
+        for host_name in self._names:
+            self._starts.append(position)
+            position += len(host_name) + 1
+
+        # host positions keyed by role, groups are only used by hosts without a role
+        self._labels = dict()
+        for index, host in enumerate(self.hosts):
+            if hasattr(host, 'role'):
+                labels = host.role
+            elif hasattr(host, 'groups'):
+                labels = host.groups
+            else:
+                continue
+            for label in labels:
+                self._labels.setdefault(label, list()).append(index)
+
+    def _name_matches(self, name):
+        """Return the positions of the hosts whose name contains the given name."""
+        if name in self._matches:
+            return self._matches[name]
+
+        if not name or '\n' in name:
+            matches = [index for index, host_name in enumerate(self._names) if name in host_name]
+        else:
+            matches = list()
+            position = self._joined.find(name)
+            while position != -1:
+                index = bisect.bisect_right(self._starts, position) - 1
+                matches.append(index)
+                # continue the search from the next host name
+                if index + 1 == len(self._starts):
+                    break
+                position = self._joined.find(name, self._starts[index + 1])
+        self._matches[name] = matches
+        return matches
+
+    def resolve(self, names):
+        """Return the hosts targeted by the given host references.
+
+        :param names: host names, roles or groups or host resources
+        :type names: list
+        :return: hosts in scenario order, a host is listed once for each of
+            its roles or groups matched when its name did not match
+        :rtype: list
+        """
+        if all(isinstance(item, string_types) for item in names):
+            if 'all' in names:
+                return list(self.hosts)
+            names = set(names)
+            matched = set()
+            for name in names:
+                matched.update(self._name_matches(name))
+            indexes = list(matched)
+            for name in names:
+                indexes.extend([index for index in self._labels.get(name, []) if index not in matched])
+        else:
+            matched = set()
+            for task_host in names:
+                # task_host.name in host.name is kept for when linchpin count was used and there
+                # are host resources with names matching the original resource name
+                matched.update(self._name_matches(task_host.name))
+            indexes = list(matched)
+        return [self.hosts[index] for index in sorted(indexes)]
+
+
+def fetch_assets(hosts, task, all_hosts=True, resolver=None):
     """Set the hosts for a task requiring hosts.
 
     This method is helpful for action/execute resources. These resources
@@ -700,58 +1116,33 @@ def fetch_assets(hosts, task, all_hosts=True):
     :type task: dict
     :param all_hosts: determine to set all hosts
     :type all_hosts: bool
+    :param resolver: host resolver indexing the scenario hosts, created from
+        the hosts when not given
+    :type resolver: HostResolver
     :return: updated task object including host objects
     :rtype: dict
     """
 
     # placeholders
-    _hosts = list()
-    _all_hosts = list()
-    _filtered_hosts = list()
     _type = None
 
+    if resolver is None:
+        resolver = HostResolver(hosts)
+
     # determine the task attribute where hosts are stored
     if 'resource' in task:
         _type = 'resource'
     elif 'package' in task:
         _type = 'package'
 
-    # determine the task host data types
-    if all(isinstance(item, string_types) for item in task[_type].hosts):
-        for host in hosts:
-            if all_hosts:
-                _all_hosts.append(host)
-            if 'all' in task[_type].hosts:
-                _hosts.append(host)
-                continue
-            if host.name in task[_type].hosts or [h for h in task[_type].hosts if h in host.name]:
-                _hosts.append(host)
-                continue
-            if hasattr(host, 'role'):
-                for r in host.role:
-                    if r in task[_type].hosts:
-                        _hosts.append(host)
-            elif hasattr(host, 'groups'):
-                for g in host.groups:
-                    if g in task[_type].hosts:
-                        _hosts.append(host)
-    else:
-        for host in hosts:
-            if all_hosts:
-                _all_hosts.append(host)
-            for task_host in task[_type].hosts:
-                # additional check task_host.name in host.name was put in case when linchpin count was
-                # used and there are host resources with names matching original resource name
-                if host.name == task_host.name or task_host.name in host.name:
-                    _hosts.append(host)
-                    break
+    _hosts = resolver.resolve(task[_type].hosts)
     if _hosts:
         task[_type].hosts = _hosts
-    task[_type].all_hosts = _all_hosts
+    task[_type].all_hosts = list(resolver.hosts) if all_hosts else list()
     return task
 
 
-def fetch_executes(executes, hosts, task):
+def fetch_executes(executes, hosts, task, resolver=None):
     """Set the executes for a task requiring executes.
 
     This method is helpful for report resources. These resources
@@ -767,6 +1158,9 @@ def fetch_executes(executes, hosts, task):
     :type hosts: list
     :param task: task requiring executes
     :type task: dict
+    :param resolver: host resolver indexing the scenario hosts, created from
+        the hosts when not given
+    :type resolver: HostResolver
     :return: updated task object including execute objects
     :rtype: dict
     """
@@ -775,31 +1169,28 @@ def fetch_executes(executes, hosts, task):
     _executes = list()
     _type = None
 
+    if resolver is None:
+        resolver = HostResolver(hosts)
+
     # determine the task attribute where hosts are stored
     if 'resource' in task:
         _type = 'resource'
     elif 'package' in task:
         _type = 'package'
 
-    # determine the task host data types
+    # determine the task execute data types
     if all(isinstance(item, string_types) for item in task[_type].executes):
-        for e in executes:
-            if e.name in task[_type].executes:
-                # fetch hosts to be used later for data injection
-                dummy_task = dict()
-                dummy_task[_type] = e
-                dummy_task = fetch_assets(hosts, dummy_task)
-                _executes.append(dummy_task[_type])
+        names = set(task[_type].executes)
     else:
-        for e in executes:
-            for task_execute in task[_type].executes:
-                if e.name == task_execute.name:
-                    # fetch hosts to be used later for data injection
-                    dummy_task = dict()
-                    dummy_task[_type] = e
-                    dummy_task = fetch_assets(hosts, dummy_task)
-                    _executes.append(dummy_task[_type])
-                    break
+        names = set(task_execute.name for task_execute in task[_type].executes)
+
+    for e in executes:
+        if e.name in names:
+            # fetch hosts to be used later for data injection
+            dummy_task = dict()
+            dummy_task[_type] = e
+            dummy_task = fetch_assets(hosts, dummy_task, resolver=resolver)
+            _executes.append(dummy_task[_type])
 
     if not _executes:
         # Kept having issues tyring to import the Execute
@@ -837,6 +1228,9 @@ def ssh_retry(obj):
         """
         SSH Connection check and retries
         """
+        from paramiko import SSHClient, WarningPolicy
+        from paramiko.ssh_exception import SSHException, BadHostKeyException, AuthenticationException
+
         # Set flag and Inventory
         ssh_errs = False
         args[0].set_inventory()
@@ -872,32 +1266,36 @@ def ssh_retry(obj):
             server_ssh_port = 22 if 'ansible_port' not in sys_vars else sys_vars.get('ansible_port')
 
             # Perform SSH checks
-            attempt = 1
-            while attempt <= MAX_ATTEMPTS:
-                try:
-                    ssh = SSHClient()
-                    ssh.set_missing_host_key_policy(WarningPolicy())
-
-                    # Test ssh connection
-                    ssh.connect(server_ip,
-                                port=server_ssh_port,
-                                username=server_user,
-                                key_filename=server_key_file,
-                                timeout=5)
-                    LOG.debug("Server %s - IP: %s is reachable." %
-                              (group, server_ip))
-                    ssh.close()
-                    break
-                except (BadHostKeyException, AuthenticationException,
-                        SSHException, socket.error) as ex:
-                    attempt = attempt + 1
-                    LOG.error(ex)
-                    LOG.error("Server %s - IP: %s is unreachable." % (group,
-                                                                      server_ip))
-                    if attempt <= MAX_ATTEMPTS:
-                        LOG.info('Attempt %s of %s: retrying in %s seconds' %
-                                 (attempt, MAX_ATTEMPTS, MAX_WAIT_TIME))
-                        time.sleep(MAX_WAIT_TIME)
+            start = time.time()
+            with tracer.span('ssh %s' % server_ip, 'ssh', group=str(group)):
+                attempt = 1
+                while attempt <= MAX_ATTEMPTS:
+                    try:
+                        ssh = SSHClient()
+                        ssh.set_missing_host_key_policy(WarningPolicy())
+
+                        # Test ssh connection
+                        ssh.connect(server_ip,
+                                    port=server_ssh_port,
+                                    username=server_user,
+                                    key_filename=server_key_file,
+                                    timeout=5)
+                        LOG.debug("Server %s - IP: %s is reachable." %
+                                  (group, server_ip))
+                        ssh.close()
+                        break
+                    except (BadHostKeyException, AuthenticationException,
+                            SSHException, socket.error) as ex:
+                        attempt = attempt + 1
+                        LOG.error(ex)
+                        LOG.error("Server %s - IP: %s is unreachable." % (group,
+                                                                          server_ip))
+                        if attempt <= MAX_ATTEMPTS:
+                            LOG.info('Attempt %s of %s: retrying in %s seconds' %
+                                     (attempt, MAX_ATTEMPTS, MAX_WAIT_TIME))
+                            count_retry()
+                            time.sleep(MAX_WAIT_TIME)
+            record('ssh_wait', time.time() - start)
 
             # Check Max SSH Retries performed
             if attempt > MAX_ATTEMPTS:
@@ -1292,7 +1690,64 @@ def build_artifact_regex_query(name):
     return regquery
 
 
-def validate_render_scenario(scenario, temp_data=None):
+def load_yaml(stream):
+    """Parse a yaml document the way yaml.safe_load does, with libyaml when available.
+
+    :param stream: yaml document
+    :type stream: str
+    :return: data parsed
+    """
+    return yaml.load(stream, Loader=_SafeLoader)
+
+
+def copy_data(data):
+    """Copy data parsed from a yaml or json document.
+
+    Only the dicts and lists are copied, which is much faster than
+    copy.deepcopy for the trees parsed from a scenario or the profiles of
+    the resources. The ordered dicts are copied as ordered dicts.
+
+    :param data: data parsed
+    :return: copy of the data
+    """
+    if isinstance(data, OrderedDict):
+        return OrderedDict((key, copy_data(value)) for key, value in data.items())
+    if isinstance(data, dict):
+        return dict((key, copy_data(value)) for key, value in data.items())
+    if isinstance(data, list):
+        return [copy_data(item) for item in data]
+    return data
+
+
+class ScenarioStream(text_type):
+    """Data stream of a rendered scenario, along with the data parsed from it.
+
+    The stream is the text of the scenario so it is used as before, the data
+    spares parsing the text again each time the scenario is loaded or validated.
+    """
+
+    def __new__(cls, stream, data=_missing):
+        obj = super(ScenarioStream, cls).__new__(cls, stream)
+        obj.data = load_yaml(stream) if data is _missing else data
+        return obj
+
+    def __reduce__(self):
+        # keep the data parsed when the stream is handed to another process
+        return self.__class__, (text_type(self), self.data)
+
+
+def load_scenario_stream(scenario_stream):
+    """Return the data of a scenario data stream, parsing it only when it was not parsed already.
+
+    :param scenario_stream: scenario data stream
+    :type scenario_stream: str or ScenarioStream
+    :return: scenario data
+    """
+    data = getattr(scenario_stream, 'data', _missing)
+    return load_yaml(scenario_stream) if data is _missing else data
+
+
+def validate_render_scenario(scenario, temp_data=None, bytecode_folder=None):
     """
     This method takes the absolute path of the scenario descriptor file and returns back a list of
     data streams of scenario(s) after doing the following checks:
@@ -1300,12 +1755,15 @@ def validate_render_scenario(scenario, temp_data=None):
     (2) Checks for include section present in the scenario file
     (3) Checks the include section has valid scenario file path and it is not empty
     (4) Checks there is no yaml.safe_load error for scenario file in the include section
+    Each scenario file is rendered and parsed once, the data streams keep the data parsed.
     :param scenario: scenario file path
     :type scenario: str
     :param temp_data: the file path to jinja template vars data or a json dictionary of vars data
     :type temp_data: dict or str
+    :param bytecode_folder: optional folder the compiled scenario templates are saved to
+    :type bytecode_folder: str
     :return: scenario data stream(s)
-    :rtype: list of data streams
+    :rtype: list of ScenarioStream
     """
     scenario_stream_list = list()
 
@@ -1318,9 +1776,10 @@ def validate_render_scenario(scenario, temp_data=None):
         os.environ.update(temp_data)
 
     try:
-        data = yaml.safe_load(template_render(scenario, os.environ))
+        scenario_stream = ScenarioStream(template_render(scenario, os.environ, bytecode_folder))
         # adding master scenario as the first scenario data stream
-        scenario_stream_list.append(template_render(scenario, os.environ))
+        scenario_stream_list.append(scenario_stream)
+        data = scenario_stream.data
         if 'include' in data.keys():
             include_item = data['include']
             include_template = list()
@@ -1330,8 +1789,7 @@ def validate_render_scenario(scenario, temp_data=None):
                         item = os.path.abspath(item)
                         # check to verify the data in included scenario is valid
                         try:
-                            yaml.safe_load(template_render(item, os.environ))
-                            include_template.append(template_render(item, os.environ))
+                            include_template.append(ScenarioStream(template_render(item, os.environ, bytecode_folder)))
                         except yaml.YAMLError:
                             # raising Carbon error to differentiate the yaml issue is with included scenario
                             raise CarbonError('Error loading updated included scenario data!')
@@ -1377,6 +1835,9 @@ def ssh_key_file_generator(workspace, ssh_key_param):
             'Error setting private key file permissions: %s' % ex
         )
 
+    from paramiko import RSAKey
+    from paramiko.ssh_exception import SSHException
+
     # Lets assume it's a private key file and try to load it
     # and create a public key for it
     try:
@@ -1410,22 +1871,47 @@ def lookup_ip_of_hostname(host_name):
     return socket.gethostbyname(host_name)
 
 
+def get_task_concurrency(config, task_name):
+    """
+    get the maximum number of tasks of the given type to run
+    at the same time, set in the task_concurrency section of
+    the config. True runs up to the default number of workers,
+    False runs them one at a time.
+    :param config: carbon config
+    :type config: dict
+    :param task_name: carbon task name
+    :type task_name: str
+    :return: maximum number of tasks to run at the same time
+    :rtype: int
+    """
+    val = str(config.get('TASK_CONCURRENCY', dict()).get(task_name.upper()))
+    if val.lower() == 'true':
+        return DEFAULT_ENGINE_WORKERS
+    if val.lower() in ['false', 'none']:
+        return 1
+    try:
+        limit = int(val)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise CarbonError('Task concurrency of %s must be True, False or a number greater than zero, '
+                          'got %s.' % (task_name, val))
+    return limit
+
+
 def set_task_class_concurrency(task, resource):
     """
-    set the task __concurrency__ field in the class
-    to whatever was passed in the config
+    set the task __concurrent__ and __concurrency__ fields in
+    the class to whatever was passed in the config
     :param task:
     :type task: CarbonTask class
     :param resource:
     :type CarbonResource object
     :return: CarbonTask class
     """
-    val = getattr(resource, 'config')['TASK_CONCURRENCY'].get(task['task'].__task_name__.upper())
-    if val == 'True':
-        val = True
-    else:
-        val = False
-    task['task'].__concurrent__ = val
+    limit = get_task_concurrency(getattr(resource, 'config'), task['task'].__task_name__)
+    task['task'].__concurrent__ = limit > 1
+    task['task'].__concurrency__ = limit
     return task
 
 
@@ -1468,7 +1954,7 @@ def sort_tasklist(user_tasks):
         return sorted(user_tasks, key=NOTIFYSTATES.index)
 
 
-def validate_cli_scenario_option(ctx, scenario, vars_data=None):
+def validate_cli_scenario_option(ctx, scenario, vars_data=None, data_folder=None):
     # Make sure the file exists and gets its absolute path
     if scenario is not None and os.path.isfile(scenario):
         scenario = os.path.abspath(scenario)
@@ -1478,7 +1964,9 @@ def validate_cli_scenario_option(ctx, scenario, vars_data=None):
 
     # Checking if include section is present and getting validated scenario stream/s
     try:
-        scenario_stream = validate_render_scenario(scenario, vars_data)
+        # the compiled scenario templates are kept in the data folder for the next runs
+        scenario_stream = validate_render_scenario(scenario, vars_data,
+                                                   os.path.join(data_folder or DATA_FOLDER, TEMPLATE_CACHE_FOLDER))
         return scenario_stream
     except yaml.YAMLError:
         click.echo('Error loading updated scenario data!')
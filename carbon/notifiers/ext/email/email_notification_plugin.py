@@ -146,13 +146,15 @@ class EmailNotificationPlugin(NotificationPlugin):
                 self.body = template_render(os.path.abspath(os.path.join(os.path.dirname(__file__),
                                                             'templates/email_txt_template.jinja')
                                                             ),
-                                            generate_default_template_vars(self.scenario, self.notification)
+                                            generate_default_template_vars(self.scenario, self.notification),
+                                            self.config.get('TEMPLATE_CACHE_FOLDER')
                                             )
             else:
                 self.body = template_render(os.path.abspath(os.path.join(os.path.dirname(__file__),
                                                                          'templates/email_on_start_txt_template.jinja')
                                                             ),
-                                            generate_default_template_vars(self.scenario, self.notification)
+                                            generate_default_template_vars(self.scenario, self.notification),
+                                            self.config.get('TEMPLATE_CACHE_FOLDER')
                                             )
         elif not self.body and self.body_tmpl:
             var_dict = dict()
@@ -161,7 +163,7 @@ class EmailNotificationPlugin(NotificationPlugin):
             # Updating the the var_dict with environmental variables be used in the user template
             var_dict.update(os.environ)
             self.body = template_render(os.path.abspath(os.path.join(getattr(self.notification, 'workspace'),
-                                        self.body_tmpl)), var_dict)
+                                        self.body_tmpl)), var_dict, self.config.get('TEMPLATE_CACHE_FOLDER'))
 
         self.logger.debug('The loaded message body is: \n')
         self.logger.debug(self.body)
@@ -30,8 +30,7 @@ import os
 import time
 from carbon.core import OrchestratorPlugin
 from carbon.exceptions import CarbonOrchestratorError, AnsibleServiceError
-from carbon.helpers import schema_validator
-from carbon.ansible_helpers import AnsibleService
+from carbon.helpers import schema_validator, get_task_concurrency
 
 
 class AnsibleOrchestratorPlugin(OrchestratorPlugin):
@@ -44,6 +43,7 @@ class AnsibleOrchestratorPlugin(OrchestratorPlugin):
     __plugin_name__ = 'ansible'
     __schema_file_path__ = os.path.abspath(os.path.join(os.path.dirname(__file__), "files/schema.yml"))
     __schema_ext_path__ = os.path.abspath(os.path.join(os.path.dirname(__file__), "files/extensions.py"))
+    __schema_batch__ = True
 
     def __init__(self, package):
         """Constructor.
@@ -51,6 +51,8 @@ class AnsibleOrchestratorPlugin(OrchestratorPlugin):
         :param package: action resource
         :type package: object
         """
+        from carbon.ansible_helpers import AnsibleService
+
         super(AnsibleOrchestratorPlugin, self).__init__(package)
 
         self.options = getattr(package, 'ansible_options', None)
@@ -68,7 +70,7 @@ class AnsibleOrchestratorPlugin(OrchestratorPlugin):
         # ansible service object
         self.ans_service = AnsibleService(self.config, self.hosts, self.all_hosts,
                                           self.options, self.galaxy_options,
-                                          concurrency=self.config['TASK_CONCURRENCY']['ORCHESTRATE'].lower())
+                                          concurrency=str(get_task_concurrency(self.config, 'orchestrate') > 1).lower())
 
     def backwards_compat_check(self):
         """ This method does the check if name field is a script/playbook path or name of the orchestrator task by
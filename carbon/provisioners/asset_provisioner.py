@@ -26,11 +26,11 @@
     :license: GPLv3, see LICENSE for more details.
 """
 
+import logging
 from pprint import pformat
 
 from carbon.core import LoggerMixin, TimeMixin
-from carbon.helpers import mask_credentials_password
-import copy
+from carbon.helpers import mask_credentials_password, copy_data
 import json
 
 
@@ -89,6 +89,8 @@ class AssetProvisioner(LoggerMixin, TimeMixin):
                 # or empty res is libvirt_network was false or resources other than hosts
                 # are provisioned . Here no operation is done
                 return
+            # the profile of the asset is built once, each resource provisioned gets a copy of its own
+            asset_profile = getattr(getattr(self.plugin, 'asset'), 'profile')()
             # If res is greater than one , multiple resources have been provisioned
             if len(res) > 1:
                 res_profile_list = list()
@@ -99,7 +101,7 @@ class AssetProvisioner(LoggerMixin, TimeMixin):
                     # To apply names to the multiple beaker/aws resources Carbon adds a number next to the given asset
                     # name e.g. asset_name_0 , asset_name_1. The below logic is to find out if beaker/aws resources were
                     # provisioned by linchpin plugin.
-                    host_profile = copy.deepcopy(getattr(getattr(self.plugin, 'asset'), 'profile')())
+                    host_profile = copy_data(asset_profile)
                     provisioner_name = ''
                     if host_profile.get('provider'):
                         provisioner_name = host_profile['provider']['name']
@@ -124,7 +126,8 @@ class AssetProvisioner(LoggerMixin, TimeMixin):
                         host_profile.get('provider').update(res[i])
                     else:
                         host_profile.update(res[i])
-                    self.logger.debug(json.dumps(host_profile, indent=4))
+                    if self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug(json.dumps(host_profile, indent=4))
                     res_profile_list.append(host_profile)
                 self.logger.info('Successfully provisioned %s asset(s) %s :' % (len(res_profile_list),
                                                                                 [res_profile_list[i]['name']
@@ -132,7 +135,7 @@ class AssetProvisioner(LoggerMixin, TimeMixin):
                 return res_profile_list
             else:
                 # Single resource has been provisioned
-                host_profile = copy.deepcopy(getattr(getattr(self.plugin, 'asset'), 'profile')())
+                host_profile = copy_data(asset_profile)
                 if res[-1].get('name', False):
                     host_profile['name'] = res[-1].pop('name')
                 if 'ip' in res[-1]:
@@ -36,6 +36,7 @@ import stat
 from carbon.core import ProvisionerPlugin
 from carbon.exceptions import BeakerProvisionerError
 from carbon.helpers import exec_local_cmd, schema_validator
+from carbon.utils.trace import tracer
 
 
 class BeakerClientProvisionerPlugin(ProvisionerPlugin):
@@ -52,6 +53,7 @@ class BeakerClientProvisionerPlugin(ProvisionerPlugin):
     __plugin_name__ = "beaker-client"
     __schema_file_path__ = os.path.abspath(os.path.join(os.path.dirname(__file__),
                                                         "schema.yml"))
+    __schema_batch__ = True
 
     def __init__(self, asset):
         """Constructor.
@@ -238,7 +240,8 @@ class BeakerClientProvisionerPlugin(ProvisionerPlugin):
             self.logger.debug('Fetching beaker job status..')
 
             # fetch beaker job status
-            results = exec_local_cmd(_cmd)
+            with tracer.span('poll %s' % job_id, 'poll', provider='beaker', attempt=attempt):
+                results = exec_local_cmd(_cmd)
             if results[0] != 0:
                 self.logger.error(results[2])
                 raise BeakerProvisionerError('Failed to fetch job status!')
@@ -28,15 +28,12 @@ import random
 import time
 import os
 
-import libcloud.security
-import urllib3
-from libcloud.compute.providers import get_driver
-from libcloud.compute.types import InvalidCredsError, Provider
-
 from carbon._compat import string_types
 from carbon.core import ProvisionerPlugin
 from carbon.exceptions import OpenstackProviderError
 from carbon.helpers import gen_random_str, filter_host_name, schema_validator
+from carbon.utils.timing import count_retry
+from carbon.utils.trace import tracer
 
 MAX_WAIT_TIME = 100
 MAX_ATTEMPTS = 3
@@ -51,6 +48,7 @@ class OpenstackLibCloudProvisionerPlugin(ProvisionerPlugin):
     __plugin_name__ = 'openstack-libcloud'
     __schema_file_path__ = os.path.abspath(os.path.join(os.path.dirname(__file__),
                                                         "schema.yml"))
+    __schema_batch__ = True
 
     def __init__(self, asset):
         """Constructor.
@@ -81,6 +79,11 @@ class OpenstackLibCloudProvisionerPlugin(ProvisionerPlugin):
         networks is quick to determine if authentication is good. FAQ:
             - http://libcloud.readthedocs.io/en/latest/faq.html
         """
+        import libcloud.security
+        import urllib3
+        from libcloud.compute.providers import get_driver
+        from libcloud.compute.types import InvalidCredsError, Provider
+
         # ignore SSL
         libcloud.security.VERIFY_SSL_CERT = False
 
@@ -410,6 +413,7 @@ class OpenstackLibCloudProvisionerPlugin(ProvisionerPlugin):
                 wait_time = random.randint(10, MAX_WAIT_TIME)
                 self.logger.info('Attempt %s of %s: retrying in %s seconds' %
                                  (attempt, MAX_ATTEMPTS, wait_time))
+                count_retry()
                 time.sleep(wait_time)
                 attempt += 1
             finally:
@@ -443,6 +447,7 @@ class OpenstackLibCloudProvisionerPlugin(ProvisionerPlugin):
                 wait_time = random.randint(10, MAX_WAIT_TIME)
                 self.logger.info('Attempt %s of %s: retrying in %s seconds' %
                                  (attempt, MAX_ATTEMPTS, wait_time))
+                count_retry()
                 time.sleep(wait_time)
                 attempt += 1
             finally:
@@ -552,7 +557,8 @@ class OpenstackLibCloudProvisionerPlugin(ProvisionerPlugin):
         status = 0
         attempt = 1
         while attempt <= 30:
-            node = self.driver.ex_get_node_details(node.id)
+            with tracer.span('poll %s' % node.name, 'poll', provider='openstack', attempt=attempt):
+                node = self.driver.ex_get_node_details(node.id)
             state = getattr(node, 'state')
             msg = '%s. VM %s, STATE=%s' % (attempt, node.name, state)
 
@@ -29,7 +29,7 @@ from copy import copy
 
 from .._compat import string_types
 from ..constants import ORCHESTRATOR
-from ..core import CarbonResource
+from ..core import CarbonResource, cached_profile
 from ..orchestrators import ActionOrchestrator
 from ..helpers import get_orchestrator_plugin_class, \
     get_orchestrators_plugin_list
@@ -86,6 +86,11 @@ class Action(CarbonResource):
         """
         super(Action, self).__init__(config=config, name=name, **kwargs)
 
+        # timings of the tasks run on the resource by a previous run
+        timings = parameters.pop('timings', None)
+        if timings:
+            self.timings.update(timings)
+
         # set the action resource name
         if name is None:
             self._name = parameters.pop('name', None)
@@ -214,6 +219,15 @@ class Action(CarbonResource):
     def status(self, value):
         self._status = value
 
+    def _profile_key(self):
+        """Return the key telling whether the action profile cached is still valid.
+
+        :return: versions of the hosts
+        :rtype: tuple
+        """
+        return super(Action, self)._profile_key() + (self._versions(self.hosts),)
+
+    @cached_profile
     def profile(self):
         """Builds a profile for the action resource.
 
@@ -246,6 +260,10 @@ class Action(CarbonResource):
         profile.update({'labels': self.labels})
         profile.update({'status': self.status})
 
+        # set the timings of the tasks run on the resource
+        if self.timings:
+            profile.update(timings=self.timings)
+
         return profile
 
     def validate(self):
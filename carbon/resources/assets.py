@@ -29,7 +29,7 @@
 import sys
 import json
 import copy
-from ..core import CarbonResource
+from ..core import CarbonResource, cached_profile
 from ..exceptions import CarbonResourceError
 from ..provisioners import AssetProvisioner
 from ..helpers import gen_random_str
@@ -100,6 +100,11 @@ class Asset(CarbonResource):
         """
         super(Asset, self).__init__(config=config, name=name, **kwargs)
 
+        # timings of the tasks run on the resource by a previous run
+        timings = parameters.pop('timings', None)
+        if timings:
+            self.timings.update(timings)
+
         # set the timeout for VALIDATE
         try:
             if parameters.get('validate_timeout') is not None:
@@ -495,6 +500,19 @@ class Asset(CarbonResource):
         """
         del self._asset_id
 
+    def _profile_key(self):
+        """Return the key telling whether the host profile cached is still valid.
+
+        :return: roles, groups, name of the credential and whether metadata
+            is set
+        :rtype: tuple
+        """
+        return super(Asset, self)._profile_key() + (tuple(getattr(self, 'role', None) or ()),
+                                                    tuple(getattr(self, 'groups', None) or ()),
+                                                    getattr(self, 'credential', {}).get('name'),
+                                                    bool(getattr(self, 'metadata', None)))
+
+    @cached_profile
     def profile(self):
         """Builds a profile for the host resource.
 
@@ -538,6 +556,10 @@ class Asset(CarbonResource):
             elif hasattr(self, f) and getattr(self, f) is not None:
                 profile.update({f: getattr(self, f)})
 
+        # set the timings of the tasks run on the resource
+        if self.timings:
+            profile.update(timings=self.timings)
+
         return profile
 
     def validate(self):
@@ -26,7 +26,7 @@
 """
 
 from .._compat import string_types
-from ..core import CarbonResource
+from ..core import CarbonResource, cached_profile
 from ..constants import EXECUTOR
 from ..helpers import get_executor_plugin_class, \
     get_executors_plugin_list
@@ -88,6 +88,11 @@ class Execute(CarbonResource):
         """
         super(Execute, self).__init__(config=config, name=name, **kwargs)
 
+        # timings of the tasks run on the resource by a previous run
+        timings = parameters.pop('timings', None)
+        if timings:
+            self.timings.update(timings)
+
         # set the timeout for VALIDATE
         try:
             if parameters.get('validate_timeout') is not None:
@@ -197,6 +202,16 @@ class Execute(CarbonResource):
     def status(self, value):
         self._status = value
 
+    def _profile_key(self):
+        """Return the key telling whether the execute profile cached is still valid.
+
+        :return: versions of the hosts and which of the execute fields are set
+        :rtype: tuple
+        """
+        return super(Execute, self)._profile_key() + (
+            self._versions(self.hosts), tuple(bool(getattr(self, item, None)) for item in getattr(self, '_fields')))
+
+    @cached_profile
     def profile(self):
         """Build a profile for the execute resource.
 
@@ -229,6 +244,10 @@ class Execute(CarbonResource):
 
         profile.update({'status': self.status})
 
+        # set the timings of the tasks run on the resource
+        if self.timings:
+            profile.update(timings=self.timings)
+
         return profile
 
     def validate(self):
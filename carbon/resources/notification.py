@@ -27,7 +27,7 @@
 """
 
 from collections import OrderedDict
-from ..core import CarbonResource, CarbonResourceError
+from ..core import CarbonResource, CarbonResourceError, cached_profile
 from ..tasks import NotificationTask, ValidateTask
 from ..helpers import get_notification_plugin_list, get_notifier_plugin_class
 from ..notifiers import Notifier
@@ -74,6 +74,11 @@ class Notification(CarbonResource):
         :type kwargs: dict
         """
         super(Notification, self).__init__(config=config, name=name, **kwargs)
+
+        # timings of the tasks run on the resource by a previous run
+        timings = parameters.pop('timings', None)
+        if timings:
+            self.timings.update(timings)
         # set the timeout for VALIDATE
         try:
             if parameters.get('validate_timeout') is not None:
@@ -312,6 +317,7 @@ class Notification(CarbonResource):
         """Set the scenario property."""
         self._scenario = value
 
+    @cached_profile
     def profile(self):
         """Builds a profile for the notification resource.
 
@@ -333,6 +339,10 @@ class Notification(CarbonResource):
 
         profile.update(filtered_attr)
 
+        # set the timings of the tasks run on the resource
+        if self.timings:
+            profile.update(timings=self.timings)
+
         return profile
 
     def validate(self):
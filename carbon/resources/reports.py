@@ -26,7 +26,7 @@
 """
 import sys
 from collections import OrderedDict
-from ..core import CarbonResource
+from ..core import CarbonResource, cached_profile
 from ..tasks import ReportTask, ValidateTask
 from ..exceptions import CarbonReportError
 from ..importers import ArtifactImporter
@@ -68,6 +68,11 @@ class Report(CarbonResource):
         """
         super(Report, self).__init__(config=config, name=name, **kwargs)
 
+        # timings of the tasks run on the resource by a previous run
+        timings = parameters.pop('timings', None)
+        if timings:
+            self.timings.update(timings)
+
         # set the timeout for VALIDATE
         try:
             if parameters.get('validate_timeout') is not None:
@@ -277,6 +282,16 @@ class Report(CarbonResource):
         """
         del self._credential
 
+    def _profile_key(self):
+        """Return the key telling whether the report profile cached is still valid.
+
+        :return: name of the credential and versions of the executes
+        :rtype: tuple
+        """
+        return super(Report, self)._profile_key() + (getattr(self, 'credential', {}).get('name'),
+                                                     self._versions(self.executes))
+
+    @cached_profile
     def profile(self):
         """Builds a profile for the report resource.
 
@@ -314,6 +329,10 @@ class Report(CarbonResource):
         # set the report's import results
         profile.update({'import_results': self.import_results})
 
+        # set the timings of the tasks run on the resource
+        if self.timings:
+            profile.update(timings=self.timings)
+
         return profile
 
     def _construct_validate_task(self):
@@ -26,10 +26,7 @@
 """
 import errno
 import os
-import yaml
 from collections import OrderedDict
-from pykwalify.core import Core
-from pykwalify.errors import CoreError, SchemaError
 
 from .actions import Action
 from .executes import Execute
@@ -41,9 +38,8 @@ from ..constants import SCENARIO_SCHEMA, SCHEMA_EXT, \
 from ..core import CarbonResource
 from ..exceptions import ScenarioError
 
-from ..helpers import gen_random_str, schema_validator
+from ..helpers import gen_random_str, schema_validator, load_scenario_stream
 from ..tasks import ValidateTask
-from ..utils.resource_checker import ResourceChecker
 
 
 class Scenario(CarbonResource):
@@ -245,52 +241,51 @@ class Scenario(CarbonResource):
         :param tasks: task data returned by blaster
         :type tasks: list
         """
+        # notifications are not reloaded, only the timings of the tasks run on them are saved
+        notifications = dict((item.name, item) for item in self.notifications)
+        for task in tasks:
+            resource = task.get('resource')
+            if isinstance(resource, Notification) and resource.name in notifications:
+                notifications[resource.name].timings.update(resource.timings)
+
         count = 0
         filtered_task_list = list()
-        non_task_assets = list()
-        non_task_package = list()
 
         # Filtering the resources based on labels. Separate steps for each resources, to make sure same name
-        # collisions dont happen between two different types of resources
-
-        filtered_task_list.extend(
-            [task for task in tasks if task.get('asset') and getattr(task.get('asset'), 'name')
-             in [h.name for h in self.assets]]
-        )
-        filtered_task_list.extend(
-            [task for task in tasks if isinstance(task.get('package'), Report) and (getattr(task.get('package'), 'name')
-             in [r.name for r in self.reports])]
-        )
+        # collisions dont happen between two different types of resources. The names of the scenario resources
+        # are indexed by type first, so each task is looked up once rather than scanning every resource.
+        asset_names = set(h.name for h in self.assets)
+        package_names = OrderedDict([(Report, set(r.name for r in self.reports)),
+                                     (Execute, set(r.name for r in self.executes)),
+                                     (Action, set(r.name for r in self.actions))])
 
         filtered_task_list.extend(
-            [task for task in tasks if
-             isinstance(task.get('package'), Execute) and (getattr(task.get('package'), 'name')
-                                                           in [r.name for r in self.executes])]
-        )
-
-        filtered_task_list.extend(
-            [task for task in tasks if isinstance(task.get('package'), Action) and (getattr(task.get('package'), 'name')
-             in [r.name for r in self.actions])]
+            [task for task in tasks if task.get('asset') and getattr(task.get('asset'), 'name') in asset_names]
         )
+        for res_type, names in package_names.items():
+            filtered_task_list.extend(
+                [task for task in tasks
+                 if isinstance(task.get('package'), res_type) and getattr(task.get('package'), 'name') in names]
+            )
+
+        # index the names of the resources processed by the tasks
+        task_asset_names = set(getattr(task.get('asset'), 'name') for task in filtered_task_list if task.get('asset'))
+        task_package_names = dict((res_type, set()) for res_type in package_names)
+        for task in filtered_task_list:
+            for res_type in task_package_names:
+                if isinstance(task.get('package'), res_type) and getattr(task.get('package'), 'name'):
+                    task_package_names[res_type].add(getattr(task.get('package'), 'name'))
 
         # using labels in SDF will have only specific resources selected. So collecting the non task related
         # assets and report resources to be added back to the scenario resources. This is being done in order to
         # put the non provisioned asset and non imported report resources into results.yml
-        non_task_assets.extend([asset for asset in self.assets if asset.name not in
-                                [getattr(task.get('asset'), 'name') for task in filtered_task_list
-                                 if task.get('asset')]])
-
-        non_task_package.extend([report for report in self.reports if report.name not in
-                                 [getattr(task.get('package'), 'name') for task in filtered_task_list if
-                                  isinstance(task.get('package'), Report) and (getattr(task.get('package'), 'name'))]])
+        non_task_assets = [asset for asset in self.assets if asset.name not in task_asset_names]
 
-        non_task_package.extend([execute for execute in self.executes if execute.name not in
-                                 [getattr(task.get('package'), 'name') for task in filtered_task_list if
-                                  isinstance(task.get('package'), Execute) and (getattr(task.get('package'), 'name'))]])
-
-        non_task_package.extend([action for action in self.actions if action.name not in
-                                 [getattr(task.get('package'), 'name') for task in filtered_task_list if
-                                  isinstance(task.get('package'), Action) and (getattr(task.get('package'), 'name'))]])
+        non_task_package = list()
+        non_task_package.extend([report for report in self.reports if report.name not in task_package_names[Report]])
+        non_task_package.extend([execute for execute in self.executes
+                                 if execute.name not in task_package_names[Execute]])
+        non_task_package.extend([action for action in self.actions if action.name not in task_package_names[Action]])
 
         for res, rvalue in [(res, item['rvalue']) for task in filtered_task_list
                             for res in [task.get(r) for r in ['asset', 'package'] if r in task.keys()]
@@ -300,7 +295,7 @@ class Scenario(CarbonResource):
                     # initialize the host resource list to remove any previous host resources
                     self.initialize_resource(res)
                     # load the new host resources using the parameters from item['rvalue']
-                    self.load_resources(Asset, rvalue)
+                    self.load_resources(Asset, [dict(item, timings=res.timings) for item in rvalue])
                     count += 1
                 else:
                     self.initialize_resource(res)
@@ -308,18 +303,16 @@ class Scenario(CarbonResource):
                     count += 1
             else:
                 if rvalue is not None:
-                    self.load_resources(Asset, rvalue)
+                    self.load_resources(Asset, [dict(item, timings=res.timings) for item in rvalue])
                 else:
                     self.add_resource(res)
 
         if count > 0:
-            task_keys = list()
-            task_keys.extend([k for task in tasks for k in task.keys()])
-            if 'asset' in task_keys:
+            if [task for task in tasks if 'asset' in task]:
                 # Adding assets which were not part of the labels used
                 for res in non_task_assets:
                     self.add_resource(res)
-            elif 'package' in task_keys:
+            elif [task for task in tasks if 'package' in task]:
                 # Adding other resources except asset which were not part of the labels used
                 # getting the type of resource is the tasks list and comparing it with the non_task_resources
                 # if they are of same type then add the resource else pass
@@ -527,9 +520,12 @@ class Scenario(CarbonResource):
 
     def validate(self):
         """Validate the scenario based on the default schema."""
+        from pykwalify.errors import CoreError, SchemaError
+
         self.logger.debug('Validating scenario YAML file')
 
         if self.resource_check:
+            from ..utils.resource_checker import ResourceChecker
             self.logger.debug('Validating resource check section')
             rs = ResourceChecker(self, self.config)
             rs.validate_resources()
@@ -537,7 +533,7 @@ class Scenario(CarbonResource):
         msg = 'validated scenario YAML file against the schema!'
 
         try:
-            schema_validator(schema_data=yaml.safe_load(self.yaml_data),
+            schema_validator(schema_data=load_scenario_stream(self.yaml_data),
                              schema_files=[SCENARIO_SCHEMA],
                              schema_ext_files=[SCHEMA_EXT])
             self.logger.debug('Successfully %s' % msg)
@@ -46,7 +46,7 @@ class CleanupTask(CarbonTask):
         :param kwargs: additional keyword arguments
         :type kwargs: dict
         """
-        super(CleanupTask, self).__init__(**kwargs)
+        super(CleanupTask, self).__init__(resource=asset if asset is not None else package, **kwargs)
 
         # set attributes
         self.msg = msg
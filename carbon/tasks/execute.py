@@ -40,7 +40,7 @@ class ExecuteTask(CarbonTask):
         :param kwargs: additional keyword arguments
         :type kwargs: dict
         """
-        super(ExecuteTask, self).__init__(**kwargs)
+        super(ExecuteTask, self).__init__(resource=package, **kwargs)
         self.msg = msg
 
         # create the executor object
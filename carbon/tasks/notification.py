@@ -39,7 +39,7 @@ class NotificationTask(CarbonTask):
         :param kwargs: additional keyword arguments
         :type kwargs: dict
         """
-        super(NotificationTask, self).__init__(**kwargs)
+        super(NotificationTask, self).__init__(resource=resource, **kwargs)
         self.msg = msg
         self.resource = resource
         self.notifier = Notifier(resource)
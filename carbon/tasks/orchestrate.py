@@ -42,7 +42,7 @@ class OrchestrateTask(CarbonTask):
         :param kwargs: additional keyword arguments
         :type kwargs: dict
         """
-        super(OrchestrateTask, self).__init__(**kwargs)
+        super(OrchestrateTask, self).__init__(resource=package, **kwargs)
         self.msg = msg
 
         # create the orchestrator object
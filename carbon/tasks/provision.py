@@ -42,7 +42,7 @@ class ProvisionTask(CarbonTask):
         :param kwargs: additional keyword arguments
         :type kwargs: dict
         """
-        super(ProvisionTask, self).__init__(**kwargs)
+        super(ProvisionTask, self).__init__(resource=asset, **kwargs)
         self.msg = msg
         self.provision = True
         if not asset.is_static:
@@ -40,7 +40,7 @@ class ReportTask(CarbonTask):
         :param kwargs: additional keyword arguments
         :type kwargs: dict
         """
-        super(ReportTask, self).__init__(**kwargs)
+        super(ReportTask, self).__init__(resource=package, **kwargs)
         self.msg = msg
         self.do_import = True
 
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    carbon.utils.archiver
+
+    Module containing the archiver which saves the files of a carbon run
+    into the results folder.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import errno
+import itertools
+import os
+import shutil
+import time
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+from ..core import LoggerMixin
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl cloning a file on filesystems supporting reflinks, i.e. btrfs or xfs
+FICLONE = 0x40049409
+
+# errors raised when a file cannot be linked, rather than failing to be read
+LINK_ERRORS = [errno.EXDEV, errno.EPERM, errno.EACCES, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP]
+
+
+class ResultsArchiver(LoggerMixin):
+    """Archiver of the files of a carbon run.
+
+    Rather than copying every file, the files are hard linked into the
+    results folder when it shares the filesystem of the run folder, or
+    cloned on filesystems supporting reflinks when they cannot be linked.
+    Files which are still linked, or were not modified since they were last
+    archived, are skipped. Files on another filesystem are copied by a pool
+    of threads.
+
+    Archived files are always replaced rather than written over, so the
+    files of a previous run linked into the results folder are left intact.
+    """
+
+    def __init__(self, workers=4):
+        """Constructor.
+
+        :param workers: number of threads copying files
+        :type workers: int
+        """
+        self.workers = workers
+        self._counter = itertools.count()
+
+        # number of files and bytes archived by each method, since created
+        self.stats = OrderedDict((method, dict(files=0, bytes=0))
+                                 for method in ['linked', 'cloned', 'skipped', 'copied', 'failed'])
+        self.duration = 0.0
+        self.copy_duration = 0.0
+
+    def _tmp_path(self, dest):
+        """Return a temporary path next to the given destination."""
+        folder, name = os.path.split(dest)
+        return os.path.join(folder, '.%s.%s.%s.archive' % (name, os.getpid(), next(self._counter)))
+
+    @staticmethod
+    def _unchanged(src_stat, dest):
+        """Return whether the destination already holds the source file."""
+        try:
+            dest_stat = os.lstat(dest)
+        except OSError:
+            return False
+        if (dest_stat.st_dev, dest_stat.st_ino) == (src_stat.st_dev, src_stat.st_ino):
+            return True
+        return dest_stat.st_size == src_stat.st_size and dest_stat.st_mtime == src_stat.st_mtime
+
+    @staticmethod
+    def _clone(src, dest):
+        """Clone a file using a reflink, raises OSError when unsupported."""
+        if fcntl is None:
+            raise OSError(errno.ENOTSUP, 'Reflinks are not supported')
+        with open(src, 'rb') as src_file:
+            with open(dest, 'wb') as dest_file:
+                try:
+                    fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+                except (IOError, OSError):
+                    os.unlink(dest)
+                    raise
+        shutil.copystat(src, dest)
+
+    def _replace(self, dest, create):
+        """Create the destination file at a temporary path then move it in place."""
+        tmp = self._tmp_path(dest)
+        try:
+            create(tmp)
+            os.rename(tmp, dest)
+        except Exception:
+            if os.path.lexists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def _record(self, method, size):
+        self.stats[method]['files'] += 1
+        self.stats[method]['bytes'] += size
+
+    def _copy(self, job):
+        """Copy a file, run by the threads of the pool."""
+        src, dest, size = job
+        try:
+            self._replace(dest, lambda tmp: shutil.copy2(src, tmp))
+            return 'copied', size
+        except (IOError, OSError) as ex:
+            self.logger.warning('Unable to archive %s: %s' % (src, ex))
+            return 'failed', size
+
+    def _archive_file(self, src, dest, state):
+        """Archive a regular file, returning whether it needs to be copied."""
+        src_stat = os.stat(src)
+        if self._unchanged(src_stat, dest):
+            self._record('skipped', src_stat.st_size)
+            return False
+        if state['link']:
+            try:
+                self._replace(dest, lambda tmp: os.link(src, tmp))
+                self._record('linked', src_stat.st_size)
+                return False
+            except OSError as ex:
+                if ex.errno not in LINK_ERRORS:
+                    raise
+                if ex.errno == errno.EXDEV:
+                    # the folders are on different filesystems, no file can be linked or cloned
+                    state.update(link=False, clone=False)
+        if state['clone']:
+            try:
+                self._replace(dest, lambda tmp: self._clone(src, tmp))
+                self._record('cloned', src_stat.st_size)
+                return False
+            except (IOError, OSError):
+                state['clone'] = False
+        return True
+
+    def archive(self, src_folder, dest_folder):
+        """Archive the content of a folder into another one.
+
+        Same as copying every file and folder of the source folder not
+        starting with a dot, the content of the folders getting merged with
+        the ones already archived.
+
+        :param src_folder: folder to archive
+        :type src_folder: str
+        :param dest_folder: folder to archive into
+        :type dest_folder: str
+        """
+        start = time.time()
+        state = dict(link=True, clone=True)
+        copies = list()
+
+        if not os.path.isdir(dest_folder):
+            os.makedirs(dest_folder)
+
+        for entry in sorted(os.listdir(src_folder)):
+            if entry.startswith('.'):
+                continue
+            top = os.path.join(src_folder, entry)
+            if os.path.isdir(top) and not os.path.islink(top):
+                tree = os.walk(top)
+            else:
+                tree = [(src_folder, [], [entry])]
+
+            for folder, folders, files in tree:
+                dest = os.path.join(dest_folder, os.path.relpath(folder, src_folder))
+                if not os.path.isdir(dest):
+                    os.makedirs(dest)
+                    shutil.copymode(folder, dest)
+
+                # links to folders are archived as links, same as links to files
+                files.extend([item for item in folders if os.path.islink(os.path.join(folder, item))])
+                folders[:] = [item for item in folders if not os.path.islink(os.path.join(folder, item))]
+
+                for name in files:
+                    src_path, dest_path = os.path.join(folder, name), os.path.join(dest, name)
+                    try:
+                        if os.path.isdir(dest_path) and not os.path.islink(dest_path):
+                            self.logger.warning('Unable to archive %s over folder %s.' % (src_path, dest_path))
+                            self._record('failed', 0)
+                        elif os.path.islink(src_path):
+                            target = os.readlink(src_path)
+                            self._replace(dest_path, lambda tmp: os.symlink(target, tmp))
+                            self._record('copied', 0)
+                        elif self._archive_file(src_path, dest_path, state):
+                            copies.append((src_path, dest_path, os.path.getsize(src_path)))
+                    except (IOError, OSError) as ex:
+                        self.logger.warning('Unable to archive %s: %s' % (src_path, ex))
+                        self._record('failed', 0)
+
+        if copies:
+            copy_start = time.time()
+            pool = ThreadPool(min(self.workers, len(copies)))
+            try:
+                for method, size in pool.imap_unordered(self._copy, copies):
+                    self._record(method, size)
+            finally:
+                pool.close()
+                pool.join()
+            self.copy_duration += time.time() - copy_start
+
+        self.duration += time.time() - start
+
+    def saved(self):
+        """Return the bytes and estimated seconds not spent copying files.
+
+        The time saved is estimated using the rate files were copied at, it
+        is None when no file needed to be copied.
+
+        :return: bytes and seconds saved
+        :rtype: tuple
+        """
+        saved = sum(self.stats[method]['bytes'] for method in ['linked', 'cloned', 'skipped'])
+        copied = self.stats['copied']['bytes']
+        if not copied or not self.copy_duration:
+            return saved, None
+        return saved, saved * self.copy_duration / copied
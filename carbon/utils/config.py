@@ -26,14 +26,8 @@
 """
 import os
 
-from .._compat import RawConfigParser, VaultLib, ansible_ver, is_py2
+from .._compat import RawConfigParser
 from ..constants import DEFAULT_CONFIG, DEFAULT_CONFIG_SECTIONS, DEFAULT_TASK_CONCURRENCY, DEFAULT_TIMEOUT
-from ansible.constants import DEFAULT_VAULT_ID_MATCH
-
-from ansible.parsing.vault import VaultSecret
-import sys
-from ..exceptions import AnsibleVaultError
-from ..ansible_helpers import AnsibleCredentialManager
 
 
 class Config(dict):
@@ -158,6 +152,19 @@ class Config(dict):
 
         self.__setitem__('TASK_CONCURRENCY', _concurrency_settings)
 
+    def __set_provider_concurrency__(self):
+        """Set the maximum number of tasks to run at the same time per provider."""
+        _concurrency_settings = dict()
+
+        for section in getattr(self.parser, '_sections'):
+            if not section.startswith('provider_concurrency'):
+                continue
+
+            for option in self.parser.options(section):
+                _concurrency_settings.update({option.upper(): self.parser.get(section, option)})
+
+        self.__setitem__('PROVIDER_CONCURRENCY', _concurrency_settings)
+
     def __set_setup_logger__(self):
         """
         Set new loggers that carbon should configure logging. This
@@ -258,5 +265,8 @@ class Config(dict):
             for config in DEFAULT_CONFIG_SECTIONS:
                 getattr(self, '__set_%s__' % config)()
 
-        cred_man = AnsibleCredentialManager(self)
-        cred_man.populate_carbon_cfg_credentials()
+        if not self.get('CREDENTIALS') and self.get('CREDENTIAL_PATH'):
+            # ansible is only needed to decrypt a vaulted credentials file
+            from ..ansible_helpers import AnsibleCredentialManager
+            cred_man = AnsibleCredentialManager(self)
+            cred_man.populate_carbon_cfg_credentials()
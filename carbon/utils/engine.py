@@ -0,0 +1,678 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    carbon.utils.engine
+
+    Module containing the execution engines which run the tasks of carbons
+    pipelines.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import importlib
+import itertools
+import multiprocessing
+import signal
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+from logging import getLogger
+from multiprocessing.pool import ThreadPool
+
+import blaster
+from .._compat import pickle, queue, string_types
+from ..constants import ENGINES, DEFAULT_ENGINE_WORKERS, PROVISIONERS, TASKLIST
+from ..core import LoggerMixin
+from ..exceptions import CarbonError, CarbonSchedulerError
+from ..helpers import get_provisioners_plugin_classes, get_provider_plugin_classes, \
+    get_orchestrators_plugin_classes, get_executors_plugin_classes, get_importers_plugin_classes, \
+    get_notifiers_plugin_classes, get_task_concurrency
+
+LOG = getLogger(__name__)
+
+
+def run_task(task):
+    """Run all methods of a task definition.
+
+    The returned task definition has the same layout as the ones returned
+    by blaster, so it can be given to ~carbon.resources.Scenario.reload_resources.
+    The time spent running the task methods is saved under the duration key.
+
+    :param task: task definition built by the pipeline builder
+    :type task: dict
+    :return: task definition updated with the status and methods results
+    :rtype: dict
+    """
+    start = time.time()
+    task = dict(task)
+    timeout = task.pop('timeout', None)
+
+    # alarms can only be set from the main thread, the thread engine
+    # handles the timeout of the tasks it runs itself
+    if threading.current_thread().name != 'MainThread':
+        timeout = None
+    task_obj = task['task'](**task)
+    methods = list()
+
+    def timeout_handler(signum, frame):
+        raise RuntimeError('Task: %s, reached timeout!' % task['name'])
+
+    task['status'] = 0
+    for index, method in enumerate(task['methods']):
+        try:
+            if timeout:
+                signal.signal(signal.SIGALRM, timeout_handler)
+                signal.alarm(timeout)
+            value = getattr(task_obj, method)()
+            methods.append(dict(name=method, status=0, rvalue=value))
+        except (Exception, KeyboardInterrupt):
+            LOG.error('A exception was raised while processing task: %s method: %s' % (task['name'], method))
+            task['status'] = 1
+            methods.append(dict(name=method, status=1, rvalue=None, traceback=traceback.format_exc()))
+            # remaining methods were not able to run
+            methods.extend([dict(name=item, status='n/a', rvalue=None) for item in task['methods'][index + 1:]])
+            break
+        finally:
+            if timeout:
+                signal.alarm(0)
+
+    task['methods'] = methods
+    task['duration'] = time.time() - start
+    return task
+
+
+def not_run_task(task):
+    """Return the results of a task which was never started.
+
+    :param task: task definition built by the pipeline builder
+    :type task: dict
+    :return: task definition with a status of n/a, same as blaster sets for
+        the tasks flushed out of its queue
+    :rtype: dict
+    """
+    result = dict(task)
+    result['status'] = 'n/a'
+    result['methods'] = [dict(name=method, status='n/a', rvalue=None) for method in task['methods']]
+    return result
+
+
+def failed_task(task, error):
+    """Return the results of a task which failed before its methods could run.
+
+    :param task: task definition built by the pipeline builder
+    :type task: dict
+    :param error: traceback or message of the error
+    :type error: str
+    :return: task definition with a status of 1
+    :rtype: dict
+    """
+    result = not_run_task(task)
+    result['status'] = 1
+    result['methods'][0].update(status=1, traceback=error)
+    return result
+
+
+def _run_pooled_task(task):
+    """Pool worker target, running a task and handing back its results.
+
+    Python 2 pools have no error callback, an error raised by the worker
+    would never be collected, so the errors are handed back as the results.
+    """
+    try:
+        return run_task(task)
+    except Exception:
+        return failed_task(task, traceback.format_exc())
+
+
+def _run_pickled_task(data):
+    """Process pool worker target, running a task pickled by the parent.
+
+    The task and its results are pickled by carbon rather than by the pool,
+    so the errors pickling them are handed back as well.
+
+    :param data: pickled task definition
+    :type data: bytes
+    :return: whether the task results could be pickled, along with the
+        pickled results or the traceback of the error
+    :rtype: tuple
+    """
+    try:
+        result = _run_pooled_task(pickle.loads(data))
+        return True, pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return False, traceback.format_exc()
+
+
+# modules the plugins only import once they run a task
+PRELOAD_MODULES = ['carbon.ansible_helpers', 'libcloud.compute.providers', 'paramiko', 'pykwalify.core', 'jinja2',
+                   'requests']
+
+
+def preload_plugins():
+    """Import every plugin registered with carbon.
+
+    Loading the plugins and the ansible, libcloud, paramiko, etc modules
+    they use before any worker is forked lets the workers share them.
+    """
+    for get_classes in [get_provisioners_plugin_classes, get_provider_plugin_classes,
+                        get_orchestrators_plugin_classes, get_executors_plugin_classes,
+                        get_importers_plugin_classes, get_notifiers_plugin_classes]:
+        try:
+            get_classes()
+        except Exception as ex:
+            LOG.debug('Unable to preload plugins: %s' % ex)
+    for module in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError as ex:
+            LOG.debug('Unable to preload module %s: %s' % (module, ex))
+
+
+def _run_task_process(key, task, done_queue):
+    """Process target running a task and handing its results back."""
+    done_queue.put((key, run_task(task)))
+
+
+def _init_pool_worker():
+    """Pool worker initializer, interrupts are handled by the parent."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class EngineFactory(object):
+
+    @staticmethod
+    def get_engine_name(config, task=None):
+        """Return the name of the engine set to run a task.
+
+        The engine option of the defaults section sets the engine of every
+        task, the <task>_engine option of the task_concurrency section
+        overrides it for a given task.
+
+        :param config: carbon config
+        :type config: dict
+        :param task: carbon task name
+        :type task: str
+        :return: engine name
+        :rtype: str
+        """
+        name = config.get('ENGINE', 'blaster')
+        if task:
+            name = config.get('TASK_CONCURRENCY', dict()).get('%s_ENGINE' % task.upper(), name)
+        name = str(name).lower()
+        if name not in ENGINES:
+            raise CarbonError('Engine %s is not supported by carbon, choose one of %s.' % (name, ENGINES))
+        return name
+
+    @staticmethod
+    def get_engine(config, task=None):
+        """Return the execution engine set to run a task.
+
+        The engine gets enough workers to run as many tasks at the same time
+        as the task concurrency of any of the tasks set to use it.
+
+        :param config: carbon config
+        :type config: dict
+        :param task: carbon task name
+        :type task: str
+        :return: execution engine
+        :rtype: Engine
+        """
+        name = EngineFactory.get_engine_name(config, task)
+        limits = [get_task_concurrency(config, item) for item in TASKLIST
+                  if EngineFactory.get_engine_name(config, item) == name]
+        max_workers = max(limits + [DEFAULT_ENGINE_WORKERS])
+        if name == 'pool':
+            return PoolEngine(config, max_workers)
+        elif name == 'thread':
+            return ThreadEngine(config, max_workers)
+        return BlasterEngine(config, max_workers)
+
+
+class Engine(LoggerMixin):
+    """Base execution engine.
+
+    An engine runs the tasks of a pipeline. Tasks are handed to the engine
+    using submit and their results are handed back, in completion order, by
+    collect. The run method builds on top of them to run a whole pipeline
+    the same way blaster blastoff does.
+
+    The provider_concurrency section of the config caps the number of
+    tasks processing the assets of a provider the engine runs at the same
+    time. Tasks over the cap are kept waiting until a running one completes.
+
+    With a run journal set, the engine records the tasks as they start and
+    complete, and hands back the results recorded for the tasks completed by
+    a previous run rather than running them again.
+    """
+
+    __engine_name__ = None
+
+    def __init__(self, config=None, max_workers=DEFAULT_ENGINE_WORKERS):
+        """Constructor.
+
+        :param config: carbon config
+        :type config: dict
+        :param max_workers: maximum number of tasks to run at the same time
+        :type max_workers: int
+        """
+        self.config = config
+        self.max_workers = max_workers
+
+        # maximum number of tasks to run at the same time per provider
+        self.provider_limits = dict()
+        for provider, limit in (config or dict()).get('PROVIDER_CONCURRENCY', dict()).items():
+            try:
+                self.provider_limits[provider.lower()] = int(limit)
+            except ValueError:
+                self.provider_limits[provider.lower()] = 0
+            if self.provider_limits[provider.lower()] < 1:
+                raise CarbonError('Provider concurrency of %s must be a number greater than zero, got %s.' %
+                                  (provider.lower(), limit))
+
+        # time taken by the engine to start
+        self.startup = 0.0
+
+        # run time and overhead of each pipeline the engine ran
+        self.stats = OrderedDict()
+
+        # time each running task was submitted at and the provider it uses
+        self._submitted = dict()
+        self._providers = dict()
+
+        # run journal, see ~carbon.utils.journal.RunJournal
+        self.journal = None
+
+        # results of the tasks completed by a previous run, waiting to be collected
+        self._replayed = deque()
+
+    @staticmethod
+    def get_provider(task):
+        """Return the name of the provider of the asset a task processes.
+
+        The provider is the one named by the asset provider, or else the one
+        its provisioner plugin is the only provisioner of. A provisioner of
+        several providers, i.e. linchpin-wrapper, is a provider of its own.
+
+        :param task: task definition built by the pipeline builder
+        :type task: dict
+        :return: provider name, None if the task does not process an asset
+            of a provider
+        :rtype: str
+        """
+        asset = task.get('asset')
+        provider = getattr(asset, 'provider', None)
+        if isinstance(provider, dict):
+            provider = provider.get('name')
+        if isinstance(provider, string_types) and provider:
+            return provider.lower()
+
+        provisioner = getattr(asset, 'provisioner', None)
+        provisioner = getattr(provisioner, '__plugin_name__', provisioner)
+        if not isinstance(provisioner, string_types) or not provisioner:
+            return None
+        providers = [name for name, names in PROVISIONERS.items()
+                     if provisioner in (names if isinstance(names, list) else [names])]
+        return (providers[0] if len(providers) == 1 else provisioner).lower()
+
+    def can_submit(self, task):
+        """Return whether the cap of the task provider allows it to start.
+
+        :param task: task definition built by the pipeline builder
+        :type task: dict
+        :return: whether the task can be submitted
+        :rtype: bool
+        """
+        provider = self.get_provider(task)
+        if provider not in self.provider_limits:
+            return True
+        return list(self._providers.values()).count(provider) < self.provider_limits[provider]
+
+    def start(self):
+        """Start the engine, called before the first task is submitted."""
+        pass
+
+    def shutdown(self):
+        """Shutdown the engine once carbon has no more tasks to run."""
+        pass
+
+    def terminate(self):
+        """Stop the tasks which are still running."""
+        pass
+
+    def submit(self, key, task):
+        """Start running a task.
+
+        :param key: key the task results are collected with
+        :type key: object
+        :param task: task definition built by the pipeline builder
+        :type task: dict
+        """
+        if self.journal:
+            result = self.journal.replay(task)
+            if result:
+                self._replayed.append((key, result))
+                return
+            self.journal.start(task)
+
+        self._submitted[key] = time.time()
+        self._providers[key] = self.get_provider(task)
+        self._submit(key, dict(task, queued=self._submitted[key]))
+
+    def collect(self):
+        """Wait for the next task to complete.
+
+        :return: the key the task was submitted with and the task results
+        :rtype: tuple
+        """
+        if self._replayed:
+            return self._replayed.popleft()
+
+        key, result = self._collect()
+        self._providers.pop(key)
+        result['latency'] = time.time() - self._submitted.pop(key)
+        if self.journal:
+            self.journal.complete(result)
+        return key, result
+
+    def _submit(self, key, task):
+        """Hand a task to the workers of the engine."""
+        raise NotImplementedError
+
+    def _collect(self):
+        """Wait for the workers of the engine to complete a task."""
+        raise NotImplementedError
+
+    def record_stats(self, name, tasks, results, wall):
+        """Save the run time, overhead and task statuses of a pipeline.
+
+        The overhead is the time spent by the engine handing tasks to its
+        workers and handing their results back, rather than running them.
+        """
+        overhead = None
+        ran = [item for item in results if 'latency' in item]
+        if ran:
+            overhead = sum(max(item['latency'] - item.get('duration', 0), 0) for item in ran)
+        statuses = OrderedDict((status, 0) for status in ['passed', 'failed', 'not_run'])
+        for item in results:
+            status = item.get('status')
+            statuses['passed' if status == 0 else 'not_run' if status == 'n/a' else 'failed'] += 1
+        self.stats[name] = dict(tasks=len(tasks), wall=wall, overhead=overhead, statuses=statuses)
+        self.logger.info('Engine %s ran %s task(s) of pipeline %s in %.2fs%s' %
+                         (self.__engine_name__, len(tasks), name, wall,
+                          '' if overhead is None else ', overhead: %.2fs' % overhead))
+
+    def run(self, name, tasks, serial=False, workers=None):
+        """Run the tasks of a pipeline.
+
+        When run serially no further task is started once a task fails, the
+        tasks left get a status of n/a. Otherwise every task is run.
+
+        :param name: pipeline name
+        :type name: str
+        :param tasks: task definitions built by the pipeline builder
+        :type tasks: list
+        :param serial: whether to run the tasks one at a time
+        :type serial: bool
+        :param workers: maximum number of tasks to run at the same time,
+            defaults to the engine maximum
+        :type workers: int
+        :return: results of the tasks, in the order they were given
+        :rtype: list
+        """
+        limit = 1 if serial else min(workers or self.max_workers, self.max_workers)
+        self.logger.info('Task Execution: %s' % ('Sequential' if serial else 'Concurrent (%s)' % limit))
+        start = time.time()
+        results = [None] * len(tasks)
+        pending = list(range(len(tasks)))
+        running = 0
+        failed = False
+
+        try:
+            while pending or running:
+                for index in list(pending):
+                    if running >= limit or (serial and failed):
+                        break
+                    if not self.can_submit(tasks[index]):
+                        # provider cap reached, wait on one of its tasks to complete
+                        continue
+                    pending.remove(index)
+                    self.submit(index, tasks[index])
+                    running += 1
+
+                # remaining tasks are blocked by a failure
+                if not running:
+                    break
+
+                index, result = self.collect()
+                running -= 1
+                results[index] = result
+                if result['status'] != 0:
+                    failed = True
+        except KeyboardInterrupt:
+            self.terminate()
+            raise
+
+        results = [not_run_task(tasks[index]) if result is None else result for index, result in enumerate(results)]
+        self.record_stats(name, tasks, results, time.time() - start)
+
+        if failed:
+            raise CarbonSchedulerError('One or more tasks got a status of non zero.', task=name, results=results)
+        return results
+
+
+class BlasterEngine(Engine):
+    """Default engine, running each pipeline with a new blaster.
+
+    Blaster runs up to ten tasks at the same time. Pipelines set to run a
+    different number of tasks at the same time, or processing assets of a
+    capped provider, are run the same way tasks submitted one at a time by
+    the dependency aware scheduler are, each task by a new process. So are
+    the pipelines holding tasks recorded by the run journal: blaster only
+    hands back the results once every task of the pipeline is done, while
+    the journal needs the complete record of each task as soon as it is
+    done, for a run killed mid pipeline to be resumed without running the
+    tasks completed again.
+    """
+
+    __engine_name__ = 'blaster'
+
+    def __init__(self, config=None, max_workers=DEFAULT_ENGINE_WORKERS):
+        super(BlasterEngine, self).__init__(config, max_workers)
+        self._done_queue = None
+        self._processes = dict()
+
+    def run(self, name, tasks, serial=False, workers=None):
+        capped = [task for task in tasks if self.get_provider(task) in self.provider_limits]
+        if not serial and (capped or (workers or DEFAULT_ENGINE_WORKERS) != DEFAULT_ENGINE_WORKERS):
+            return super(BlasterEngine, self).run(name, tasks, serial, workers)
+        if self.journal and [task for task in tasks if self.journal.get_key(task) is not None]:
+            return super(BlasterEngine, self).run(name, tasks, serial, workers)
+
+        start = time.time()
+        preload_plugins()
+
+        # create blaster object with pipeline to run, the tasks are all queued at once
+        blast = blaster.Blaster([dict(task, queued=time.time()) for task in tasks])
+
+        # blast off the pipeline list of tasks
+        try:
+            return blast.blastoff(serial=serial, raise_on_failure=True)
+        finally:
+            self.record_stats(name, tasks, blast.results, time.time() - start)
+
+    def _submit(self, key, task):
+        if self._done_queue is None:
+            preload_plugins()
+            self._done_queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=_run_task_process, args=(key, task, self._done_queue))
+        process.start()
+        self._processes[key] = process
+
+    def _collect(self):
+        key, result = self._done_queue.get()
+        self._processes.pop(key).join()
+        return key, result
+
+    def terminate(self):
+        for process in self._processes.values():
+            self.logger.error('Terminating child process: %s' % process.name)
+            process.terminate()
+            process.join(2)
+        self._processes = dict()
+
+
+class PoolEngine(Engine):
+    """Engine keeping one worker pool for the whole carbon run.
+
+    The plugins are imported once before the pool is created, so the workers
+    inherit them rather than importing them again for every pipeline as the
+    processes started by blaster do.
+    """
+
+    __engine_name__ = 'pool'
+
+    def __init__(self, config=None, max_workers=DEFAULT_ENGINE_WORKERS):
+        super(PoolEngine, self).__init__(config, max_workers)
+        self._pool = None
+        self._done_queue = queue.Queue()
+
+    def start(self):
+        if self._pool is not None:
+            return
+        start = time.time()
+        self._pool = self._create_pool()
+        self.startup = time.time() - start
+        self.logger.info('Engine %s started %s workers in %.2fs' %
+                         (self.__engine_name__, self.max_workers, self.startup))
+
+    def _create_pool(self):
+        """Return the worker pool."""
+        preload_plugins()
+        return multiprocessing.Pool(processes=self.max_workers, initializer=_init_pool_worker)
+
+    def shutdown(self):
+        if self._pool is None:
+            return
+        self._pool.close()
+        self._pool.join()
+        self._pool = None
+
+    def terminate(self):
+        if self._pool is None:
+            return
+        self.logger.error('Terminating the engine worker pool.')
+        self._pool.terminate()
+        self._pool.join()
+        self._pool = None
+
+    def _submit(self, key, task):
+        self.start()
+        try:
+            data = pickle.dumps(task, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # the task cannot be handed to the worker
+            self._done_queue.put((key, failed_task(task, traceback.format_exc())))
+            return
+
+        def callback(value):
+            pickled, data = value
+            try:
+                result = pickle.loads(data) if pickled else failed_task(task, data)
+            except Exception:
+                result = failed_task(task, traceback.format_exc())
+            self._done_queue.put((key, result))
+
+        self._pool.apply_async(_run_pickled_task, (data,), callback=callback)
+
+    def _collect(self):
+        return self._done_queue.get()
+
+
+class ThreadEngine(PoolEngine):
+    """Engine running the tasks in threads of the carbon process.
+
+    Nearly all the time of a task is spent waiting on a subprocess or a
+    remote api, so threads run them as well as processes do. Rather than
+    pickled copies, the tasks get the scenario resource objects themselves
+    and update them directly.
+
+    A thread cannot be interrupted, a task reaching its timeout is reported
+    as failed and the thread is left to complete on its own.
+    """
+
+    __engine_name__ = 'thread'
+
+    def __init__(self, config=None, max_workers=DEFAULT_ENGINE_WORKERS):
+        super(ThreadEngine, self).__init__(config, max_workers)
+        self._counter = itertools.count()
+        self._keys = dict()
+        self._deadlines = dict()
+        self._tasks = dict()
+
+    def _create_pool(self):
+        return ThreadPool(processes=self.max_workers)
+
+    def terminate(self):
+        if self._pool is None:
+            return
+        self.logger.error('Running threads cannot be terminated, waiting on them to complete.')
+        self._pool.close()
+        self._pool = None
+
+    def _submit(self, key, task):
+        self.start()
+
+        # tasks which timed out may still hand back their results later on,
+        # each submit gets a unique token so those results can be dropped
+        token = next(self._counter)
+        self._keys[token] = key
+        self._tasks[token] = task
+        if task.get('timeout'):
+            self._deadlines[token] = time.time() + task['timeout']
+
+        self._pool.apply_async(_run_pooled_task, (task,),
+                               callback=lambda result: self._done_queue.put((token, result)))
+
+    def _timed_out(self):
+        """Return the results of the first task which reached its timeout."""
+        token = min(self._deadlines, key=self._deadlines.get)
+        task = self._tasks[token]
+        self.logger.error('Task: %s, reached timeout!' % task['name'])
+        return token, failed_task(task, 'Task: %s, reached timeout!' % task['name'])
+
+    def _collect(self):
+        while True:
+            try:
+                timeout = None
+                if self._deadlines:
+                    timeout = max(min(self._deadlines.values()) - time.time(), 0)
+                token, result = self._done_queue.get(timeout=timeout)
+            except queue.Empty:
+                token, result = self._timed_out()
+
+            if token not in self._keys:
+                # task which already reached its timeout
+                continue
+
+            self._deadlines.pop(token, None)
+            self._tasks.pop(token)
+            result['in_process'] = True
+            return self._keys.pop(token), result
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    carbon.utils.journal
+
+    Module containing the run journal which records the tasks carbon ran, so
+    a run which failed or was killed can be resumed.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+
+from ..constants import JOURNAL_TASKLIST, JOURNAL_RESOURCE_FIELDS
+from ..core import LoggerMixin
+from ..exceptions import CarbonError
+
+
+class RunJournal(LoggerMixin):
+    """Append only journal of the tasks of a carbon run.
+
+    Each provision, orchestrate, execute and report task gets a start record
+    when it is handed to an engine and a complete record, holding its status,
+    the data it returned and the resource attributes it set, once it is done.
+    Every record is one json line flushed to disk as it is written, so the
+    journal is left intact when the carbon process gets killed.
+
+    When resuming a run, the tasks completed by the previous runs are not run
+    again. Their recorded results are replayed instead.
+    """
+
+    def __init__(self, path, resume=False):
+        """Constructor.
+
+        :param path: journal file path
+        :type path: str
+        :param resume: whether to load the tasks completed by previous runs
+        :type resume: bool
+        """
+        self.path = path
+
+        # records of the completed tasks keyed by task and resource name
+        self.completed = OrderedDict()
+
+        if resume:
+            self.load()
+
+    @staticmethod
+    def get_key(task):
+        """Return the key identifying a task within the journal.
+
+        :param task: task definition built by the pipeline builder
+        :type task: dict
+        :return: task and resource name, None if the task is not journaled
+        :rtype: tuple
+        """
+        name = getattr(task.get('task'), '__task_name__', None)
+        resource = task.get('asset', task.get('package'))
+        if name not in JOURNAL_TASKLIST or resource is None:
+            return None
+        return name, getattr(resource, 'name', None)
+
+    def load(self):
+        """Load the tasks completed by the previous runs."""
+        if not os.path.exists(self.path):
+            raise CarbonError('Unable to resume the run, journal %s does not exist.' % self.path)
+
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # last record of a run killed while writing it
+                    self.logger.warning('Skipping an incomplete record of journal %s.' % self.path)
+                    continue
+                if record.get('event') != 'complete':
+                    continue
+                key = (record['task'], record['name'])
+                if record['status'] == 0:
+                    self.completed[key] = record
+                else:
+                    self.completed.pop(key, None)
+
+        self.logger.info('Journal %s has %s completed task(s).' % (self.path, len(self.completed)))
+
+    def _write(self, record):
+        """Append a record to the journal."""
+        record['time'] = time.time()
+        line = json.dumps(record, default=str) + '\n'
+        with open(self.path, 'a') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def start(self, task):
+        """Record a task being started.
+
+        :param task: task definition built by the pipeline builder
+        :type task: dict
+        """
+        key = self.get_key(task)
+        if key is None:
+            return
+        self._write(OrderedDict([('event', 'start'), ('task', key[0]), ('name', key[1])]))
+
+    def complete(self, result):
+        """Record a task being completed.
+
+        :param result: task results handed back by the engine
+        :type result: dict
+        """
+        key = self.get_key(result)
+        if key is None:
+            return
+        resource = result.get('asset', result.get('package'))
+        fields = OrderedDict((field, getattr(resource, field)) for field in JOURNAL_RESOURCE_FIELDS
+                             if hasattr(resource, field))
+        self._write(OrderedDict([('event', 'complete'), ('task', key[0]), ('name', key[1]),
+                                 ('status', result['status']),
+                                 ('methods', [dict(name=item['name'], status=item['status'], rvalue=item['rvalue'])
+                                              for item in result['methods']]),
+                                 ('fields', fields)]))
+
+    def replay(self, task):
+        """Return the results of a task completed by a previous run.
+
+        The resource attributes set by the task are restored on the resource
+        of the given task definition.
+
+        :param task: task definition built by the pipeline builder
+        :type task: dict
+        :return: task results, None if the task needs to be run
+        :rtype: dict
+        """
+        key = self.get_key(task)
+        if key not in self.completed:
+            return None
+        record = self.completed[key]
+        self.logger.info('Task %s of %s was completed by a previous run, skipping it.' % (key[1], key[0]))
+
+        resource = task.get('asset', task.get('package'))
+        for field, value in record.get('fields', dict()).items():
+            if hasattr(resource, field):
+                setattr(resource, field, value)
+
+        result = dict(task)
+        result['status'] = 0
+        result['methods'] = [dict(name=item['name'], status=item['status'], rvalue=item['rvalue'])
+                             for item in record['methods']]
+        return result
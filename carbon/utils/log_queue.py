@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    carbon.utils.log_queue
+
+    Module containing the queued logging carbon uses so the tasks run by
+    worker processes do not write to the log files themselves.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import logging
+import multiprocessing
+import os
+import re
+import threading
+
+from .._compat import is_main_thread
+
+try:
+    from logging.handlers import QueueHandler, QueueListener
+except ImportError:
+    # python 2 logging has no queue handlers, the worker processes keep writing their records themselves
+    QueueHandler = QueueListener = None
+
+# task the records logged by the current thread belong to
+_context = threading.local()
+
+
+class TaskTagFilter(logging.Filter):
+    """Filter tagging the records with the task and resource they were logged for.
+
+    Records which were already tagged, by the worker process they were logged
+    in, keep their tags.
+    """
+
+    def filter(self, record):
+        if not hasattr(record, 'carbon_task'):
+            record.carbon_task = getattr(_context, 'task', '')
+            record.carbon_resource = getattr(_context, 'resource', '')
+            record.carbon_tag = '[%s] ' % record.carbon_task if record.carbon_task else ''
+        return True
+
+
+class ResourceFileHandler(logging.Handler):
+    """Handler writing the records of each resource to its own log file."""
+
+    def __init__(self, folder, level=logging.NOTSET):
+        """Constructor.
+
+        :param folder: folder holding the resource log files
+        :type folder: str
+        :param level: handler level
+        :type level: int
+        """
+        super(ResourceFileHandler, self).__init__(level)
+        self.folder = folder
+        self._handlers = dict()
+
+    def get_path(self, resource):
+        """Return the log file path of a resource."""
+        return os.path.join(self.folder, '%s.log' % re.sub(r'[^\w.-]', '_', resource))
+
+    def emit(self, record):
+        resource = getattr(record, 'carbon_resource', '')
+        if not resource:
+            return
+        if resource not in self._handlers:
+            if not os.path.isdir(self.folder):
+                os.makedirs(self.folder)
+            handler = logging.FileHandler(self.get_path(resource), encoding='utf-8')
+            handler.setFormatter(self.formatter)
+            self._handlers[resource] = handler
+        self._handlers[resource].emit(record)
+
+    def close(self):
+        for handler in self._handlers.values():
+            handler.close()
+        self._handlers = dict()
+        super(ResourceFileHandler, self).close()
+
+
+class LogQueue(object):
+    """Queue the worker processes hand their log records to.
+
+    Once started, the records logged by a forked worker process are put on a
+    queue rather than written by the process itself. A single listener
+    thread of the main process drains the queue into carbon's handlers, so
+    the lines of parallel tasks no longer interleave or contend on the log
+    file. The records of the tasks are tagged with the task and resource
+    they were logged for, and can also be written to a log file per
+    resource.
+    """
+
+    def __init__(self):
+        self.queue = None
+        self.listener = None
+        self._pid = None
+        self._worker_pid = None
+        self._handlers = list()
+        self._saved = list()
+
+    @property
+    def started(self):
+        return self.listener is not None
+
+    @property
+    def supported(self):
+        """Whether the python logging module provides the queue handlers."""
+        return QueueListener is not None
+
+    @staticmethod
+    def _loggers():
+        """Return every logger created so far, including the root logger."""
+        loggers = [logging.getLogger()]
+        loggers.extend([logger for logger in logging.Logger.manager.loggerDict.values()
+                        if isinstance(logger, logging.Logger)])
+        return loggers
+
+    def start(self, logger_names, resource_folder=None):
+        """Start draining the queue into the handlers of the given loggers.
+
+        :param logger_names: names of the loggers configured by carbon
+        :type logger_names: list
+        :param resource_folder: folder to write a log file per resource into,
+            no resource log files are written when None
+        :type resource_folder: str
+        """
+        self.stop()
+        if not self.supported:
+            return
+
+        loggers = [logging.getLogger(name) for name in logger_names]
+        handlers = list()
+        for logger in loggers:
+            handlers.extend([handler for handler in logger.handlers if handler not in handlers])
+
+        # formatter and filters of each handler, restored once stopped
+        self._saved = [(handler, handler.formatter, list(handler.filters)) for handler in handlers]
+
+        tag_filter = TaskTagFilter()
+        for handler in handlers:
+            handler.addFilter(tag_filter)
+            if handler.formatter is not None and '%(carbon_tag)s' not in handler.formatter._fmt:
+                handler.setFormatter(logging.Formatter(
+                    handler.formatter._fmt.replace('%(message)s', '%(carbon_tag)s%(message)s'),
+                    handler.formatter.datefmt))
+
+        if resource_folder:
+            file_handlers = [handler for handler in handlers if isinstance(handler, logging.FileHandler)]
+            resource_handler = ResourceFileHandler(resource_folder)
+            resource_handler.addFilter(tag_filter)
+            if file_handlers:
+                resource_handler.setLevel(file_handlers[0].level)
+                resource_handler.setFormatter(file_handlers[0].formatter)
+            for logger in loggers:
+                logger.addHandler(resource_handler)
+            handlers.append(resource_handler)
+
+        self._handlers = handlers
+        self._pid = os.getpid()
+        self.queue = multiprocessing.Queue(-1)
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self):
+        """Drain the records left on the queue and stop the listener."""
+        if not self.started:
+            return
+        self.listener.stop()
+        self.queue.close()
+        self.queue.join_thread()
+        for handler in self._handlers:
+            if isinstance(handler, ResourceFileHandler):
+                for logger in self._loggers():
+                    if handler in logger.handlers:
+                        logger.removeHandler(handler)
+                handler.close()
+        for handler, formatter, filters in self._saved:
+            handler.setFormatter(formatter)
+            handler.filters = filters
+        self.listener = None
+        self.queue = None
+        self._handlers = list()
+        self._saved = list()
+
+    def in_worker(self):
+        """Return whether the current thread runs tasks for the main process."""
+        return os.getpid() != self._pid or not is_main_thread()
+
+    def attach_task(self, task, resource):
+        """Tag the records logged by the current thread with the task it runs.
+
+        The first time it is called by a forked worker process, the records
+        of the process are routed through the queue.
+
+        :param task: task name
+        :type task: str
+        :param resource: name of the resource the task runs for
+        :type resource: str
+        """
+        if not self.started or not self.in_worker():
+            return
+
+        if os.getpid() != self._pid and self._worker_pid != os.getpid():
+            queue_handler = QueueHandler(self.queue)
+            queue_handler.addFilter(TaskTagFilter())
+            for logger in self._loggers():
+                handlers = [handler for handler in logger.handlers if handler not in self._handlers]
+                if len(handlers) != len(logger.handlers):
+                    logger.handlers = handlers + [queue_handler]
+            self._worker_pid = os.getpid()
+
+        _context.task = '%s:%s' % (task, resource) if resource else task
+        _context.resource = resource or ''
+
+
+# queue shared by the main process and the worker processes it forks
+log_queue = LogQueue()
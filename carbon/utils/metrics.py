@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    carbon.utils.metrics
+
+    Module containing the metrics file of a carbon run, written in the text
+    format read by the node_exporter textfile collector.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import os
+from collections import OrderedDict
+
+
+def _escape(value):
+    """Escape a label value of the text format."""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class MetricsFile(object):
+    """Metrics of a carbon run.
+
+    Samples are grouped by metric, each metric being written once along
+    with its help and type lines. The file is written to a temporary file
+    then moved in place, so the textfile collector never reads a partial
+    file.
+    """
+
+    def __init__(self):
+        # help, type and samples of each metric, keyed by metric name
+        self._metrics = OrderedDict()
+
+    def add(self, name, description, value, metric_type='gauge', **labels):
+        """Add a sample of a metric.
+
+        :param name: metric name
+        :type name: str
+        :param description: help text of the metric
+        :type description: str
+        :param value: sample value
+        :type value: float
+        :param metric_type: metric type, i.e. gauge or counter
+        :type metric_type: str
+        :param labels: labels of the sample
+        """
+        metric = self._metrics.setdefault(name, dict(description=description, type=metric_type, samples=list()))
+        metric['samples'].append((OrderedDict(sorted(labels.items())), value))
+
+    def dumps(self):
+        """Return the metrics in the text format."""
+        lines = list()
+        for name, metric in self._metrics.items():
+            lines.append('# HELP %s %s' % (name, metric['description']))
+            lines.append('# TYPE %s %s' % (name, metric['type']))
+            for labels, value in metric['samples']:
+                label_str = ','.join('%s="%s"' % (key, _escape(item)) for key, item in labels.items())
+                lines.append('%s%s %s' % (name, '{%s}' % label_str if label_str else '', repr(float(value))))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write the metrics file.
+
+        :param path: path of the metrics file
+        :type path: str
+        """
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        tmp = os.path.join(folder, '.%s.%s.tmp' % (os.path.basename(path), os.getpid()))
+        try:
+            with open(tmp, 'w') as f:
+                f.write(self.dumps())
+            os.rename(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
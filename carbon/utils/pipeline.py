@@ -31,7 +31,8 @@ from collections import namedtuple
 from ..constants import TASKLIST, NOTIFYSTATES
 from ..exceptions import CarbonError
 from ..helpers import fetch_assets, get_core_tasks_classes, fetch_executes, filter_actions_on_failed_status, \
-    set_task_class_concurrency, filter_resources_labels, filter_notifications_to_skip, filter_notifications_on_trigger
+    set_task_class_concurrency, filter_resources_labels, filter_notifications_to_skip, \
+    filter_notifications_on_trigger, HostResolver
 
 from ..tasks import CleanupTask
 
@@ -128,6 +129,11 @@ class PipelineBuilder(object):
         # only master scenario no child scenarios
         scenario_get_tasks.extend([item for item in getattr(scenario, 'get_tasks')()])
 
+        # index the scenario hosts once for all the tasks requiring hosts
+        if self.name.lower() in ['validate', 'orchestrate', 'execute', 'report', 'cleanup']:
+            hosts = scenario.get_all_assets()
+            resolver = HostResolver(hosts)
+
         # Collecting resources based on task type
         if self.name.lower() in ['validate', 'provision', 'cleanup']:
             # scenario resource
@@ -154,7 +160,7 @@ class PipelineBuilder(object):
                 for task in action.get_tasks():
                     if task['task'].__task_name__ == self.name:
                         # fetch & set hosts for the given action task
-                        task = fetch_assets(scenario.get_all_assets(), task)
+                        task = fetch_assets(hosts, task, resolver=resolver)
                         pipeline.tasks.append(set_task_class_concurrency(task, action))
 
         if self.name.lower() in ['validate', 'execute']:
@@ -163,7 +169,7 @@ class PipelineBuilder(object):
                 for task in execute.get_tasks():
                     if task['task'].__task_name__ == self.name:
                         # fetch & set hosts for the given executes task
-                        task = fetch_assets(scenario.get_all_assets(), task)
+                        task = fetch_assets(hosts, task, resolver=resolver)
                         pipeline.tasks.append(set_task_class_concurrency(task, execute))
 
         if self.name.lower() in ['validate', 'report']:
@@ -172,7 +178,7 @@ class PipelineBuilder(object):
                 for task in report.get_tasks():
                     if task['task'].__task_name__ == self.name:
                         # fetch & set hosts and executes for the given reports task
-                        task = fetch_executes(scenario.get_all_executes(), scenario.get_all_assets(), task)
+                        task = fetch_executes(scenario.get_all_executes(), hosts, task, resolver=resolver)
                         pipeline.tasks.append(set_task_class_concurrency(task, report))
 
         if self.name.lower() in ['validate']:
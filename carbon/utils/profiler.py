@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    carbon.utils.profiler
+
+    Module containing the profiler of carbon itself, profiling the main
+    process along with each task run by the workers.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import cProfile
+import itertools
+import os
+import pstats
+import re
+from functools import wraps
+
+from .._compat import is_main_thread
+
+
+class Profiler(object):
+    """Profiler of a carbon run.
+
+    Once started, the main process is profiled until the profiler is
+    stopped, and the methods of each task are profiled by the process or
+    thread running them. Every profile is saved as a pstats file in the
+    folder the profiler was started with, the task ones being named after
+    the task, resource and method. :meth:`report` merges them into a report
+    of the functions carbon spent the most time in.
+    """
+
+    def __init__(self):
+        self.folder = None
+        self._main = None
+        self._pid = None
+        self._counter = itertools.count()
+
+    @property
+    def enabled(self):
+        return self.folder is not None
+
+    def start(self, folder):
+        """Start profiling the main process.
+
+        :param folder: folder to save the pstats files into
+        :type folder: str
+        """
+        self.stop()
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        self.folder = folder
+        self._pid = os.getpid()
+        self._main = cProfile.Profile()
+        self._main.enable()
+
+    def stop(self):
+        """Stop profiling and save the profile of the main process.
+
+        :return: folder holding the pstats files, None when the profiler
+            was not started
+        :rtype: str
+        """
+        if not self.enabled:
+            return None
+        folder = self.folder
+        if self._main is not None and os.getpid() == self._pid:
+            self._main.disable()
+            self._main.dump_stats(os.path.join(folder, 'carbon.%s.pstats' % self._pid))
+        self._main = None
+        self.folder = None
+        return folder
+
+    def _path(self, name):
+        name = '%s.%s.%s.pstats' % (re.sub(r'[^\w.-]', '_', name), os.getpid(), next(self._counter))
+        return os.path.join(self.folder, name)
+
+    def wrap(self, func, name):
+        """Return the function saving a profile each time it is called.
+
+        :param func: function to profile
+        :type func: function
+        :param name: name of the pstats files, along with the process id
+        :type name: str
+        """
+        @wraps(func)
+        def profiled(*args, **kwargs):
+            main = None
+            if os.getpid() != self._pid:
+                # forked worker process, its copy of the main process profiler is never saved
+                if self._main is not None:
+                    self._main.disable()
+                    self._main = None
+            elif is_main_thread():
+                main = self._main
+
+            if main is not None:
+                main.disable()
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # another profiler is already running, i.e. the main one on python 3.12+
+                profile = None
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if profile is not None:
+                    profile.disable()
+                    profile.dump_stats(self._path(name))
+                if main is not None:
+                    main.enable()
+        return profiled
+
+    @staticmethod
+    def report(folder, path, limit=40):
+        """Merge the pstats files of a folder into a report of the hotspots.
+
+        :param folder: folder holding the pstats files
+        :type folder: str
+        :param path: path of the report
+        :type path: str
+        :param limit: number of functions listed per sort order
+        :type limit: int
+        :return: number of pstats files merged
+        :rtype: int
+        """
+        files = sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith('.pstats'))
+        if not files:
+            return 0
+        with open(path, 'w') as f:
+            stats = pstats.Stats(*files, stream=f)
+            stats.strip_dirs()
+            # list the merged files once, rather than along with each listing
+            stats.files = list()
+            f.write('Profiles merged: %s\n' % len(files))
+            f.writelines('  %s\n' % os.path.basename(item) for item in files)
+            for sort, title in [('tottime', 'internal time'), ('cumulative', 'cumulative time')]:
+                f.write('\nFunctions carbon spent the most %s in\n' % title)
+                stats.sort_stats(sort).print_stats(limit)
+        return len(files)
+
+
+# profiler shared by the main process and the worker processes it forks
+profiler = Profiler()
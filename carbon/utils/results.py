@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    carbon.utils.results
+
+    Module containing the writer of the results files carbon leaves in its
+    data folder.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import errno
+import json
+import os
+import stat
+import uuid
+
+import yaml
+
+from .._compat import string_types
+from ..core import LoggerMixin
+
+# use the libyaml emitter when pyyaml was built with it
+_BaseDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+class ResultsDumper(_BaseDumper):
+    """Safe yaml dumper keeping the order of the profiles keys."""
+
+    def ignore_aliases(self, data):
+        return True
+
+
+def _represent_dict(dumper, data):
+    return dumper.represent_mapping('tag:yaml.org,2002:map', list(data.items()))
+
+
+# profiles are built with OrderedDict and may hold data loaded by ruamel
+ResultsDumper.add_multi_representer(dict, _represent_dict)
+ResultsDumper.add_multi_representer(list, ResultsDumper.represent_list)
+ResultsDumper.add_multi_representer(tuple, ResultsDumper.represent_list)
+ResultsDumper.add_multi_representer(string_types[0], ResultsDumper.represent_str)
+ResultsDumper.add_multi_representer(int, ResultsDumper.represent_int)
+ResultsDumper.add_multi_representer(float, ResultsDumper.represent_float)
+
+
+def dump_yaml(data):
+    """Return the given data as block style yaml."""
+    return yaml.dump(data, Dumper=ResultsDumper, default_flow_style=False, sort_keys=False, allow_unicode=True)
+
+
+def _open_temp(folder, name):
+    """Create a temporary file next to a file written and return its descriptor and path.
+
+    The file is created with the permissions open would give a new file, the
+    kernel applies the process umask to them.
+    """
+    while True:
+        tmp_path = os.path.join(folder, '.%s.%s' % (name, uuid.uuid4().hex[:8]))
+        try:
+            return os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), tmp_path
+        except OSError as ex:
+            if ex.errno != errno.EEXIST:
+                raise
+
+
+def write_atomic(path, content):
+    """Write a file so readers either get its previous or its new content.
+
+    The content is written to a temporary file in the same folder which then
+    replaces the file, a crash while writing leaves the previous file intact.
+
+    :param path: file path
+    :type path: str
+    :param content: file content
+    :type content: str
+    """
+    folder, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = _open_temp(folder, name)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            # a file replaced keeps its permissions
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        os.rename(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class ResultsWriter(LoggerMixin):
+    """Writer of the scenario results files.
+
+    The top level keys of a scenario profile are each dumped on their own,
+    the lists of resource profiles one resource at a time. The yaml of each
+    resource profile is cached using its json serialization as the key, so
+    only the resources which changed since the last write are dumped again.
+    The json serialization also makes up the optional json sidecar, a
+    compact results file for programs consuming carbon results.
+    """
+
+    def __init__(self, json_sidecar=False):
+        """Constructor.
+
+        :param json_sidecar: whether to write a json file next to each
+            results file
+        :type json_sidecar: bool
+        """
+        self.json_sidecar = json_sidecar
+
+        # yaml of the resource profiles keyed by their json
+        self._cache = dict()
+        self._used = dict()
+
+    @staticmethod
+    def _to_json(data):
+        return json.dumps(data, separators=(',', ':'), default=str)
+
+    def _dump_resource(self, profile):
+        """Return the json and the yaml sequence item of a resource profile."""
+        key = self._to_json(profile)
+        if key not in self._cache:
+            self._cache[key] = dump_yaml([profile])
+        self._used[key] = self._cache[key]
+        return key, self._cache[key]
+
+    def render(self, profile):
+        """Return the yaml and json documents of a scenario profile.
+
+        :param profile: scenario profile
+        :type profile: dict
+        :return: yaml and json documents
+        :rtype: tuple
+        """
+        yaml_parts = list()
+        json_parts = list()
+        for key, value in profile.items():
+            if value and isinstance(value, list) and all(isinstance(item, dict) for item in value):
+                items = [self._dump_resource(item) for item in value]
+                yaml_parts.append('%s:\n' % dump_yaml({key: None}).rsplit(': ', 1)[0])
+                yaml_parts.extend([item[1] for item in items])
+                json_parts.append('%s:[%s]' % (self._to_json(key), ','.join([item[0] for item in items])))
+            else:
+                yaml_parts.append(dump_yaml({key: value}))
+                json_parts.append('%s:%s' % (self._to_json(key), self._to_json(value)))
+        return ''.join(yaml_parts), '{%s}' % ','.join(json_parts)
+
+    def write(self, path, profile):
+        """Write the results file of a scenario profile.
+
+        :param path: results file path
+        :type path: str
+        :param profile: scenario profile
+        :type profile: dict
+        """
+        yaml_data, json_data = self.render(profile)
+        write_atomic(path, yaml_data)
+        if self.json_sidecar:
+            write_atomic('%s.json' % os.path.splitext(path)[0], json_data)
+
+    def flush_cache(self):
+        """Drop the cached resources which were not part of the writes since the last flush."""
+        self._cache = self._used
+        self._used = dict()
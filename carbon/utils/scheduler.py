@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    carbon.utils.scheduler
+
+    Module containing the dependency aware scheduler which lets carbon overlap
+    the provision, orchestrate and execute tasks of a scenario.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import copy
+import time
+from collections import OrderedDict
+from logging import getLogger
+
+from .._compat import string_types
+from ..constants import DAG_TASKLIST
+from ..core import LoggerMixin
+from ..exceptions import CarbonSchedulerError
+from ..helpers import fetch_assets, HostResolver
+from ..resources import Asset
+from .engine import BlasterEngine, not_run_task
+from .pipeline import PipelineFactory
+
+LOG = getLogger(__name__)
+
+
+class TaskNode(object):
+    """A task within the scheduler dependency graph."""
+
+    def __init__(self, index, stage, task):
+        """Constructor.
+
+        :param index: position of the node within the graph
+        :type index: int
+        :param stage: carbon task name the node belongs to
+        :type stage: str
+        :param task: task definition built by the pipeline builder
+        :type task: dict
+        """
+        self.index = index
+        self.stage = stage
+        self.task = task
+        self.depends = set()
+        self.result = None
+        self.started = None
+        self.finished = None
+
+    @property
+    def resource(self):
+        """The resource the task is processing."""
+        return self.task.get('asset', self.task.get('package'))
+
+    @property
+    def host_names(self):
+        """Names of the assets the task targets.
+
+        :return: asset names or None when the hosts could not be resolved
+        :rtype: set
+        """
+        if self.stage == 'provision':
+            return {self.resource.name}
+        hosts = getattr(self.resource, 'hosts', [])
+        if not hosts or any(isinstance(host, string_types) for host in hosts):
+            return None
+        return {host.name for host in hosts}
+
+    @property
+    def status(self):
+        """The task status, None if the task did not run yet."""
+        return self.result['status'] if self.result else None
+
+
+class DagScheduler(LoggerMixin):
+    """Dependency aware scheduler.
+
+    Rather than waiting for every task of a stage to finish before starting
+    the next stage, the scheduler builds a dependency graph out of the
+    pipelines and starts each task as soon as the assets it targets are
+    ready. An action or execute depends on the provision tasks of the assets
+    it targets and on any earlier action or execute sharing one of them, so
+    the order declared in the scenario is kept per asset.
+    """
+
+    def __init__(self, scenario, carbon_options, stages, inventory=None, max_workers=10, engine=None):
+        """Constructor.
+
+        :param scenario: carbon scenario object containing all scenario data
+        :type scenario: object
+        :param carbon_options: extra options provided during carbon run
+        :type carbon_options: dict
+        :param stages: carbon task names to schedule
+        :type stages: list
+        :param inventory: carbon inventory refreshed as assets are provisioned
+        :type inventory: object
+        :param max_workers: maximum number of tasks to run at the same time
+        :type max_workers: int
+        :param engine: execution engine running the tasks
+        :type engine: carbon.utils.engine.Engine
+        """
+        self.scenario = scenario
+        self.carbon_options = carbon_options
+        self.stages = [stage for stage in DAG_TASKLIST if stage in stages]
+        self.inventory = inventory
+        self.max_workers = max_workers
+        self.engine = engine if engine else BlasterEngine(max_workers=max_workers)
+        self.nodes = list()
+
+        # current asset objects keyed by the asset name they were declared with
+        self._assets = OrderedDict()
+        self._resolver = None
+
+    def build(self):
+        """Build the dependency graph from the pipelines of each stage.
+
+        :return: graph nodes
+        :rtype: list
+        """
+        self.nodes = list()
+        self._assets = OrderedDict((asset.name, [asset]) for asset in self.scenario.get_all_assets())
+        self._resolver = None
+
+        for stage in self.stages:
+            pipeline = PipelineFactory.get_pipeline(stage).build(self.scenario, self.carbon_options)
+            for task in pipeline.tasks:
+                node = TaskNode(len(self.nodes), stage, task)
+                if stage != 'provision':
+                    self._link(node)
+                self.nodes.append(node)
+        return self.nodes
+
+    def _link(self, node):
+        """Set the nodes the given node depends on.
+
+        :param node: graph node of an action or execute
+        :type node: TaskNode
+        """
+        names = node.host_names
+        for item in self.nodes:
+            # hosts which could not be resolved depend on everything before
+            if names is None or item.host_names is None or names.intersection(item.host_names):
+                node.depends.add(item.index)
+
+    def _ready(self, pending, failed_stage):
+        """Return the pending nodes which are able to start."""
+        ready = list()
+        for node in pending:
+            if failed_stage and self.stages.index(node.stage) >= self.stages.index(failed_stage):
+                continue
+            if all(self.nodes[index].status == 0 for index in node.depends):
+                ready.append(node)
+        return ready
+
+    def _can_start(self, node, running):
+        """Return whether the concurrency limits allow the node to start.
+
+        Tasks of a stage set to run concurrently are limited by its task
+        concurrency, tasks of a stage not set to run concurrently run one at
+        a time, and tasks of an asset provider are limited by its provider
+        concurrency.
+        """
+        task_class = node.task['task']
+        limit = 1
+        if getattr(task_class, '__concurrent__', True):
+            limit = getattr(task_class, '__concurrency__', self.max_workers)
+        if len([index for index in running if self.nodes[index].stage == node.stage]) >= limit:
+            return False
+        return self.engine.can_submit(node.task)
+
+    def _current_assets(self):
+        """Return the latest asset objects, in the order they were declared."""
+        return [asset for assets in self._assets.values() for asset in assets]
+
+    def _update_assets(self, node):
+        """Update the asset objects with the data returned by a provision task.
+
+        :param node: graph node of a provision task which completed
+        :type node: TaskNode
+        """
+        asset = node.result['asset']
+        rvalue = node.result['methods'][0]['rvalue']
+        if rvalue:
+            self._assets[node.resource.name] = [Asset(config=asset.config, parameters=copy.deepcopy(item))
+                                                for item in rvalue]
+        else:
+            self._assets[node.resource.name] = [asset]
+
+        # the hosts changed, index them again on the next task start
+        self._resolver = None
+
+        if self.inventory:
+            # the playbooks running keep reading the previous inventory until the new one replaces it
+            self.inventory.create_master(all_hosts=self._current_assets(), rebuild=True)
+
+    def _start(self, node):
+        """Hand the task of the given node to the engine."""
+        if node.stage != 'provision':
+            # the hosts may have been provisioned since the graph was built
+            if self._resolver is None:
+                self._resolver = HostResolver(self._current_assets())
+            fetch_assets(self._resolver.hosts, node.task, resolver=self._resolver)
+
+        self.logger.info('Starting %s task: %s' % (node.stage, node.task['name']))
+        node.started = time.time()
+        self.engine.submit(node.index, node.task)
+
+    def _stage_results(self):
+        """Return the results of every node grouped by stage.
+
+        Nodes which never started are given a status of n/a, same as
+        blaster does for the tasks flushed out of its queue.
+        """
+        results = OrderedDict((stage, list()) for stage in self.stages)
+        for node in self.nodes:
+            if node.result is None:
+                node.result = not_run_task(node.task)
+            results[node.stage].append(node.result)
+        return results
+
+    def run(self):
+        """Run the dependency graph.
+
+        When a task fails no further tasks of its stage, or the stages after
+        it, are started. Tasks of the earlier stages keep running so those
+        stages complete the same way they would have without the scheduler.
+
+        :return: task results grouped by stage
+        :rtype: OrderedDict
+        """
+        if not self.nodes:
+            self.build()
+
+        self.logger.info('Task Execution: Dependency graph of %s tasks for %s' % (len(self.nodes), self.stages))
+
+        pending = list(self.nodes)
+        running = set()
+        failed_stage = None
+
+        try:
+            while pending or running:
+                for node in self._ready(pending, failed_stage):
+                    if len(running) >= self.max_workers:
+                        break
+                    if not self._can_start(node, running):
+                        continue
+                    pending.remove(node)
+                    running.add(node.index)
+                    self._start(node)
+
+                if not running:
+                    stuck = self._ready(pending, failed_stage)
+                    if stuck:
+                        results = self._stage_results()
+                        raise CarbonSchedulerError('Tasks %s are ready to start but no task is running, the '
+                                                   'concurrency limits never allow them to start.'
+                                                   % ', '.join([node.task['name'] for node in stuck]),
+                                                   task=stuck[0].stage, results=results[stuck[0].stage],
+                                                   stage_results=results)
+                    # remaining nodes are blocked by a failure
+                    break
+
+                index, result = self.engine.collect()
+                running.remove(index)
+                node = self.nodes[index]
+                node.result = result
+                node.finished = time.time()
+
+                if node.status != 0:
+                    self.logger.error('Task %s of %s failed.' % (node.task['name'], node.stage))
+                    if failed_stage is None or self.stages.index(node.stage) < self.stages.index(failed_stage):
+                        failed_stage = node.stage
+                elif node.stage == 'provision':
+                    self._update_assets(node)
+        except KeyboardInterrupt:
+            self.engine.terminate()
+            raise
+
+        results = self._stage_results()
+        for stage, data in results.items():
+            # a stage runs from its first task start to its last task completion
+            ran = [node for node in self.nodes if node.stage == stage and node.started]
+            wall = max(node.finished for node in ran) - min(node.started for node in ran) if ran else 0.0
+            self.engine.record_stats(stage, data, data, wall)
+
+        if failed_stage:
+            raise CarbonSchedulerError('One or more tasks got a status of non zero.', task=failed_stage,
+                                       results=results[failed_stage], stage_results=results)
+        return results
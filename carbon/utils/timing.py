@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    carbon.utils.timing
+
+    Module containing the timer saving how long the tasks run on a resource
+    took, along with the resource.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+# timer of the task run by the current thread
+_context = threading.local()
+
+
+def count_retry():
+    """Count a retry of the task run by the current thread, if any."""
+    timer = getattr(_context, 'timer', None)
+    if timer is not None:
+        timer.retries += 1
+
+
+def record(name, value=1):
+    """Add a value to a counter of the task run by the current thread, if any.
+
+    :param name: counter name, i.e. ssh_wait or playbooks
+    :type name: str
+    :param value: value to add to the counter
+    :type value: int
+    """
+    timer = getattr(_context, 'timer', None)
+    if timer is not None:
+        timer.counters[name] = timer.counters.get(name, 0) + value
+
+
+class TaskTimer(object):
+    """Timer of the methods of a task.
+
+    The time the task waited to be picked up by a worker, the time spent
+    running its methods, the number of retries and the other counters
+    recorded while running them are saved in the timings of the resource
+    the task runs on, keyed by the task name. The resource is handed back
+    to carbon along with the task results, so the timings get saved
+    whichever engine ran the task.
+    """
+
+    def __init__(self, task, resource, queued=None):
+        """Constructor.
+
+        :param task: task name
+        :type task: str
+        :param resource: resource the task runs on
+        :type resource: object
+        :param queued: time the task was handed to the engine at
+        :type queued: float
+        """
+        self.task = task
+        self.resource = resource
+        self.wait = max(time.time() - queued, 0.0) if queued else 0.0
+        self.run = 0.0
+        self.retries = 0
+        self.counters = OrderedDict()
+
+    def wrap(self, func):
+        """Return the function adding the time spent running it to the timer."""
+        @wraps(func)
+        def timed(*args, **kwargs):
+            previous = getattr(_context, 'timer', None)
+            _context.timer = self
+            start = time.time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.run += time.time() - start
+                _context.timer = previous
+                self.save()
+        return timed
+
+    def save(self):
+        """Save the timings of the task in the resource timings."""
+        timings = OrderedDict([('queued', round(self.wait, 3)), ('run', round(self.run, 3)),
+                               ('retries', self.retries)])
+        for name, value in self.counters.items():
+            timings[name] = round(value, 3) if isinstance(value, float) else value
+        self.resource.timings[self.task] = timings
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    carbon.utils.trace
+
+    Module containing the tracer recording the spans of a carbon run, which
+    are exported as a Chrome trace event file.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# stage the spans recorded by the current thread belong to
+_context = threading.local()
+
+# stage of the spans recorded outside of any stage
+DEFAULT_STAGE = 'carbon'
+
+
+class Tracer(object):
+    """Tracer recording the spans of a carbon run.
+
+    Spans are appended as json lines to a file per process, in the folder
+    the tracer was started with, so the worker processes forked by the
+    engines record their spans without any coordination. The files are
+    merged by :meth:`export` into a Chrome trace event file, viewable in
+    Perfetto or chrome://tracing, with a track per stage holding a thread
+    per worker.
+    """
+
+    def __init__(self):
+        self.folder = None
+        self._main_pid = None
+        self._file = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.folder is not None
+
+    def start(self, folder):
+        """Start recording spans into the given folder.
+
+        :param folder: folder holding the span files of the processes
+        :type folder: str
+        """
+        self.stop()
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        self.folder = folder
+        self._main_pid = os.getpid()
+
+    def stop(self):
+        """Stop recording spans."""
+        if self._file is not None and self._pid == os.getpid():
+            self._file.close()
+        self._file = None
+        self._pid = None
+        self.folder = None
+
+    def _write(self, event):
+        if os.getpid() != self._pid:
+            # forked worker process, the file and lock belong to the parent
+            self._lock = threading.Lock()
+            self._file = open(os.path.join(self.folder, 'spans.%s.jsonl' % os.getpid()), 'a')
+            self._pid = os.getpid()
+        line = json.dumps(event, default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    @contextmanager
+    def span(self, name, cat, stage=None, **args):
+        """Record the time spent running the enclosed block as a span.
+
+        :param name: span name
+        :type name: str
+        :param cat: span category, i.e. task, playbook, ssh or poll
+        :type cat: str
+        :param stage: stage the span and the spans it encloses belong to,
+            defaults to the stage of the enclosing span
+        :type stage: str
+        :param args: additional data shown along with the span
+        """
+        if not self.enabled:
+            yield
+            return
+
+        previous = getattr(_context, 'stage', None)
+        if stage is not None:
+            _context.stage = stage
+        start = time.time()
+        try:
+            yield
+        except BaseException as ex:
+            args['error'] = repr(ex)
+            raise
+        finally:
+            end = time.time()
+            _context.stage = previous
+            thread = threading.current_thread()
+            self._write(dict(name=name, cat=cat, ph='X', ts=start * 1e6, dur=(end - start) * 1e6,
+                             stage=stage or previous or DEFAULT_STAGE, pid=os.getpid(),
+                             tid=thread.ident, thread=thread.name, args=args))
+
+    def wrap(self, func, name, cat, stage=None, **args):
+        """Return the function recording a span each time it is called."""
+        @wraps(func)
+        def traced(*func_args, **func_kwargs):
+            with self.span(name, cat, stage=stage, **args):
+                return func(*func_args, **func_kwargs)
+        return traced
+
+    def events(self):
+        """Return the spans recorded by every process, ordered by start time."""
+        events = list()
+        if not self.enabled:
+            return events
+        for name in sorted(os.listdir(self.folder)):
+            if not name.endswith('.jsonl'):
+                continue
+            with open(os.path.join(self.folder, name)) as f:
+                events.extend([json.loads(line) for line in f if line.strip()])
+        return sorted(events, key=lambda event: event['ts'])
+
+    def export(self, path):
+        """Merge the spans of every process into a Chrome trace event file.
+
+        Each stage gets its own track (a trace process), holding a thread
+        per worker process or thread which ran spans of the stage, so the
+        spans of a task nest under its stage and worker.
+
+        :param path: path of the trace file
+        :type path: str
+        :return: number of spans exported
+        :rtype: int
+        """
+        events = self.events()
+        stages, workers, metadata, spans = dict(), dict(), list(), list()
+
+        for event in events:
+            stage = event.pop('stage')
+            if stage not in stages:
+                stages[stage] = len(stages) + 1
+                metadata.append(dict(name='process_name', ph='M', pid=stages[stage], tid=0,
+                                     args=dict(name=stage)))
+                metadata.append(dict(name='process_sort_index', ph='M', pid=stages[stage], tid=0,
+                                     args=dict(sort_index=stages[stage])))
+
+            worker = (stages[stage], event['pid'], event['tid'])
+            if worker not in workers:
+                workers[worker] = len(workers) + 1
+                if event['pid'] == self._main_pid:
+                    label = 'carbon %s (%s)' % (event['pid'], event['thread'])
+                else:
+                    label = 'worker %s' % event['pid']
+                metadata.append(dict(name='thread_name', ph='M', pid=stages[stage], tid=workers[worker],
+                                     args=dict(name=label)))
+
+            event.pop('thread')
+            event.update(pid=stages[stage], tid=workers[worker])
+            spans.append(event)
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        with open(path, 'w') as f:
+            json.dump(dict(traceEvents=metadata + spans, displayTimeUnit='ms'), f)
+        return len(spans)
+
+
+# tracer shared by the main process and the worker processes it forks
+tracer = Tracer()
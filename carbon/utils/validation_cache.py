@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    carbon.utils.validation_cache
+
+    Module containing the validation cache which keeps the verdicts of the
+    resources which passed validation, so later runs of the same scenario do
+    not validate them again.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from .. import __version__
+from .._compat import string_types
+from ..constants import VALIDATE_CACHE_PLUGINS
+from ..core import LoggerMixin
+
+
+class ValidationCache(LoggerMixin):
+    """Verdicts of the resources which passed validation, kept across runs.
+
+    Each resource is fingerprinted from its definition along with the carbon
+    version, the plugin validating it and the content of the plugin schema
+    files, and the content of the local files the definition refers to, i.e.
+    playbooks and scripts. A resource whose fingerprint passed validation in
+    a previous run is not validated again, until any of them changes.
+
+    Only the verdicts of the resources which passed are kept, so a resource
+    failing validation is validated by every run. Each verdict is a file of
+    its own, so runs sharing the cache folder do not overwrite each other.
+    """
+
+    def __init__(self, path, force=False):
+        """Constructor.
+
+        :param path: cache folder path
+        :type path: str
+        :param force: whether to validate every resource, the verdicts of the
+            ones passing still being kept
+        :type force: bool
+        """
+        self.path = path
+        self.force = force
+
+        # digests of the schema files of the plugins, keyed by file path
+        self._digests = dict()
+
+    @staticmethod
+    def get_plugin(resource):
+        """Return the plugin class validating a resource.
+
+        :param resource: carbon resource
+        :type resource: object
+        :return: plugin class, None if the resource is not validated by a plugin
+        :rtype: type
+        """
+        for attr in VALIDATE_CACHE_PLUGINS:
+            plugin = getattr(resource, attr, None)
+            if isinstance(plugin, type):
+                return plugin
+        return None
+
+    def _digest(self, path):
+        """Return the digest of a file content, computed once per file."""
+        if path not in self._digests:
+            with open(path, 'rb') as f:
+                self._digests[path] = hashlib.sha256(f.read()).hexdigest()
+        return self._digests[path]
+
+    def _referenced_files(self, value, workspace, digests):
+        """Collect the digests of the local files a definition value refers to.
+
+        Any string of the definition whose first word is a file, relative to
+        the scenario workspace or absolute, i.e. a playbook or a script
+        followed by its arguments, is a reference to that file.
+
+        :param value: definition value
+        :type value: object
+        :param workspace: scenario workspace folder
+        :type workspace: str
+        :param digests: digests of the files found, keyed by their reference
+        :type digests: dict
+        """
+        if isinstance(value, dict):
+            for item in value.values():
+                self._referenced_files(item, workspace, digests)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                self._referenced_files(item, workspace, digests)
+        elif isinstance(value, string_types) and value.split():
+            name = value.split()[0]
+            path = os.path.join(workspace, name) if workspace else name
+            try:
+                if os.path.isfile(path):
+                    digests[name] = self._digest(path)
+            except (TypeError, ValueError):
+                pass
+
+    def fingerprint(self, resource):
+        """Return the fingerprint of a resource.
+
+        :param resource: carbon resource
+        :type resource: object
+        :return: fingerprint, None if the verdicts of the resource are not cached
+        :rtype: str
+        """
+        plugin = self.get_plugin(resource)
+        if plugin is None:
+            return None
+
+        profile = OrderedDict((key, value) for key, value in resource.profile().items() if key != 'timings')
+
+        package = sys.modules.get(plugin.__module__.split('.')[0])
+
+        # schema and extension files of the plugin
+        schemas = list()
+        for name in sorted(dir(plugin)):
+            value = getattr(plugin, name)
+            if name.startswith('__schema') and isinstance(value, string_types) and os.path.isfile(value):
+                schemas.append(self._digest(value))
+
+        # parameters the plugin validates, credentials included
+        parameters = None
+        if hasattr(plugin, 'build_profile') and os.path.isfile(getattr(plugin, '__schema_file_path__', '') or ''):
+            parameters = plugin.build_profile(resource)
+
+        # local files the definition refers to, i.e. playbooks and scripts
+        files = dict()
+        self._referenced_files(profile, getattr(resource, 'workspace', None), files)
+
+        data = [__version__, type(resource).__name__, '%s.%s' % (plugin.__module__, plugin.__name__),
+                getattr(package, '__version__', None), schemas, profile, parameters, files]
+        return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _verdict_path(self, fingerprint):
+        """Return the path of the verdict file of a fingerprint."""
+        return os.path.join(self.path, fingerprint[:2], fingerprint)
+
+    def split(self, tasks):
+        """Split validate tasks between the ones whose resource passed validation already and the ones to run.
+
+        The tasks to run hold the fingerprint of their resource, for the
+        verdicts of the ones passing to be kept once they ran.
+
+        :param tasks: validate task definitions built by the pipeline builder
+        :type tasks: list
+        :return: results of the tasks skipped and the task definitions to run
+        :rtype: tuple
+        """
+        skipped = list()
+        pending = list()
+        for task in tasks:
+            fingerprint = self.fingerprint(task.get('resource'))
+            if fingerprint and not self.force and os.path.exists(self._verdict_path(fingerprint)):
+                self.logger.info('%s passed validation in a previous run, skipping it.' % task['name'])
+                result = dict(task)
+                result['status'] = 0
+                result['methods'] = [dict(name=method, status=0, rvalue=None) for method in task['methods']]
+                skipped.append(result)
+            else:
+                pending.append(dict(task, fingerprint=fingerprint) if fingerprint else task)
+        return skipped, pending
+
+    def record(self, results):
+        """Keep the verdicts of the validate tasks which passed.
+
+        :param results: results of the validate tasks handed back by the engine
+        :type results: list
+        """
+        for result in results:
+            if result.get('status') != 0 or not result.get('fingerprint'):
+                continue
+            path = self._verdict_path(result['fingerprint'])
+            try:
+                if not os.path.isdir(os.path.dirname(path)):
+                    os.makedirs(os.path.dirname(path))
+                with open(path, 'w') as f:
+                    json.dump(dict(name=result['name'], time=time.time()), f)
+            except (OSError, IOError) as ex:
+                # a verdict which is not kept only means validating the resource again
+                self.logger.warning('Unable to keep the validation verdict of %s: %s' % (result['name'], ex))
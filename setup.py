@@ -48,8 +48,9 @@ setup(
         "blaster>=0.3.0",
         'Click>=6.7',
         'Jinja2>=2.10',
-        'pykwalify>=1.6.0',
+        'pykwalify>=1.6.0,<1.9',
         'python-cachetclient',
+        'PyYAML>=5.1',
         'ruamel.yaml>=0.15.64',
         'paramiko>=2.4.2',
         'requests>=2.20.1',
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    tests.benchmark.benchmark
+
+    Benchmarks of carbon on synthetic scenarios holding N assets, actions,
+    executes and reports, run through stub plugins and a fake
+    ansible-playbook, so carbon itself is measured rather than the systems
+    it drives.
+
+    Each size runs in its own process, the time spent in each phase of the
+    run along with the peak memory of the process are saved in a json file
+    which can be compared with the file of another commit:
+
+        $ python benchmark.py --sizes 10,100,1000,10000
+        $ python benchmark.py --sizes 10,100,1000 --compare benchmark-<commit>.json
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import yaml
+
+BENCHMARK_FOLDER = os.path.abspath(os.path.dirname(__file__))
+
+# sizes benchmarked by default
+SIZES = [10, 100, 1000, 10000]
+
+# memory each asset created from a provisioned resource may hold, in bytes, checked from the size
+# on which the memory allocated once by carbon no longer counts
+MAX_ASSET_BYTES = 1536
+MAX_ASSET_BYTES_SIZE = 1000
+
+# tasks run through the stub plugins, along with the task results being reloaded
+RUN_TASKS = ['provision', 'orchestrate', 'execute', 'report']
+
+CARBON_CFG = """[defaults]
+log_level=%(log_level)s
+engine=%(engine)s
+
+[credentials:stub]
+token=benchmark
+
+[orchestrator:ansible]
+log_remove=False
+verbosity=
+"""
+
+PLAYBOOK = """---
+- hosts: all
+  gather_facts: false
+  tasks:
+    - debug:
+        msg: benchmark
+"""
+
+
+def generate_scenario(path, size):
+    """Write a scenario with the given number of assets, actions, executes and reports.
+
+    :param path: path of the scenario file
+    :type path: str
+    :param size: number of resources of each type
+    :type size: int
+    """
+    names = ['%05d' % index for index in range(size)]
+    scenario = OrderedDict([
+        ('name', 'benchmark-%s' % size),
+        ('description', 'synthetic scenario of %s resources per type' % size),
+        ('provision', [OrderedDict([('name', 'host%s' % name), ('groups', 'group%s' % name),
+                                    ('provisioner', 'stub'), ('flavor', 'm1.small'), ('image', 'rhel-8')])
+                       for name in names]),
+        ('orchestrate', [OrderedDict([('name', 'action%s' % name), ('description', 'configure host%s' % name),
+                                      ('orchestrator', 'ansible'), ('hosts', 'host%s' % name),
+                                      ('ansible_playbook', dict(name='playbook.yml'))])
+                         for name in names]),
+        ('execute', [OrderedDict([('name', 'execute%s' % name), ('description', 'test host%s' % name),
+                                  ('executor', 'stub'), ('hosts', 'host%s' % name)])
+                     for name in names]),
+        ('report', [OrderedDict([('name', 'execute%s.xml' % name), ('description', 'report execute%s' % name),
+                                 ('executes', 'execute%s' % name), ('importer', 'stub'),
+                                 ('credential', 'stub')])
+                    for name in names])
+    ])
+
+    # dump the ordered dicts as plain mappings, keeping the keys order
+    dumper = type('ScenarioDumper', (yaml.SafeDumper,), dict())
+    dumper.add_representer(OrderedDict, lambda dump, data: dump.represent_dict(data.items()))
+    with open(path, 'w') as f:
+        yaml.dump(scenario, f, Dumper=dumper, default_flow_style=False)
+
+
+@contextmanager
+def measure(timings, phase):
+    """Add the time spent running the enclosed block to the timings of a phase."""
+    start = time.time()
+    try:
+        yield
+    finally:
+        timings[phase] = round(timings.get(phase, 0.0) + time.time() - start, 4)
+
+
+def check_results(task, results):
+    """Raise an error when a task failed, the benchmark would not measure a complete run."""
+    for item in results:
+        failed = [method for method in item['methods'] if method['status'] != 0]
+        if failed:
+            raise RuntimeError('Task %s of %s failed:\n%s' % (task, item['name'], failed[0].get('traceback')))
+
+
+def benchmark_size(size, options):
+    """Benchmark a scenario of the given size, in the calling process.
+
+    :param size: number of resources of each type
+    :type size: int
+    :param options: command line options
+    :type options: argparse.Namespace
+    :return: time spent in each phase, in seconds
+    :rtype: OrderedDict
+    """
+    workspace = tempfile.mkdtemp(prefix='carbon-benchmark-')
+    try:
+        with open(os.path.join(workspace, 'carbon.cfg'), 'w') as f:
+            f.write(CARBON_CFG % dict(log_level=options.log_level, engine=options.engine))
+        with open(os.path.join(workspace, 'playbook.yml'), 'w') as f:
+            f.write(PLAYBOOK)
+        scenario_path = os.path.join(workspace, 'scenario.yml')
+        generate_scenario(scenario_path, size)
+
+        # carbon loads the carbon.cfg file of the current directory, and the ansible-playbook found on the path
+        os.chdir(workspace)
+        os.environ['PATH'] = os.pathsep.join([os.path.join(BENCHMARK_FOLDER, 'bin'), os.environ['PATH']])
+
+        from carbon import Carbon
+        from carbon.constants import TASKLIST
+        from carbon.helpers import validate_render_scenario
+        from carbon.utils.engine import run_task
+        from carbon.utils.pipeline import PipelineFactory
+        import stubs
+        stubs.register()
+
+        timings = OrderedDict()
+        with measure(timings, 'render'):
+            scenario_stream = validate_render_scenario(scenario_path)
+
+        cbn = Carbon(data_folder=os.path.join(workspace, '.carbon'), workspace=workspace)
+        with measure(timings, 'load_from_yaml'):
+            cbn.load_from_yaml(scenario_stream)
+
+        with measure(timings, 'build'):
+            pipelines = dict((task, PipelineFactory.get_pipeline(task).build(cbn.scenario, cbn.carbon_options))
+                             for task in TASKLIST)
+
+        with measure(timings, 'validate'):
+            results = [run_task(task) for task in pipelines['validate'].tasks]
+        check_results('validate', results)
+
+        # only the assets get provisioned for the sizes above the run limit
+        selected = options.tasks.split(',') if size <= options.run_max else ['provision']
+        run_tasks = [task for task in RUN_TASKS if task in selected]
+        for task in run_tasks:
+            with measure(timings, task):
+                results = cbn._run_pipeline(task)
+            check_results(task, results)
+
+            with measure(timings, 'reload_resources'):
+                cbn.scenario.reload_resources(results)
+
+            if task == 'provision':
+                with measure(timings, 'create_master'):
+                    cbn.cbn_inventory.create_master(all_hosts=cbn.scenario.get_all_assets())
+
+        # one asset provisioning as many resources as the scenario size, as with count
+        from carbon.provisioners import AssetProvisioner
+        from carbon.resources import Asset
+        asset = Asset(config=cbn.config, parameters=dict(name='counted', groups='counted', provisioner='stub',
+                                                         flavor='m1.small', image='rhel-8', count=size))
+        with measure(timings, 'provision_count'):
+            profiles = AssetProvisioner(asset).create()
+
+        # memory held by each asset created from the resources provisioned
+        tracemalloc.start()
+        assets = [Asset(config=cbn.config, parameters=profile) for profile in profiles]
+        timings['asset_bytes'] = tracemalloc.get_traced_memory()[0] // len(assets)
+        tracemalloc.stop()
+        del assets, profiles
+
+        with measure(timings, 'write_results'):
+            cbn._write_out_results()
+
+        with measure(timings, 'archive'):
+            cbn._archive_results()
+
+        cbn._shutdown_engines()
+        timings['tasks'] = run_tasks
+        timings['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return timings
+    finally:
+        os.chdir(BENCHMARK_FOLDER)
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+def git_commit():
+    """Return the commit of the carbon tree benchmarked, if any."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARK_FOLDER,
+                                       stderr=subprocess.STDOUT).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, baseline):
+    """Print the ratio of the time spent in each phase to the one of a baseline."""
+    print('%-8s %-20s %12s %12s %8s' % ('size', 'phase', baseline['commit'], results['commit'], 'ratio'))
+    for size, timings in results['sizes'].items():
+        before = baseline['sizes'].get(size)
+        if before is None:
+            continue
+        for phase, value in timings.items():
+            if not isinstance(value, (int, float)) or not isinstance(before.get(phase), (int, float)):
+                continue
+            ratio = value / before[phase] if before[phase] else float('inf')
+            print('%-8s %-20s %12.4f %12.4f %7.2fx' % (size, phase, before[phase], value, ratio))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark carbon on synthetic scenarios.')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in SIZES),
+                        help='comma separated numbers of resources of each type (default: %(default)s)')
+    parser.add_argument('--run-max', type=int, default=1000,
+                        help='largest size whose orchestrate, execute and report tasks are run, larger ones only '
+                             'provision (default: %(default)s)')
+    parser.add_argument('--tasks', default=','.join(RUN_TASKS),
+                        help='comma separated tasks run through the stub plugins (default: %(default)s)')
+    parser.add_argument('--engine', default='thread', help='engine running the tasks (default: %(default)s)')
+    parser.add_argument('--log-level', default='info', help='carbon log level (default: %(default)s)')
+    parser.add_argument('--max-asset-bytes', type=int, default=MAX_ASSET_BYTES,
+                        help='memory each asset may hold, the benchmarks fail above it (default: %(default)s)')
+    parser.add_argument('--output', help='results file (default: benchmark-<commit>.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='results file to compare the results with')
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--size-output', help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.size is not None:
+        # benchmark of a single size, run in a process of its own by the main one
+        timings = benchmark_size(options.size, options)
+        with open(options.size_output, 'w') as f:
+            json.dump(timings, f)
+        return
+
+    results = OrderedDict([('commit', git_commit()), ('date', time.strftime('%Y-%m-%dT%H:%M:%S')),
+                           ('python', platform.python_version()), ('engine', options.engine),
+                           ('sizes', OrderedDict())])
+    for size in [int(item) for item in options.sizes.split(',')]:
+        print('Benchmarking %s resources per type...' % size, file=sys.stderr)
+        folder = tempfile.mkdtemp(prefix='carbon-benchmark-')
+        try:
+            with open(os.path.join(folder, 'output.log'), 'w+') as log:
+                rc = subprocess.call([sys.executable, os.path.abspath(__file__), '--size', str(size),
+                                      '--size-output', os.path.join(folder, 'timings.json'),
+                                      '--run-max', str(options.run_max), '--tasks', options.tasks,
+                                      '--engine', options.engine,
+                                      '--log-level', options.log_level], stdout=log, stderr=subprocess.STDOUT)
+                if rc != 0:
+                    log.seek(0)
+                    sys.exit('Benchmark of %s resources per type failed:\n%s' %
+                             (size, ''.join(log.readlines()[-40:])))
+            with open(os.path.join(folder, 'timings.json')) as f:
+                results['sizes'][str(size)] = json.load(f, object_pairs_hook=OrderedDict)
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+        print(json.dumps(results['sizes'][str(size)]), file=sys.stderr)
+
+    oversized = [size for size, timings in results['sizes'].items()
+                 if int(size) >= MAX_ASSET_BYTES_SIZE and timings['asset_bytes'] > options.max_asset_bytes]
+    path = options.output or 'benchmark-%s.json' % results['commit']
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print('Saved the results to %s' % path, file=sys.stderr)
+
+    if options.compare:
+        with open(options.compare) as f:
+            compare(results, json.load(f, object_pairs_hook=OrderedDict))
+
+    if oversized:
+        sys.exit('Each asset holds more than %s bytes with %s resources per type.' %
+                 (options.max_asset_bytes, ', '.join(oversized)))
+
+
+if __name__ == '__main__':
+    main()
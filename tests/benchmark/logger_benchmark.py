@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    tests.benchmark.logger_benchmark
+
+    Micro-benchmark of the LoggerMixin.logger property against the stack
+    inspection it used before, which looked up the module of the caller by
+    building a record of every frame on the stack.
+
+    Both lookups are timed from the same depth of the stack, as carbon
+    accesses its loggers from deep within its tasks, and must return the
+    same logger:
+
+        $ python logger_benchmark.py
+        $ python logger_benchmark.py --depth 50 --number 1000
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+from __future__ import print_function
+
+import argparse
+import inspect
+import sys
+import timeit
+from logging import getLogger
+
+from carbon.core import LoggerMixin
+
+
+class StackLoggerMixin(LoggerMixin):
+    """The logger lookup of LoggerMixin before it read the caller's globals."""
+
+    @property
+    def logger(self):
+        return getLogger(inspect.getmodule(inspect.stack()[1][0]).__name__)
+
+
+def at_depth(depth, func):
+    """Call func with depth frames of this module beneath it on the stack."""
+    if depth <= 0:
+        return func()
+    return at_depth(depth - 1, func)
+
+
+def measure(obj, depth, number, repeat):
+    """Return the best time, in microseconds, of accessing the logger of obj."""
+    def access():
+        for _ in range(number):
+            obj.logger
+
+    timings = timeit.repeat(lambda: at_depth(depth, access), number=1, repeat=repeat)
+    return min(timings) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the LoggerMixin logger lookup.')
+    parser.add_argument('--depth', type=int, default=30,
+                        help='frames on the stack beneath the access (default: %(default)s)')
+    parser.add_argument('--number', type=int, default=200,
+                        help='logger accesses timed in each repeat (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=5, help='repeats, the best is kept (default: %(default)s)')
+    options = parser.parse_args()
+
+    before, after = StackLoggerMixin(), LoggerMixin()
+    if at_depth(options.depth, lambda: before.logger) is not at_depth(options.depth, lambda: after.logger):
+        sys.exit('The logger lookups return different loggers.')
+
+    before_us = measure(before, options.depth, options.number, options.repeat)
+    after_us = measure(after, options.depth, options.number, options.repeat)
+    print('%-20s %12s %12s %8s' % ('lookup', 'before (us)', 'after (us)', 'speedup'))
+    print('%-20s %12.3f %12.3f %7.0fx' % ('LoggerMixin.logger', before_us, after_us, before_us / after_us))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    tests.benchmark.stubs
+
+    Module containing the stub plugins the benchmarks run the scenarios
+    through, so carbon itself is measured rather than the providers, test
+    machines or report servers.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import os
+import uuid
+
+from carbon.core import ProvisionerPlugin, ExecutorPlugin, ImporterPlugin
+from carbon.helpers import plugin_registry, schema_validator
+
+SCHEMAS = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'schemas')
+
+# junit file each execute collects as its artifact
+JUNIT = '<testsuite name="%s" tests="1" failures="0" skipped="0"><testcase name="test"/></testsuite>\n'
+
+
+class StubProvisionerPlugin(ProvisionerPlugin):
+    """Provisioner handing back each asset as the local machine without creating anything.
+
+    The assets being local, the ansible orchestrator runs the playbooks of
+    the actions without waiting for them to be reachable over SSH.
+    """
+
+    __plugin_name__ = 'stub'
+    __schema_file_path__ = os.path.join(SCHEMAS, 'provisioner.yml')
+
+    def create(self):
+        # an asset with a count gets that many resources, as the providers supporting count do
+        names = [getattr(self.asset, 'name')]
+        if getattr(self.asset, 'count', None):
+            names = ['%s_%s' % (names[0], index) for index in range(int(getattr(self.asset, 'count')))]
+        return [dict(name=name, ip='127.0.0.1', hostname=name, node_id=uuid.uuid5(uuid.NAMESPACE_DNS, name).hex)
+                for name in names]
+
+    def delete(self):
+        pass
+
+    def authenticate(self):
+        pass
+
+    def validate(self):
+        schema_validator(schema_data=self.build_profile(self.asset), schema_files=[self.__schema_file_path__])
+
+
+class StubExecutorPlugin(ExecutorPlugin):
+    """Executor writing a junit artifact for each execute without running any test."""
+
+    __plugin_name__ = 'stub'
+    __executor_name__ = 'stub'
+    __schema_file_path__ = os.path.join(SCHEMAS, 'executor.yml')
+
+    def validate(self):
+        schema_validator(schema_data=self.build_profile(self.execute), schema_files=[self.__schema_file_path__])
+
+    def run(self):
+        folder = os.path.join(self.config['RESULTS_FOLDER'], 'artifacts', self.execute_name)
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        with open(os.path.join(folder, '%s.xml' % self.execute_name), 'w') as f:
+            f.write(JUNIT % self.execute_name)
+        self.execute.artifact_locations = ['artifacts/%s/%s.xml' % (self.execute_name, self.execute_name)]
+        return 0
+
+
+class StubImporterPlugin(ImporterPlugin):
+    """Importer reporting the artifacts of each report as imported without sending them anywhere."""
+
+    __plugin_name__ = 'stub'
+    __schema_file_path__ = os.path.join(SCHEMAS, 'importer.yml')
+
+    def validate(self):
+        schema_validator(schema_data=self.build_profile(self.report), schema_files=[self.__schema_file_path__])
+
+    def aggregate_artifacts(self):
+        pass
+
+    def import_artifacts(self):
+        return [dict(name=os.path.basename(item), imported=True) for item in self.artifacts]
+
+    def cleanup_artifacts(self):
+        pass
+
+
+def register():
+    """Register the stub plugins along with the plugins installed."""
+    plugin_registry.register('provisioner_plugins', 'stub', StubProvisionerPlugin)
+    plugin_registry.register('executor_plugins', 'stub', StubExecutorPlugin)
+    plugin_registry.register('importer_plugins', 'stub', StubImporterPlugin)
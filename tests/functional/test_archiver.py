@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    tests.test_archiver
+
+    Unit tests for testing carbons results archiver.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import errno
+import os
+
+import mock
+import pytest
+from carbon.utils.archiver import ResultsArchiver
+
+
+def write(path, content):
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+@pytest.fixture
+def run_folders(tmpdir):
+    data = os.path.join(tmpdir.strpath, 'run')
+    write(os.path.join(data, 'results.yml'), 'name: scenario\n')
+    write(os.path.join(data, 'logs', 'carbon_scenario.log'), 'log\n')
+    write(os.path.join(data, 'logs', 'ansible', 'ansible.log'), 'ansible\n')
+    write(os.path.join(data, '.results.yml.tmp'), 'partial')
+    os.symlink('results.yml', os.path.join(data, 'latest.yml'))
+    return data, os.path.join(tmpdir.strpath, '.results')
+
+
+def link_error(*args):
+    raise OSError(errno.EXDEV, 'Invalid cross-device link')
+
+
+class TestResultsArchiver(object):
+
+    @staticmethod
+    def test_archive_links_files(run_folders):
+        data, results = run_folders
+        archiver = ResultsArchiver()
+        archiver.archive(data, results)
+        assert sorted(os.listdir(results)) == ['latest.yml', 'logs', 'results.yml']
+        assert os.path.samefile(os.path.join(data, 'logs', 'ansible', 'ansible.log'),
+                                os.path.join(results, 'logs', 'ansible', 'ansible.log'))
+        assert os.readlink(os.path.join(results, 'latest.yml')) == 'results.yml'
+        assert archiver.stats['linked']['files'] == 3
+        assert archiver.saved() == (len('name: scenario\n') + len('log\n') + len('ansible\n'), None)
+
+    @staticmethod
+    def test_archive_skips_unchanged_files(run_folders):
+        data, results = run_folders
+        archiver = ResultsArchiver()
+        archiver.archive(data, results)
+        os.remove(os.path.join(data, 'results.yml'))
+        write(os.path.join(data, 'results.yml'), 'name: updated\n')
+        archiver = ResultsArchiver()
+        archiver.archive(data, results)
+        assert archiver.stats['skipped']['files'] == 2
+        assert archiver.stats['linked']['files'] == 1
+        assert read(os.path.join(results, 'results.yml')) == 'name: updated\n'
+
+        write(os.path.join(data, 'logs', 'carbon_scenario.log'), 'log\nmore\n')
+        assert read(os.path.join(results, 'logs', 'carbon_scenario.log')) == 'log\nmore\n'
+
+    @staticmethod
+    def test_archive_keeps_previous_run_files(run_folders, tmpdir):
+        data, results = run_folders
+        ResultsArchiver().archive(data, results)
+        next_data = os.path.join(tmpdir.strpath, 'next_run')
+        write(os.path.join(next_data, 'results.yml'), 'name: next\n')
+        archiver = ResultsArchiver()
+        archiver.archive(next_data, results)
+        assert archiver.stats['linked']['files'] == 1
+        assert read(os.path.join(results, 'results.yml')) == 'name: next\n'
+        assert read(os.path.join(data, 'results.yml')) == 'name: scenario\n'
+
+    @staticmethod
+    def test_archive_copies_across_filesystems(run_folders):
+        data, results = run_folders
+        archiver = ResultsArchiver(workers=2)
+        with mock.patch('os.link', side_effect=link_error):
+            archiver.archive(data, results)
+        assert archiver.stats['copied']['files'] == 4
+        assert archiver.stats['cloned']['files'] == 0
+        assert not os.path.samefile(os.path.join(data, 'results.yml'), os.path.join(results, 'results.yml'))
+        assert read(os.path.join(results, 'logs', 'ansible', 'ansible.log')) == 'ansible\n'
+        assert [name for name in os.listdir(results) if name.endswith('.archive')] == []
+
+        archiver = ResultsArchiver()
+        with mock.patch('os.link', side_effect=link_error):
+            archiver.archive(data, results)
+        assert archiver.stats['skipped']['files'] == 3
@@ -27,6 +27,7 @@
 
 import mock
 import pytest
+from collections import OrderedDict
 
 from carbon.resources import Asset
 from carbon.core import ProvisionerPlugin
@@ -110,7 +111,7 @@ class TestAssetProvisioner(object):
         plugin.create.assert_called()
 
     @staticmethod
-    @mock.patch('copy.deepcopy')
+    @mock.patch('carbon.provisioners.asset_provisioner.copy_data')
     def test_asset_provisioner_create_multi_resources(mock_copy, plugin, host_provisioner, default_profile_params):
         mock_copy.return_value = default_profile_params
         res1=dict(tx_id=1, name='dummy_0', ip='2.4.6.8', id='222')
@@ -121,7 +122,7 @@ class TestAssetProvisioner(object):
         plugin.create.assert_called()
 
     @staticmethod
-    @mock.patch('copy.deepcopy')
+    @mock.patch('carbon.provisioners.asset_provisioner.copy_data')
     def test_asset_provisioner_create_multi_resources_no_provider(mock_copy, plugin, host_provisioner,
                                                                   default_no_provider_profile_params):
         mock_copy.return_value = default_no_provider_profile_params
@@ -133,7 +134,7 @@ class TestAssetProvisioner(object):
         plugin.create.assert_called()
 
     @staticmethod
-    @mock.patch('copy.deepcopy')
+    @mock.patch('carbon.provisioners.asset_provisioner.copy_data')
     def test_asset_provisioner_create_single_resource(mock_copy, plugin, host_provisioner, default_profile_params):
         mock_copy.return_value = default_profile_params
         res1=dict(tx_id=1, hostname='dummy_0', ip='2.4.6.8', asset_id='222')
@@ -143,7 +144,7 @@ class TestAssetProvisioner(object):
         plugin.create.assert_called()
 
     @staticmethod
-    @mock.patch('copy.deepcopy')
+    @mock.patch('carbon.provisioners.asset_provisioner.copy_data')
     def test_asset_provisioner_create_single_resource_no_provider(mock_copy, plugin, host_provisioner,
                                                                   default_no_provider_profile_params):
         mock_copy.return_value = default_no_provider_profile_params
@@ -153,6 +154,21 @@ class TestAssetProvisioner(object):
         host_provisioner.create()
         plugin.create.assert_called()
 
+    @staticmethod
+    def test_asset_provisioner_create_multi_resources_copies(plugin, host_provisioner):
+        profile = OrderedDict([('name', 'dummy'), ('provider', OrderedDict(name='openstack'))])
+        plugin.asset.profile = mock.MagicMock(return_value=profile)
+        res1 = dict(name='dummy_0', ip='2.4.6.8', id='222')
+        res2 = dict(name='dummy_1', ip='1.3.5.7', id='223')
+        plugin.create = mock.MagicMock(return_value=[res1, res2])
+        host_provisioner.plugin = plugin
+        profiles = host_provisioner.create()
+        plugin.asset.profile.assert_called_once_with()
+        assert [item['name'] for item in profiles] == ['dummy_0', 'dummy_1']
+        assert [item['provider']['id'] for item in profiles] == ['222', '223']
+        assert all(isinstance(item['provider'], OrderedDict) for item in profiles)
+        assert profile == OrderedDict([('name', 'dummy'), ('provider', OrderedDict(name='openstack'))])
+
     @staticmethod
     def test_asset_provisioner_delete(plugin, host_provisioner):
         host_provisioner.plugin = plugin
@@ -34,8 +34,9 @@ import yaml
 
 from carbon import Carbon
 from carbon.constants import RESULTS_FILE
-from carbon.exceptions import CarbonError
-from carbon.helpers import template_render
+from carbon.exceptions import CarbonError, CarbonSchedulerError
+from carbon.helpers import template_render, validate_render_scenario
+from carbon.utils.profiler import profiler
 
 
 class TestCarbon(object):
@@ -98,7 +99,7 @@ class TestCarbon(object):
         assert (os.path.exists(os.path.join(carbon.config['RESULTS_FOLDER'], 'artifacts')))
 
     @staticmethod
-    @mock.patch.object(yaml, 'safe_load')
+    @mock.patch('carbon.helpers.load_yaml')
     def test_carbon_load_from_yaml_01(mock_method):
         mock_method.return_value = {}
         carbon = Carbon(data_folder='/tmp')
@@ -135,6 +136,109 @@ class TestCarbon(object):
         carbon.load_from_yaml(data)
         assert carbon.scenario.child_scenarios
 
+    @staticmethod
+    def test_carbon_load_from_yaml_keeps_data():
+        data = validate_render_scenario('../assets/no_include.yml')
+        carbon = Carbon(data_folder='/tmp')
+        carbon.load_from_yaml(data)
+        assert carbon.scenario.yaml_data.data['provision'] == yaml.safe_load(data[0])['provision']
+
+    @staticmethod
+    def test_group_tasklist_stage_scheduler():
+        carbon = Carbon(data_folder='/tmp')
+        carbon.config['SCHEDULER'] = 'stage'
+        assert carbon._group_tasklist(['validate', 'provision', 'orchestrate']) == \
+            [['validate'], ['provision'], ['orchestrate']]
+
+    @staticmethod
+    def test_group_tasklist_dag_scheduler():
+        carbon = Carbon(data_folder='/tmp')
+        carbon.config['SCHEDULER'] = 'dag'
+        assert carbon._group_tasklist(['validate', 'provision', 'orchestrate', 'execute', 'report']) == \
+            [['validate'], ['provision', 'orchestrate', 'execute'], ['report']]
+        carbon.config['SCHEDULER'] = 'stage'
+
+    @staticmethod
+    def test_group_tasklist_dag_scheduler_engines():
+        carbon = Carbon(data_folder='/tmp')
+        carbon.config['SCHEDULER'] = 'dag'
+        carbon.config['TASK_CONCURRENCY']['EXECUTE_ENGINE'] = 'thread'
+        assert carbon._group_tasklist(['provision', 'orchestrate', 'execute']) == \
+            [['provision', 'orchestrate'], ['execute']]
+        carbon.config['TASK_CONCURRENCY'].pop('EXECUTE_ENGINE')
+        carbon.config['SCHEDULER'] = 'stage'
+
+    @staticmethod
+    def test_run_records_tasks_stopped_by_dag_failure():
+        carbon = Carbon(data_folder='/tmp')
+        carbon.scenario = mock.MagicMock(child_scenarios=[], name='scenario')
+        error = CarbonSchedulerError('failed', task='orchestrate', results=[], stage_results={})
+        with mock.patch.object(carbon, '_group_tasklist', return_value=[['provision', 'orchestrate', 'execute']]), \
+                mock.patch.object(carbon, '_run_dag', side_effect=error), \
+                mock.patch.object(carbon, '_print_footer') as footer, \
+                mock.patch.object(carbon, '_write_out_results'), mock.patch.object(carbon, '_archive_results'), \
+                mock.patch.object(carbon, 'notify'), mock.patch.object(carbon, '_reload_resources'):
+            with pytest.raises(SystemExit):
+                carbon.run(tasklist=['provision', 'orchestrate', 'execute'])
+        assert footer.call_args[0] == (['provision'], ['orchestrate', 'execute'], 'FAILED')
+
+    @staticmethod
+    def test_run_error_without_results():
+        carbon = Carbon(data_folder='/tmp')
+        carbon.scenario = mock.MagicMock(child_scenarios=[], name='scenario')
+        with mock.patch.object(carbon, '_group_tasklist', return_value=[['provision']]), \
+                mock.patch.object(carbon, '_run_pipeline', side_effect=CarbonError('failed')), \
+                mock.patch.object(carbon, '_print_footer') as footer, \
+                mock.patch.object(carbon, '_write_out_results') as write_out, \
+                mock.patch.object(carbon, '_archive_results'), mock.patch.object(carbon, 'notify'), \
+                mock.patch.object(carbon, '_reload_resources') as reload_resources:
+            with pytest.raises(SystemExit):
+                carbon.run(tasklist=['provision'])
+        reload_resources.assert_called_with([])
+        write_out.assert_called()
+        assert footer.call_args[0] == ([], ['provision'], 'FAILED')
+
+    @staticmethod
+    def test_get_engine_shared_between_tasks():
+        carbon = Carbon(data_folder='/tmp')
+        assert carbon._get_engine('provision') is carbon._get_engine('orchestrate')
+
+    @staticmethod
+    def test_reload_resources_skipped_for_in_process_results():
+        carbon = Carbon(data_folder='/tmp')
+        carbon.scenario = mock.MagicMock(child_scenarios=[])
+        carbon._reload_resources([dict(in_process=True, methods=[dict(name='run', status=0, rvalue=None)])])
+        carbon.scenario.reload_resources.assert_not_called()
+        carbon._reload_resources([dict(in_process=True, methods=[dict(name='run', status=0, rvalue=[{}])])])
+        carbon.scenario.reload_resources.assert_called_once()
+
+    @staticmethod
+    def test_resume_reuses_data_folder():
+        carbon = Carbon(data_folder='/tmp')
+        open(os.path.join(carbon.data_folder, 'journal.jsonl'), 'a').close()
+        resumed = Carbon(data_folder='/tmp', resume=carbon.data_folder)
+        assert resumed.uid == carbon.uid
+        assert resumed.data_folder == carbon.data_folder
+        assert resumed.carbon_options['resume'] == carbon.data_folder
+        assert resumed._get_engine('provision').journal is resumed.journal
+
+    @staticmethod
+    def test_profile_reports_hotspots():
+        carbon = Carbon(data_folder='/tmp', profile=True)
+        assert carbon.carbon_options['profile'] is True
+        assert profiler.enabled
+        carbon._export_profile()
+        assert not profiler.enabled
+        with open(os.path.join(carbon.data_folder, 'profile', 'hotspots.txt')) as f:
+            assert f.readline() == 'Profiles merged: 1\n'
+
+    @staticmethod
+    def test_resume_without_journal():
+        carbon = Carbon(data_folder='/tmp')
+        with pytest.raises(CarbonError) as ex:
+            Carbon(data_folder='/tmp', resume=carbon.data_folder)
+        assert 'does not contain a run journal' in ex.value.args[0]
+
     @staticmethod
     def test_name_property_01():
         carbon = Carbon(data_folder='/tmp')
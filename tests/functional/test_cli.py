@@ -27,14 +27,35 @@
 
 import mock
 import pytest
+import subprocess
+import sys
 import yaml
 import json
 from carbon import Carbon
 from carbon.cli import print_header, carbon
+from carbon.utils.profiler import profiler
 from click.testing import CliRunner
 from carbon.exceptions import CarbonError
 
 
+# modules taking the most time to import, only imported on the code paths using them
+HEAVY_MODULES = ['ansible.constants', 'ansible.inventory.manager', 'ansible.parsing.vault', 'paramiko', 'libcloud',
+                 'cachetclient.cachet', 'pykwalify.core', 'requests', 'jinja2']
+
+
+def import_times(statement):
+    """Return the cumulative import time in microseconds of each module imported by the statement."""
+    output = subprocess.check_output([sys.executable, '-X', 'importtime', '-c', statement],
+                                     stderr=subprocess.STDOUT, universal_newlines=True)
+    times = dict()
+    for line in output.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, module = line.split('|')
+            if cumulative.strip().isdigit():
+                times[module.strip()] = int(cumulative)
+    return times
+
+
 @pytest.fixture(scope='class')
 def runner():
     return CliRunner()
@@ -45,6 +66,18 @@ class TestCli(object):
     def test_print_header():
         assert print_header() is None
 
+    @staticmethod
+    def test_cli_import_time():
+        times = import_times('import carbon.cli')
+        assert [module for module in HEAVY_MODULES + ['carbon.carbon'] if module in times] == [], \
+            'carbon.cli imported in %.3fs' % (times['carbon.cli'] / 1e6)
+
+    @staticmethod
+    def test_carbon_import_time():
+        times = import_times('from carbon import Carbon')
+        assert [module for module in HEAVY_MODULES if module in times] == [], \
+            'carbon.carbon imported in %.3fs' % (times['carbon.carbon'] / 1e6)
+
     @staticmethod
     def test_carbon_create(runner):
         results = runner.invoke(carbon, ['-v', 'create'])
@@ -90,7 +123,7 @@ class TestCli(object):
         assert results.exit_code == 0
 
     @staticmethod
-    @mock.patch.object(yaml, 'safe_load')
+    @mock.patch('carbon.helpers.load_yaml')
     def test_invalid_run_malformed_input(mock_method, runner):
         mock_method.side_effect = yaml.YAMLError('error')
         results = runner.invoke(
@@ -99,7 +132,7 @@ class TestCli(object):
         assert 'Error loading updated scenario data!' in results.output
 
     @staticmethod
-    @mock.patch.object(yaml, 'safe_load')
+    @mock.patch('carbon.helpers.load_yaml')
     def test_invalid_run_malformed_include(mock_method, runner):
         mock_method.side_effect = CarbonError('Error loading updated included scenario data!')
         results = runner.invoke(
@@ -181,6 +214,19 @@ class TestCli(object):
         )
         assert results.exit_code == 0
 
+    @staticmethod
+    @mock.patch.object(Carbon, 'run')
+    def test_run_profile(mock_method, runner):
+        """This is for testing use of profile option with carbon run"""
+        mock_method.return_value = 0
+        try:
+            results = runner.invoke(
+                carbon, ['run', '-s', '../assets/descriptor.yml', '-d', '/tmp', '--profile']
+            )
+        finally:
+            profiler.stop()
+        assert results.exit_code == 0
+
     @staticmethod
     @mock.patch.object(Carbon, 'run')
     def test_run_no_notify(mock_method, runner):
@@ -54,3 +54,9 @@ class TestConfig(object):
     def test_load_config_by_env_var(config):
         os.environ['CARBON_SETTINGS'] = '../assets/carbon.cfg'
         config.load()
+
+    @staticmethod
+    def test_load_provider_concurrency(config):
+        os.environ['CARBON_SETTINGS'] = '../assets/carbon.cfg'
+        config.load()
+        assert config['PROVIDER_CONCURRENCY'] == {'OPENSTACK': '10'}
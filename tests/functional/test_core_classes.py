@@ -31,6 +31,7 @@ import time
 import types
 import os
 import glob
+from logging import getLogger
 
 import mock
 import pytest
@@ -336,6 +337,14 @@ class TestLoggerMixin(object):
         logger_mixin.create_logger(name=__name__, config=config)
         assert logger_mixin.logger.name == __name__
 
+    @staticmethod
+    def test_logger_named_after_calling_module(logger_mixin):
+        namespace = {'__name__': 'carbon.provisioners.fake'}
+        exec('def get_logger(obj):\n    return obj.logger\n', namespace)
+        assert namespace['get_logger'](logger_mixin).name == 'carbon.provisioners.fake'
+        assert logger_mixin.logger is getLogger(__name__)
+        assert namespace['get_logger'](logger_mixin) is getLogger('carbon.provisioners.fake')
+
     @staticmethod
     def test_create_logger_dir(logger_mixin, config):
         logger_mixin.logger.handlers = []
@@ -745,6 +754,13 @@ class TestInventory(object):
             inventory.create_master(all_hosts=[inv_host])
         cleanup_master
 
+    @staticmethod
+    def test_create_master_inv_rebuild(inventory, inv_host):
+        inventory.create_master(all_hosts=[inv_host])
+        inventory.create_master(all_hosts=[inv_host], rebuild=True)
+        assert os.listdir('/tmp/.results/inventory') == ['master-xyz']
+        inventory.delete_master()
+
     @staticmethod
     def test_create_master_inv_warn(inventory):
         inventory.delete_master()
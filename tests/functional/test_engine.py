@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    tests.test_engine
+
+    Unit tests for testing carbons execution engines.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import threading
+import time
+
+import pytest
+from carbon.exceptions import CarbonError, CarbonSchedulerError
+from carbon.resources.assets import Asset
+from carbon.utils.engine import EngineFactory, BlasterEngine, PoolEngine, ThreadEngine, run_task
+
+
+class FakeTask(object):
+    def __init__(self, name=None, **kwargs):
+        self.name = name
+
+    def run(self):
+        if self.name.startswith('fail'):
+            raise RuntimeError('failed')
+        if self.name.startswith('slow'):
+            time.sleep(2)
+        return self.name
+
+
+class BrokenTask(FakeTask):
+    def __init__(self, name=None, **kwargs):
+        raise RuntimeError('broken task')
+
+
+class FakeResource(object):
+    def __init__(self, name):
+        self.name = name
+        self.status = None
+
+
+class UpdateTask(FakeTask):
+    def __init__(self, name=None, package=None, **kwargs):
+        super(UpdateTask, self).__init__(name)
+        self.package = package
+
+    def run(self):
+        self.package.status = 0
+
+
+class FakeAsset(object):
+    def __init__(self, name, provider):
+        self.name = name
+        self.provider = provider
+
+
+class CountTask(FakeTask):
+    """Task keeping track of the number of tasks running at the same time."""
+
+    lock = threading.Lock()
+    running = 0
+    most = 0
+
+    def run(self):
+        with CountTask.lock:
+            CountTask.running += 1
+            CountTask.most = max(CountTask.most, CountTask.running)
+        time.sleep(0.1)
+        with CountTask.lock:
+            CountTask.running -= 1
+
+
+def fake_tasks(*names):
+    return [{'task': FakeTask, 'name': name, 'methods': ['run']} for name in names]
+
+
+@pytest.fixture
+def pool_engine():
+    engine = PoolEngine(max_workers=2)
+    yield engine
+    engine.shutdown()
+
+
+@pytest.fixture
+def thread_engine():
+    engine = ThreadEngine(max_workers=2)
+    yield engine
+    engine.shutdown()
+
+
+class TestEngine(object):
+
+    @staticmethod
+    def test_run_task_success():
+        result = run_task({'task': FakeTask, 'name': 'task', 'methods': ['run']})
+        assert result['status'] == 0
+        assert result['methods'] == [dict(name='run', status=0, rvalue='task')]
+        assert result['duration'] >= 0
+
+    @staticmethod
+    def test_run_task_failure():
+        result = run_task({'task': FakeTask, 'name': 'fail', 'methods': ['run', 'other']})
+        assert result['status'] == 1
+        assert result['methods'][0]['status'] == 1
+        assert result['methods'][1]['status'] == 'n/a'
+
+    @staticmethod
+    def test_engine_factory_default():
+        assert isinstance(EngineFactory.get_engine({}), BlasterEngine)
+
+    @staticmethod
+    def test_engine_factory_pool():
+        assert isinstance(EngineFactory.get_engine({'ENGINE': 'Pool'}), PoolEngine)
+
+    @staticmethod
+    def test_engine_factory_task_engine():
+        config = {'ENGINE': 'pool', 'TASK_CONCURRENCY': {'ORCHESTRATE_ENGINE': 'thread'}}
+        assert isinstance(EngineFactory.get_engine(config, 'orchestrate'), ThreadEngine)
+        assert isinstance(EngineFactory.get_engine(config, 'provision'), PoolEngine)
+
+    @staticmethod
+    def test_engine_factory_invalid():
+        with pytest.raises(CarbonError) as ex:
+            EngineFactory.get_engine({'ENGINE': 'invalid'})
+        assert 'Engine invalid is not supported' in ex.value.args[0]
+
+    @staticmethod
+    def test_pool_engine_run(pool_engine):
+        results = pool_engine.run('provision', fake_tasks('a', 'b', 'c'))
+        assert [item['methods'][0]['rvalue'] for item in results] == ['a', 'b', 'c']
+        assert pool_engine.stats['provision']['tasks'] == 3
+        assert pool_engine.stats['provision']['overhead'] >= 0
+        assert dict(pool_engine.stats['provision']['statuses']) == dict(passed=3, failed=0, not_run=0)
+
+    @staticmethod
+    def test_pool_engine_reused_across_pipelines(pool_engine):
+        pool_engine.run('provision', fake_tasks('a'))
+        pool = getattr(pool_engine, '_pool')
+        pool_engine.run('orchestrate', fake_tasks('b'))
+        assert getattr(pool_engine, '_pool') is pool
+        assert list(pool_engine.stats.keys()) == ['provision', 'orchestrate']
+
+    @staticmethod
+    def test_pool_engine_serial_failure(pool_engine):
+        with pytest.raises(CarbonSchedulerError) as ex:
+            pool_engine.run('orchestrate', fake_tasks('a', 'fail', 'c'), serial=True)
+        assert ex.value.task == 'orchestrate'
+        assert [item['status'] for item in ex.value.results] == [0, 1, 'n/a']
+
+    @staticmethod
+    def test_pool_engine_concurrent_failure(pool_engine):
+        with pytest.raises(CarbonSchedulerError) as ex:
+            pool_engine.run('provision', fake_tasks('fail', 'b', 'c'))
+        assert [item['status'] for item in ex.value.results] == [1, 0, 0]
+
+    @staticmethod
+    def test_pool_engine_unpicklable_task(pool_engine):
+        tasks = fake_tasks('a', 'b')
+        tasks[0]['resource'] = threading.Lock()
+        with pytest.raises(CarbonSchedulerError) as ex:
+            pool_engine.run('provision', tasks)
+        assert [item['status'] for item in ex.value.results] == [1, 0]
+        assert 'Traceback' in ex.value.results[0]['methods'][0]['traceback']
+
+    @staticmethod
+    def test_pool_engine_task_error(pool_engine):
+        with pytest.raises(CarbonSchedulerError) as ex:
+            pool_engine.run('provision', [{'task': BrokenTask, 'name': 'a', 'methods': ['run']}])
+        assert ex.value.results[0]['status'] == 1
+        assert 'broken task' in ex.value.results[0]['methods'][0]['traceback']
+
+    @staticmethod
+    def test_thread_engine_task_error(thread_engine):
+        tasks = [{'task': BrokenTask, 'name': 'a', 'methods': ['run']}] + fake_tasks('b')
+        with pytest.raises(CarbonSchedulerError) as ex:
+            thread_engine.run('provision', tasks)
+        assert [item['status'] for item in ex.value.results] == [1, 0]
+        assert 'broken task' in ex.value.results[0]['methods'][0]['traceback']
+
+    @staticmethod
+    def test_thread_engine_updates_resources(thread_engine):
+        resource = FakeResource('action')
+        results = thread_engine.run('orchestrate', [{'task': UpdateTask, 'name': 'a', 'methods': ['run'],
+                                                     'package': resource}])
+        assert resource.status == 0
+        assert results[0]['package'] is resource
+        assert results[0]['in_process']
+
+    @staticmethod
+    def test_thread_engine_serial_failure(thread_engine):
+        with pytest.raises(CarbonSchedulerError) as ex:
+            thread_engine.run('orchestrate', fake_tasks('a', 'fail', 'c'), serial=True)
+        assert [item['status'] for item in ex.value.results] == [0, 1, 'n/a']
+
+    @staticmethod
+    def test_thread_engine_timeout(thread_engine):
+        tasks = fake_tasks('slow', 'b')
+        tasks[0]['timeout'] = 1
+        with pytest.raises(CarbonSchedulerError) as ex:
+            thread_engine.run('execute', tasks)
+        assert [item['status'] for item in ex.value.results] == [1, 0]
+        assert 'reached timeout' in ex.value.results[0]['methods'][0]['traceback']
+
+    @staticmethod
+    def test_engine_factory_workers():
+        config = {'ENGINE': 'thread', 'TASK_CONCURRENCY': {'PROVISION': '25', 'EXECUTE': 'True'}}
+        assert EngineFactory.get_engine(config).max_workers == 25
+
+    @staticmethod
+    def test_engine_invalid_provider_concurrency():
+        with pytest.raises(CarbonError) as ex:
+            ThreadEngine({'PROVIDER_CONCURRENCY': {'OPENSTACK': '0'}})
+        assert 'Provider concurrency of openstack must be' in ex.value.args[0]
+
+    @staticmethod
+    def test_engine_get_provider():
+        assert ThreadEngine.get_provider({'asset': FakeAsset('host', 'OpenStack')}) == 'openstack'
+        assert ThreadEngine.get_provider({'package': FakeAsset('action', None)}) is None
+        assert ThreadEngine.get_provider({'asset': FakeAsset('host', dict(name='Beaker', whiteboard='w'))}) == 'beaker'
+
+    @staticmethod
+    def test_engine_get_provider_of_provisioner(config):
+        host = Asset(name='host01', config=config, parameters=dict(
+            groups=['client'], provisioner='beaker-client', credential='beaker', bkr_data=dict(jobs=[])))
+        assert ThreadEngine.get_provider({'asset': host}) == 'beaker'
+        host = Asset(name='host02', config=config, parameters=dict(
+            groups=['client'], provisioner='openstack-libcloud', credential='openstack', image='image',
+            flavor='small', networks=['network']))
+        assert ThreadEngine.get_provider({'asset': host}) == 'openstack'
+
+    @staticmethod
+    def test_engine_get_provider_of_provider_block(config):
+        host = Asset(name='host01', config=config, parameters=dict(
+            groups=['client'], provider=dict(name='openstack', credential='openstack', image='image',
+                                             flavor='small', networks=['network'])))
+        assert ThreadEngine.get_provider({'asset': host}) == 'openstack'
+
+    @staticmethod
+    def test_engine_workers_limit(thread_engine):
+        CountTask.most = 0
+        thread_engine.run('execute', [{'task': CountTask, 'name': str(i), 'methods': ['run']} for i in range(6)],
+                          workers=2)
+        assert CountTask.most == 2
+
+    @staticmethod
+    def test_engine_provider_limit():
+        engine = ThreadEngine({'PROVIDER_CONCURRENCY': {'OPENSTACK': '1'}}, max_workers=4)
+        tasks = [{'task': CountTask, 'name': str(i), 'methods': ['run'], 'asset': FakeAsset(str(i), 'openstack')}
+                 for i in range(3)]
+        tasks.append({'task': CountTask, 'name': '3', 'methods': ['run'], 'asset': FakeAsset('3', 'beaker')})
+        CountTask.most = 0
+        results = engine.run('provision', tasks)
+        engine.shutdown()
+        assert CountTask.most == 2
+        assert [item['status'] for item in results] == [0, 0, 0, 0]
+
+    @staticmethod
+    def test_blaster_engine_workers_limit():
+        engine = BlasterEngine(max_workers=10)
+        results = engine.run('provision', fake_tasks('a', 'b', 'c'), workers=2)
+        assert [item['methods'][0]['rvalue'] for item in results] == ['a', 'b', 'c']
+        assert engine.stats['provision']['overhead'] is not None
@@ -28,6 +28,7 @@
 import pytest
 import os
 import mock
+from collections import OrderedDict
 from carbon import Carbon
 from carbon.core import ImporterPlugin
 from carbon.constants import TASKLIST
@@ -41,7 +42,13 @@ from carbon.provisioners.ext import BeakerClientProvisionerPlugin
 from carbon.helpers import DataInjector, validate_render_scenario, set_task_class_concurrency, \
     mask_credentials_password, sort_tasklist, find_artifacts_on_disk, \
     get_default_provisioner_plugin, get_ans_verbosity, schema_validator, filter_resources_labels,\
-    create_individual_testrun_results, create_aggregate_testrun_results
+    create_individual_testrun_results, create_aggregate_testrun_results, get_task_concurrency, HostResolver, \
+    fetch_assets, fetch_executes, PluginRegistry, get_core_tasks_classes, is_core_task_class, \
+    clear_core_tasks_cache, ScenarioStream, load_scenario_stream, copy_data, get_schema_validator, \
+    schema_validator_batch, load_schema_file, clear_schemas_cache, template_render, get_template_environment
+from carbon.tasks import ProvisionTask, ValidateTask
+from pykwalify.core import Core
+from pykwalify.errors import SchemaError
 
 
 @pytest.fixture(scope='class')
@@ -261,6 +268,54 @@ def test_validate_render_scenario_correct_include():
     assert len(result) == 2
 
 
+def test_validate_render_scenario_parsed_once():
+    result = validate_render_scenario('../assets/correct_include_descriptor.yml')
+    assert all(isinstance(stream, ScenarioStream) for stream in result)
+    assert result[0].data['include'] and 'name' in result[1].data
+
+
+def test_scenario_stream_pickle():
+    import pickle
+    stream = pickle.loads(pickle.dumps(ScenarioStream('name: test\nprovision: []\n')))
+    assert stream == 'name: test\nprovision: []\n'
+    assert stream.data == dict(name='test', provision=[])
+
+
+def test_load_scenario_stream():
+    assert load_scenario_stream(ScenarioStream('name: test', data=dict(name='parsed'))) == dict(name='parsed')
+    assert load_scenario_stream('name: test') == dict(name='test')
+
+
+def test_copy_data():
+    data = dict(provision=[dict(name='host', provider=dict(credential='openstack'))])
+    copy = copy_data(data)
+    copy['provision'][0].pop('provider').pop('credential')
+    assert copy == dict(provision=[dict(name='host')])
+    assert data == dict(provision=[dict(name='host', provider=dict(credential='openstack'))])
+
+
+def test_copy_data_ordered():
+    data = OrderedDict([('name', 'host'), ('provider', OrderedDict([('name', 'openstack'), ('id', '222')]))])
+    copy = copy_data(data)
+    copy['provider']['id'] = '223'
+    assert isinstance(copy, OrderedDict) and isinstance(copy['provider'], OrderedDict)
+    assert list(copy['provider']) == ['name', 'id']
+    assert data['provider']['id'] == '222'
+
+
+def test_template_environment_cached(tmpdir):
+    path = os.path.abspath('../assets')
+    assert get_template_environment(path) is get_template_environment(path)
+    assert get_template_environment(path) is not get_template_environment(path, tmpdir.strpath)
+
+
+def test_template_render_bytecode_cache(tmpdir):
+    bytecode_folder = os.path.join(tmpdir.strpath, 'templates')
+    stream = template_render(os.path.abspath('../assets/no_include.yml'), os.environ, bytecode_folder)
+    assert stream == template_render(os.path.abspath('../assets/no_include.yml'), os.environ)
+    assert [name for name in os.listdir(bytecode_folder) if name.endswith('.cache')]
+
+
 def test_validate_render_scenario_wrong_include():
     with pytest.raises(HelpersError) as e:
         validate_render_scenario('../assets/wrong_include_descriptor.yml')
@@ -295,6 +350,28 @@ def test_set_task_concurrency_report_is_true(task_report):
             assert set_task_class_concurrency(task, task_report)['task'].__concurrent__ is True
 
 
+def test_set_task_concurrency_limit(task_host):
+    task_host.config['TASK_CONCURRENCY']['PROVISION'] = '4'
+    for task in task_host.get_tasks():
+        if task['task'].__task_name__ == 'provision':
+            task = set_task_class_concurrency(task, task_host)
+            assert task['task'].__concurrent__ is True
+            assert task['task'].__concurrency__ == 4
+    task_host.config['TASK_CONCURRENCY']['PROVISION'] = 'True'
+
+
+@pytest.mark.parametrize('value, limit', [('True', 10), ('false', 1), ('1', 1), ('25', 25)])
+def test_get_task_concurrency(value, limit):
+    assert get_task_concurrency(dict(TASK_CONCURRENCY=dict(PROVISION=value)), 'provision') == limit
+
+
+@pytest.mark.parametrize('value', ['0', 'many'])
+def test_get_task_concurrency_invalid(value):
+    with pytest.raises(CarbonError) as ex:
+        get_task_concurrency(dict(TASK_CONCURRENCY=dict(PROVISION=value)), 'provision')
+    assert 'Task concurrency of provision must be' in ex.value.args[0]
+
+
 def test_mask_credentials_password_param(os_creds):
     key_len = len(os_creds.get('password'))
     creds = mask_credentials_password(os_creds)
@@ -421,6 +498,85 @@ def test_get_default_provisioner_plugin_method(mock_method):
     assert get_default_provisioner_plugin() == BeakerClientProvisionerPlugin
 
 
+class FakeEntryPoint(object):
+    def __init__(self, name, plugin):
+        self.name = name
+        self.plugin = plugin
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return self.plugin
+
+
+class FakeNotifier(object):
+    __plugin_name__ = 'email-notifier'
+
+
+class FakeWebhook(object):
+    __plugin_name__ = 'webhook-notifier'
+
+
+class FakeStubNotifier(object):
+    __plugin_name__ = 'stub-notifier'
+
+
+@pytest.fixture
+def plugin_entry_points():
+    return {'notification_plugins': [FakeEntryPoint('email', FakeNotifier), FakeEntryPoint('webhook', FakeWebhook)],
+            'executor_plugins': [FakeEntryPoint('runner', BeakerClientProvisionerPlugin)]}
+
+
+@mock.patch('carbon.helpers.group_entry_points')
+def test_plugin_registry_scans_entry_points_once(mock_scan, plugin_entry_points):
+    mock_scan.return_value = plugin_entry_points
+    registry = PluginRegistry()
+    assert list(registry.classes('notification_plugins').values()) == [FakeNotifier, FakeWebhook]
+    assert registry.classes('provider_plugins') == {}
+    registry.classes('notification_plugins')
+    assert mock_scan.call_count == 1
+    assert [entry_point.loads for entry_point in plugin_entry_points['notification_plugins']] == [1, 1]
+    assert plugin_entry_points['executor_plugins'][0].loads == 0
+
+
+@mock.patch('carbon.helpers.group_entry_points')
+def test_plugin_registry_find(mock_scan, plugin_entry_points):
+    mock_scan.return_value = plugin_entry_points
+    registry = PluginRegistry()
+    assert registry.find('notification_plugins', 'webhook-notifier') is FakeWebhook
+    assert registry.find('notification_plugins', 'webhook') is None
+    assert registry.find('notification_plugins', 'webhook', prefix=True) is FakeWebhook
+    assert registry.find('notification_plugins', '', prefix=True) is FakeNotifier
+    plugin_entry_points['notification_plugins'].reverse()
+    assert registry.find('notification_plugins', '', prefix=True) is FakeNotifier
+    registry.clear()
+    assert registry.find('notification_plugins', '', prefix=True) is FakeWebhook
+    assert mock_scan.call_count == 2
+
+
+@mock.patch('carbon.helpers.group_entry_points')
+def test_plugin_registry_register(mock_scan, plugin_entry_points):
+    mock_scan.return_value = plugin_entry_points
+    registry = PluginRegistry()
+    assert registry.find('notification_plugins', 'stub', prefix=True) is None
+    registry.register('notification_plugins', 'stub', FakeStubNotifier)
+    assert list(registry.classes('notification_plugins').values()) == [FakeNotifier, FakeWebhook, FakeStubNotifier]
+    assert registry.find('notification_plugins', 'stub', prefix=True) is FakeStubNotifier
+
+
+def test_core_tasks_classes_found_once():
+    clear_core_tasks_cache()
+    with mock.patch('carbon.helpers._find_core_tasks_classes', return_value=[ProvisionTask]) as mock_find:
+        assert get_core_tasks_classes() == [ProvisionTask]
+        assert is_core_task_class(ProvisionTask)
+        assert not is_core_task_class(ValidateTask)
+        assert mock_find.call_count == 1
+        clear_core_tasks_cache()
+    assert ValidateTask in get_core_tasks_classes()
+    assert is_core_task_class(ValidateTask)
+    assert not is_core_task_class(Asset)
+
+
 def test_ansible_verbosity_1(config):
     """This test verifies the ansible verbosity set using carbon.cfg is valid. For this test
     carbon.cfg under ../assets/carbon.cfg is used and has ansible_verbosity set as 'v'"""
@@ -476,6 +632,77 @@ def test_schema_validator_failure():
         schema_validator(schema_data=params, schema_files=[os.path.abspath('../assets/schemas/schema_test.yml')])
 
 
+def test_schema_validator_loaded_once():
+    clear_schemas_cache()
+    schema_file = os.path.abspath('../assets/schemas/schema_test.yml')
+    with mock.patch('pykwalify.core.Core.__init__', autospec=True, side_effect=Core.__init__) as mock_init:
+        schema_validator(schema_data=dict(key1='val1'), schema_files=[schema_file])
+        schema_validator(schema_data=dict(key1='val2'), schema_files=[schema_file])
+    assert mock_init.call_count == 1
+    assert get_schema_validator([schema_file]) is get_schema_validator([schema_file])
+
+
+def test_schema_validator_failure_message():
+    with pytest.raises(SchemaError) as ex:
+        schema_validator(schema_data=dict(key1=1), schema_files=[os.path.abspath('../assets/schemas/schema_test.yml')])
+    assert ex.value.msg.startswith('Schema validation failed:\n - ') and '/key1' in ex.value.msg
+
+
+def test_schema_validator_batch():
+    schema_file = os.path.abspath('../assets/schemas/schema_test.yml')
+    schema_validator_batch([dict(name='res1', key1='val1'), dict(name='res2', key2=['val2'])], [schema_file])
+    with pytest.raises(SchemaError) as ex:
+        schema_validator_batch([dict(name='res1', key1=1), dict(name='res2', key1='val1'), dict(key1=2)],
+                               [schema_file])
+    assert 'res1: ' in ex.value.msg and 'res2: ' not in ex.value.msg and '2: ' in ex.value.msg
+
+
+def test_schema_validator_batch_errors():
+    schema_file = os.path.abspath('../assets/schemas/schema_test.yml')
+    errors = schema_validator_batch([dict(key1=1), dict(key1='val1')], [schema_file], raise_on_failure=False)
+    assert len(errors[0]) == 1 and '/key1' in errors[0][0] and errors[1] == []
+
+
+def test_schema_validator_without_pykwalify_internals():
+    schema_file = os.path.abspath('../assets/schemas/schema_test.yml')
+    clear_schemas_cache()
+    with mock.patch('pykwalify.partial_schemas', new=None):
+        errors = schema_validator_batch([dict(key1=1), dict(key1='val1')], [schema_file], raise_on_failure=False)
+        with pytest.raises(SchemaError):
+            schema_validator(schema_data=dict(key1=1), schema_files=[schema_file])
+    clear_schemas_cache()
+    assert len(errors[0]) == 1 and '/key1' in errors[0][0] and errors[1] == []
+
+
+def test_schema_validator_after_batch():
+    schema_file = os.path.abspath('../assets/schemas/schema_test.yml')
+    clear_schemas_cache()
+    schema_validator_batch([dict(key1='val1')], [schema_file])
+    with mock.patch('carbon.helpers._walk_schema_rules') as mock_walk:
+        schema_validator(schema_data=dict(key1='val1'), schema_files=[schema_file])
+        assert not mock_walk.called
+        with pytest.raises(SchemaError):
+            mock_walk.return_value = ['bad key1']
+            schema_validator(schema_data=dict(key1='val2'), schema_files=[schema_file])
+    clear_schemas_cache()
+
+
+def test_schema_validator_partial_schemas(tmpdir):
+    schema_file = tmpdir.join('schema.yml')
+    schema_file.write('schema;item:\n  type: map\n  mapping:\n    name:\n      type: str\n'
+                      'type: map\nmapping:\n  items:\n    type: seq\n    sequence:\n      - include: item\n')
+    errors = schema_validator_batch([dict(items=[dict(name='a')]), dict(items=[dict(name=1)])],
+                                    [schema_file.strpath], raise_on_failure=False)
+    clear_schemas_cache()
+    assert errors[0] == [] and len(errors[1]) == 1 and '/items/0/name' in errors[1][0]
+
+
+def test_load_schema_file():
+    schema_file = os.path.abspath('../assets/schemas/schema_test.yml')
+    assert load_schema_file(schema_file) is load_schema_file(schema_file)
+    assert 'key1' in load_schema_file(schema_file)['mapping']
+
+
 def test_filter_resources_01(carbon1, asset2, asset3):
     """ this test verifies only resources which match the labels provided are picked"""
     res_list = [asset2, asset3]
@@ -499,6 +726,67 @@ def test_filter_resources_03(asset2, asset3):
     assert asset3 in res
 
 
+class FakeHost(object):
+    def __init__(self, name, role=None, groups=None):
+        self.name = name
+        if role is not None:
+            self.role = role
+        if groups is not None:
+            self.groups = groups
+
+
+class FakePackage(object):
+    def __init__(self, name, hosts=None, executes=None):
+        self.name = name
+        self.hosts = hosts
+        self.executes = executes
+
+
+@pytest.fixture
+def resolver_hosts():
+    return [FakeHost('controller', role=['server', 'admin']), FakeHost('client_01', groups=['client']),
+            FakeHost('client_02', groups=['client', 'db']), FakeHost('db', role=['db', 'client']),
+            FakeHost('localhost')]
+
+
+@pytest.mark.parametrize('names, expected', [
+    (['all'], ['controller', 'client_01', 'client_02', 'db', 'localhost']),
+    (['controller'], ['controller']),
+    (['client'], ['client_01', 'client_02', 'db']),
+    (['db'], ['client_02', 'db']),
+    (['server', 'local'], ['controller', 'localhost']),
+    (['db', 'client'], ['client_01', 'client_02', 'db']),
+    (['server', 'admin'], ['controller', 'controller']),
+    (['unknown'], [])
+])
+def test_host_resolver_resolve_names(resolver_hosts, names, expected):
+    assert [host.name for host in HostResolver(resolver_hosts).resolve(names)] == expected
+
+
+def test_host_resolver_resolve_hosts(resolver_hosts):
+    resolver = HostResolver(resolver_hosts)
+    assert [host.name for host in resolver.resolve([FakeHost('client'), FakeHost('db')])] == \
+        ['client_01', 'client_02', 'db']
+
+
+def test_fetch_assets_with_resolver(resolver_hosts):
+    resolver = HostResolver(resolver_hosts)
+    task = fetch_assets(resolver_hosts, dict(package=FakePackage('action', hosts=['server'])), resolver=resolver)
+    assert task['package'].hosts == [resolver_hosts[0]]
+    assert task['package'].all_hosts == resolver_hosts
+    task = fetch_assets(resolver_hosts, dict(package=FakePackage('action', hosts=['unknown'])), all_hosts=False)
+    assert task['package'].hosts == ['unknown']
+    assert task['package'].all_hosts == []
+
+
+def test_fetch_executes_with_resolver(resolver_hosts):
+    executes = [FakePackage('execute_01', hosts=['client_01']), FakePackage('execute_02', hosts=['db'])]
+    task = fetch_executes(executes, resolver_hosts, dict(resource=FakePackage('report', executes=['execute_02'])),
+                          resolver=HostResolver(resolver_hosts))
+    assert task['resource'].executes == [executes[1]]
+    assert [host.name for host in executes[1].hosts] == ['client_02', 'db']
+
+
 @mock.patch('carbon.helpers.search_artifact_location_dict')
 def test_create_individual_testrun_results(mock_method):
     mock_method.return_value = ['../assets/artifacts/host03/sample.xml']
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    tests.test_journal
+
+    Unit tests for testing carbons run journal.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import json
+import multiprocessing
+import os
+import signal
+import time
+
+import mock
+import pytest
+from carbon.exceptions import CarbonError, CarbonSchedulerError
+from carbon.utils.engine import BlasterEngine, ThreadEngine
+from carbon.utils.journal import RunJournal
+
+
+class FakeAsset(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class FakePackage(object):
+    def __init__(self, name):
+        self.name = name
+        self.status = None
+
+
+class ProvisionTask(object):
+    __task_name__ = 'provision'
+    ran = list()
+
+    def __init__(self, name=None, marker=None, **kwargs):
+        self.name = name
+        self.marker = marker
+
+    def run(self):
+        ProvisionTask.ran.append(self.name)
+        if self.name.startswith('fail'):
+            raise RuntimeError('failed')
+        if self.name.startswith('slow'):
+            # wait on the test to create the marker file, once it killed the run
+            timeout = time.time() + 30
+            while not os.path.exists(self.marker) and time.time() < timeout:
+                time.sleep(0.05)
+        return [dict(name='%s_0' % self.name)]
+
+
+class OrchestrateTask(ProvisionTask):
+    __task_name__ = 'orchestrate'
+
+    def __init__(self, name=None, package=None, **kwargs):
+        super(OrchestrateTask, self).__init__(name)
+        self.package = package
+
+    def run(self):
+        self.package.status = 0
+
+
+class ValidateTask(ProvisionTask):
+    __task_name__ = 'validate'
+
+
+def provision_task(name):
+    return {'task': ProvisionTask, 'name': name, 'asset': FakeAsset(name), 'methods': ['run']}
+
+
+def read_records(path, event):
+    with open(path) as f:
+        return [(record['task'], record['name']) for record in map(json.loads, f) if record['event'] == event]
+
+
+def run_journaled_pipeline(path, tasks):
+    engine = BlasterEngine()
+    engine.journal = RunJournal(path, resume=os.path.exists(path))
+    engine.run('provision', tasks)
+
+
+def provision_result(name, status=0):
+    result = provision_task(name)
+    result.update(status=status, methods=[dict(name='run', status=status, rvalue=[dict(name='%s_0' % name)])])
+    return result
+
+
+@pytest.fixture
+def journal(tmpdir):
+    return RunJournal(os.path.join(tmpdir.strpath, 'journal.jsonl'))
+
+
+class TestRunJournal(object):
+
+    @staticmethod
+    def test_get_key():
+        assert RunJournal.get_key(provision_task('host_a')) == ('provision', 'host_a')
+        assert RunJournal.get_key({'task': ValidateTask, 'name': 'host_a', 'asset': FakeAsset('host_a')}) is None
+
+    @staticmethod
+    def test_load_completed_tasks(journal):
+        journal.start(provision_task('host_a'))
+        journal.complete(provision_result('host_a'))
+        journal.start(provision_task('host_b'))
+        journal.start(provision_task('fail_c'))
+        journal.complete(provision_result('fail_c', status=1))
+        resumed = RunJournal(journal.path, resume=True)
+        assert list(resumed.completed.keys()) == [('provision', 'host_a')]
+        assert resumed.completed[('provision', 'host_a')]['methods'][0]['rvalue'] == [dict(name='host_a_0')]
+
+    @staticmethod
+    def test_load_skips_incomplete_record(journal):
+        journal.complete(provision_result('host_a'))
+        with open(journal.path, 'a') as f:
+            f.write('{"event": "complete", "task": "provi')
+        assert list(RunJournal(journal.path, resume=True).completed.keys()) == [('provision', 'host_a')]
+
+    @staticmethod
+    def test_load_missing_journal(journal):
+        with pytest.raises(CarbonError) as ex:
+            RunJournal(journal.path, resume=True)
+        assert 'journal %s does not exist' % journal.path in ex.value.args[0]
+
+    @staticmethod
+    def test_replay_restores_resource_fields(journal):
+        package = FakePackage('action_a')
+        package.status = 0
+        journal.complete({'task': OrchestrateTask, 'name': 'action_a', 'package': package, 'status': 0,
+                          'methods': [dict(name='run', status=0, rvalue=None)]})
+        task = {'task': OrchestrateTask, 'name': 'action_a', 'package': FakePackage('action_a'), 'methods': ['run']}
+        result = RunJournal(journal.path, resume=True).replay(task)
+        assert result['status'] == 0
+        assert result['methods'] == [dict(name='run', status=0, rvalue=None)]
+        assert task['package'].status == 0
+
+    @staticmethod
+    def test_replay_task_not_completed(journal):
+        journal.complete(provision_result('host_a'))
+        assert RunJournal(journal.path, resume=True).replay(provision_task('host_b')) is None
+
+    @staticmethod
+    def test_engine_replays_completed_tasks(journal):
+        journal.complete(provision_result('host_a'))
+        engine = ThreadEngine(max_workers=2)
+        engine.journal = RunJournal(journal.path, resume=True)
+        ProvisionTask.ran = list()
+        results = engine.run('provision', [provision_task('host_a'), provision_task('host_b')])
+        engine.shutdown()
+        assert ProvisionTask.ran == ['host_b']
+        assert [item['methods'][0]['rvalue'][0]['name'] for item in results] == ['host_a_0', 'host_b_0']
+        assert list(RunJournal(journal.path, resume=True).completed.keys()) == [('provision', 'host_a'),
+                                                                                 ('provision', 'host_b')]
+
+    @staticmethod
+    def test_blaster_engine_records_tasks_as_they_complete(journal):
+        engine = BlasterEngine()
+        engine.journal = journal
+        with mock.patch('blaster.Blaster') as blast:
+            with pytest.raises(CarbonSchedulerError):
+                engine.run('provision', [provision_task('host_a'), provision_task('fail_b')])
+        blast.assert_not_called()
+        assert sorted(read_records(journal.path, 'complete')) == [('provision', 'fail_b'), ('provision', 'host_a')]
+        assert list(RunJournal(journal.path, resume=True).completed.keys()) == [('provision', 'host_a')]
+
+    @staticmethod
+    def test_blaster_engine_resumes_run_killed_mid_pipeline(tmpdir, journal):
+        marker = os.path.join(tmpdir.strpath, 'killed')
+        tasks = [provision_task('host_a'), dict(provision_task('slow_b'), marker=marker)]
+
+        # run the pipeline in a process of its own, killed once host_a is done while slow_b still runs
+        process = multiprocessing.Process(target=run_journaled_pipeline, args=(journal.path, tasks))
+        process.start()
+        timeout = time.time() + 30
+        while time.time() < timeout and ('provision', 'host_a') not in (
+                read_records(journal.path, 'complete') if os.path.exists(journal.path) else []):
+            time.sleep(0.05)
+        os.kill(process.pid, signal.SIGKILL)
+        process.join()
+        open(marker, 'w').close()
+
+        assert read_records(journal.path, 'complete') == [('provision', 'host_a')]
+        run_journaled_pipeline(journal.path, tasks)
+        assert read_records(journal.path, 'start').count(('provision', 'host_a')) == 1
+        assert read_records(journal.path, 'start').count(('provision', 'slow_b')) == 2
+        assert list(RunJournal(journal.path, resume=True).completed.keys()) == [('provision', 'host_a'),
+                                                                                 ('provision', 'slow_b')]
+
+    @staticmethod
+    def test_blaster_engine_replays_completed_tasks(journal):
+        journal.complete(provision_result('host_a'))
+        engine = BlasterEngine()
+        engine.journal = RunJournal(journal.path, resume=True)
+        results = engine.run('provision', [provision_task('host_a'), provision_task('host_b')])
+        assert [item['methods'][0]['rvalue'][0]['name'] for item in results] == ['host_a_0', 'host_b_0']
+        assert list(RunJournal(journal.path, resume=True).completed.keys()) == [('provision', 'host_a'),
+                                                                                 ('provision', 'host_b')]
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    tests.test_log_queue
+
+    Unit tests for testing carbons queued logging.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+
+import pytest
+from carbon.utils.log_queue import LogQueue, ResourceFileHandler, TaskTagFilter
+
+
+def make_record(msg, **tags):
+    record = logging.LogRecord('carbon.test', logging.INFO, __file__, 1, msg, None, None)
+    record.__dict__.update(tags)
+    return record
+
+
+@pytest.fixture
+def queue_logger(tmpdir):
+    logger = logging.getLogger('carbon.test_log_queue.%s' % os.path.basename(tmpdir.strpath))
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = logging.FileHandler(os.path.join(tmpdir.strpath, 'carbon_scenario.log'))
+    handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+    logger.addHandler(handler)
+    log_queue = LogQueue()
+    yield logger, log_queue
+    log_queue.stop()
+    for item in list(logger.handlers):
+        logger.removeHandler(item)
+        item.close()
+
+
+def log_lines(tmpdir, name='carbon_scenario.log'):
+    with open(os.path.join(tmpdir.strpath, name)) as f:
+        return f.read().splitlines()
+
+
+def log_from_worker(log_queue, logger, resource):
+    log_queue.attach_task('provision', resource)
+    logger.info('provisioning %s', resource)
+
+
+class TestLogQueue(object):
+
+    @staticmethod
+    def test_tag_filter_keeps_worker_tags():
+        record = make_record('msg', carbon_task='provision:host01', carbon_resource='host01',
+                             carbon_tag='[provision:host01] ')
+        assert TaskTagFilter().filter(record)
+        assert record.carbon_tag == '[provision:host01] '
+
+        record = make_record('msg')
+        TaskTagFilter().filter(record)
+        assert (record.carbon_task, record.carbon_resource, record.carbon_tag) == ('', '', '')
+
+    @staticmethod
+    def test_resource_file_handler(tmpdir):
+        handler = ResourceFileHandler(tmpdir.strpath)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler.handle(make_record('untagged'))
+        handler.handle(make_record('first', carbon_resource='ansible/site.yml'))
+        handler.handle(make_record('second', carbon_resource='ansible/site.yml'))
+        handler.close()
+        assert os.listdir(tmpdir.strpath) == ['ansible_site.yml.log']
+        assert log_lines(tmpdir, 'ansible_site.yml.log') == ['first', 'second']
+
+    @staticmethod
+    def test_worker_records_are_queued(tmpdir, queue_logger):
+        logger, log_queue = queue_logger
+        log_queue.start([logger.name], resource_folder=os.path.join(tmpdir.strpath, 'resources'))
+        logger.info('main process')
+        log_queue.attach_task('provision', 'main')
+
+        workers = [multiprocessing.Process(target=log_from_worker, args=(log_queue, logger, 'host%s' % index))
+                   for index in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        log_queue.stop()
+
+        lines = log_lines(tmpdir)
+        assert lines[0] == 'INFO main process'
+        assert sorted(lines[1:]) == ['INFO [provision:host%s] provisioning host%s' % (index, index)
+                                     for index in range(3)]
+        assert sorted(os.listdir(os.path.join(tmpdir.strpath, 'resources'))) == ['host0.log', 'host1.log',
+                                                                                 'host2.log']
+        assert [handler for handler in logger.handlers if isinstance(handler, ResourceFileHandler)] == []
+
+    @staticmethod
+    def test_thread_records_are_tagged(tmpdir, queue_logger):
+        logger, log_queue = queue_logger
+        log_queue.start([logger.name])
+        thread = threading.Thread(target=log_from_worker, args=(log_queue, logger, 'host01'))
+        thread.start()
+        thread.join()
+        logger.info('main thread')
+        log_queue.stop()
+        assert log_lines(tmpdir) == ['INFO [provision:host01] provisioning host01', 'INFO main thread']
+
+    @staticmethod
+    def test_attach_task_without_queue(tmpdir, queue_logger):
+        logger, log_queue = queue_logger
+        thread = threading.Thread(target=log_from_worker, args=(log_queue, logger, 'host01'))
+        thread.start()
+        thread.join()
+        assert log_lines(tmpdir) == ['INFO provisioning host01']
+
+    @staticmethod
+    def test_start_without_queue_handlers(monkeypatch, queue_logger):
+        logger, log_queue = queue_logger
+        monkeypatch.setattr('carbon.utils.log_queue.QueueListener', None)
+        log_queue.start([logger.name])
+        assert not log_queue.supported
+        assert not log_queue.started
+
+    @staticmethod
+    def test_in_worker_threads(queue_logger):
+        logger, log_queue = queue_logger
+        log_queue.start([logger.name])
+        results = list()
+        thread = threading.Thread(target=lambda: results.append(log_queue.in_worker()))
+        thread.start()
+        thread.join()
+        assert results == [True]
+        assert not log_queue.in_worker()
+
+    @staticmethod
+    def test_stop_restores_handlers(queue_logger):
+        logger, log_queue = queue_logger
+        handler = logger.handlers[0]
+        formatter, level_filter = handler.formatter, logging.Filter(logger.name)
+        handler.addFilter(level_filter)
+        log_queue.start([logger.name])
+        assert handler.formatter is not formatter
+        assert len(handler.filters) == 2
+        log_queue.stop()
+        assert handler.formatter is formatter
+        assert handler.filters == [level_filter]
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    tests.test_metrics
+
+    Unit tests for testing the metrics file of a carbon run.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import os
+
+from carbon import Carbon
+from carbon.utils.metrics import MetricsFile
+from carbon.utils.timing import TaskTimer, record
+
+
+class TestMetricsFile(object):
+    @staticmethod
+    def test_dumps_groups_samples_by_metric():
+        metrics = MetricsFile()
+        metrics.add('carbon_stage_tasks', 'Tasks.', 2, stage='provision', status='passed')
+        metrics.add('carbon_run_status', 'Status.', 0)
+        metrics.add('carbon_stage_tasks', 'Tasks.', 1, stage='provision', status='failed')
+        assert metrics.dumps().splitlines() == [
+            '# HELP carbon_stage_tasks Tasks.',
+            '# TYPE carbon_stage_tasks gauge',
+            'carbon_stage_tasks{stage="provision",status="passed"} 2.0',
+            'carbon_stage_tasks{stage="provision",status="failed"} 1.0',
+            '# HELP carbon_run_status Status.',
+            '# TYPE carbon_run_status gauge',
+            'carbon_run_status 0.0'
+        ]
+
+    @staticmethod
+    def test_label_values_are_escaped():
+        metrics = MetricsFile()
+        metrics.add('carbon_run_status', 'Status.', 1, scenario='a "b"\\c\nd')
+        assert 'carbon_run_status{scenario="a \\"b\\"\\\\c\\nd"} 1.0' in metrics.dumps()
+
+    @staticmethod
+    def test_write_replaces_file(tmpdir):
+        path = os.path.join(str(tmpdir), 'textfile', 'carbon.prom')
+        metrics = MetricsFile()
+        metrics.add('carbon_run_status', 'Status.', 0)
+        metrics.write(path)
+        metrics.write(path)
+        assert os.listdir(os.path.dirname(path)) == ['carbon.prom']
+        with open(path) as f:
+            assert f.read() == metrics.dumps()
+
+
+class TestRunMetrics(object):
+    @staticmethod
+    def test_record_adds_to_task_counters(execute1):
+        timer = TaskTimer('execute', execute1)
+
+        def run():
+            record('playbooks')
+            record('playbooks')
+            record('playbook_time', 1.5)
+        timer.wrap(run)()
+        assert execute1.timings['execute']['playbooks'] == 2
+        assert execute1.timings['execute']['playbook_time'] == 1.5
+
+    @staticmethod
+    def test_record_without_task():
+        record('playbooks')
+
+    @staticmethod
+    def test_write_metrics(scenario1, tmpdir, monkeypatch):
+        path = os.path.join(str(tmpdir), 'carbon.prom')
+        carbon = Carbon(data_folder='/tmp')
+        monkeypatch.setitem(carbon.config, 'METRICS_FILE', path)
+        carbon.scenario = scenario1
+        for resource in scenario1.get_all_assets():
+            resource.timings['provision'] = dict(queued=0.5, run=2.0, retries=1, ssh_wait=1.25)
+        scenario1.executes[0].timings['execute'] = dict(queued=0.0, run=3.0, retries=0, playbooks=2)
+        carbon.start()
+        carbon.end()
+        carbon._write_metrics(['provision', 'execute'], ['report'], 1)
+
+        with open(path) as f:
+            lines = f.read().splitlines()
+        labels = 'scenario="%s",stage="provision"' % scenario1.name
+        assert 'carbon_run_status{scenario="%s"} 1.0' % scenario1.name in lines
+        assert 'carbon_task_retries{%s} 1.0' % labels in lines
+        assert 'carbon_ssh_wait_seconds{%s} 1.25' % labels in lines
+        assert 'carbon_playbook_runs{scenario="%s",stage="execute"} 2.0' % scenario1.name in lines
+        assert not [item for item in lines if 'stage="report"' in item]
+
+    @staticmethod
+    def test_write_metrics_disabled(scenario1):
+        carbon = Carbon(data_folder='/tmp')
+        carbon.scenario = scenario1
+        assert carbon.config['METRICS_FILE'] == ''
+        carbon._write_metrics(['provision'], [])
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    tests.test_profiler
+
+    Unit tests for testing carbons profiler.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+
+import multiprocessing
+import os
+import pstats
+
+import pytest
+from carbon.utils.profiler import Profiler
+
+
+def busy(count):
+    return sum(index * index for index in range(count))
+
+
+def run_task(profiler):
+    profiler.wrap(busy, 'provision.host/01.run')(1000)
+
+
+@pytest.fixture
+def profiler(tmpdir):
+    profiler = Profiler()
+    profiler.start(os.path.join(tmpdir.strpath, 'profile'))
+    yield profiler
+    profiler.stop()
+
+
+class TestProfiler(object):
+
+    @staticmethod
+    def test_stop_saves_main_profile(profiler):
+        busy(1000)
+        folder = profiler.stop()
+        assert not profiler.enabled
+        assert profiler.stop() is None
+        assert os.listdir(folder) == ['carbon.%s.pstats' % os.getpid()]
+
+    @staticmethod
+    def test_wrap_saves_profile_per_call(profiler):
+        wrapped = profiler.wrap(busy, 'provision.host01.run')
+        assert wrapped(10) == busy(10)
+        with pytest.raises(TypeError):
+            wrapped(None)
+        files = sorted(os.listdir(profiler.folder))
+        assert files == ['provision.host01.run.%s.%s.pstats' % (os.getpid(), index) for index in range(2)]
+        stats = pstats.Stats(os.path.join(profiler.folder, files[0]))
+        assert [func for func in stats.stats if func[2] == 'busy']
+
+    @staticmethod
+    def test_report_merges_worker_profiles(profiler):
+        workers = [multiprocessing.Process(target=run_task, args=(profiler,)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        folder = profiler.stop()
+        path = os.path.join(folder, 'hotspots.txt')
+
+        assert Profiler.report(folder, path) == 3
+        with open(path) as f:
+            report = f.read()
+        assert report.startswith('Profiles merged: 3\n')
+        assert 'provision.host_01.run.%s.0.pstats' % workers[0].pid in report
+        assert 'Functions carbon spent the most cumulative time in' in report
+        assert 'busy' in report
+
+    @staticmethod
+    def test_report_without_profiles(tmpdir):
+        assert Profiler.report(tmpdir.strpath, os.path.join(tmpdir.strpath, 'hotspots.txt')) == 0
@@ -27,7 +27,10 @@
 
 import copy
 import os
+import pickle
+import time
 import uuid
+from collections import OrderedDict
 
 import mock
 import pytest
@@ -42,6 +45,7 @@ from carbon.provisioners.ext import OpenstackLibCloudProvisionerPlugin
 from carbon.resources import Action, Execute, Asset, Report, Scenario, Notification
 from carbon.utils.config import Config
 from carbon.core import ImporterPlugin, CarbonProvider
+from carbon.helpers import copy_data
 from carbon.notifiers.ext import EmailNotificationPlugin
 
 
@@ -279,6 +283,23 @@ class TestActionResource(object):
         action_resource.hosts = [host]
         assert isinstance(action_resource.profile(), dict)
 
+    @staticmethod
+    def test_build_profile_hosts_appended(action_resource):
+        action_resource.profile()
+        action_resource.hosts.append('host02')
+        assert action_resource.profile()['hosts'] == ['host01', 'host02']
+
+    @staticmethod
+    def test_build_profile_host_replaced(action_resource, host, asset1):
+        action_resource.hosts = [host]
+        profile = action_resource.profile()
+        assert profile['hosts'] == ['host01']
+        with mock.patch.object(action_resource.orchestrator, 'build_profile') as build_profile:
+            assert action_resource.profile() is profile
+        build_profile.assert_not_called()
+        action_resource.hosts[0] = asset1
+        assert action_resource.profile()['hosts'] == ['host_0']
+
     @staticmethod
     def test_create_action_with_cleanup_action(action_resource_cleanup):
         assert hasattr(action_resource_cleanup, 'cleanup')
@@ -374,6 +395,13 @@ class TestReportResource(object):
         report_resource.executes = [execute]
         assert isinstance(report_resource.profile(), dict)
 
+    @staticmethod
+    def test_build_report_profile_credential_changed(report_resource):
+        report_resource.credential['name'] = 'polarion'
+        report_resource.profile()
+        report_resource.credential['name'] = 'polarion02'
+        assert report_resource.profile()['provider']['credential'] == 'polarion02'
+
     @staticmethod
     @mock.patch('carbon.resources.reports.get_importers_plugin_list')
     @mock.patch('carbon.resources.reports.get_importer_plugin_class')
@@ -459,6 +487,21 @@ class TestExecuteResource(object):
         execute_resource.hosts = [host]
         assert isinstance(execute_resource.profile(), dict)
 
+    @staticmethod
+    def test_build_profile_artifact_locations_appended(execute_resource):
+        execute_resource.artifact_locations = ['artifacts/execute/a.xml']
+        execute_resource.profile()
+        execute_resource.artifact_locations.append('artifacts/execute/b.xml')
+        assert execute_resource.profile()['artifact_locations'] == ['artifacts/execute/a.xml',
+                                                                    'artifacts/execute/b.xml']
+
+    @staticmethod
+    def test_build_profile_artifact_locations_empty_appended(execute_resource):
+        execute_resource.artifact_locations = []
+        execute_resource.profile()
+        execute_resource.artifact_locations.append('artifacts/execute/a.xml')
+        assert execute_resource.profile()['artifact_locations'] == ['artifacts/execute/a.xml']
+
 
 class TestScenarioResource(object):
     @staticmethod
@@ -636,6 +679,38 @@ class TestScenarioResource(object):
         scenario_res1.reload_resources(task_list_host_1)
         assert len(scenario_res1.assets) == 3
 
+    @staticmethod
+    def test_reload_method_keeps_task_timings(task_list_host, scenario_res1):
+        task_list_host[0]['asset'].timings['provision'] = dict(queued=0.5, run=12.0, retries=1)
+        scenario_res1.reload_resources(task_list_host)
+        timings = dict((asset.name, asset.timings) for asset in scenario_res1.assets)
+        assert timings['host_count_0'] == timings['host_count_1'] == dict(
+            provision=dict(queued=0.5, run=12.0, retries=1))
+        assert scenario_res1.assets[0].profile()['timings'] == dict(provision=dict(queued=0.5, run=12.0, retries=1))
+
+    @staticmethod
+    def test_reload_method_grows_linearly(config):
+        """Benchmark pinning down how the reload time grows with the number of assets. The reload of ten times as
+        many assets has to take well under the hundred times longer a quadratic reload would."""
+        assets = [Asset(name='host_%s' % index, config=config, parameters=dict(groups='group', ip_address='127.0.0.1'))
+                  for index in range(5000)]
+        tasks = [dict(task=None, name=asset.name, asset=asset, methods=[dict(name='run', status=0, rvalue=None)])
+                 for asset in assets]
+
+        def reload_time(count):
+            best = None
+            for _ in range(3):
+                scenario = Scenario(config=config, parameters={'name': 'benchmark'})
+                for asset in assets[:count]:
+                    scenario.add_assets(asset)
+                start = time.time()
+                scenario.reload_resources(tasks[:count])
+                best = min(best or float('inf'), time.time() - start)
+                assert len(scenario.assets) == count
+            return max(best, 1e-4)
+
+        assert reload_time(5000) / reload_time(500) < 30
+
 
 class TestAssetResource(object):
     @staticmethod
@@ -696,6 +771,34 @@ class TestAssetResource(object):
         host = Asset(name='host01', parameters=params, config=config)
         assert host.provisioner is OpenstackLibCloudProvisionerPlugin
 
+    def test_host_tasks_built_when_requested(self, default_host_params, config):
+        params = self.__get_params_copy__(default_host_params)
+        params['provisioner'] = 'openstack-libcloud'
+        host = Asset(name='host01', parameters=params, config=config)
+        assert '_tasks' not in vars(host)
+        tasks = host.get_tasks()
+        assert [task['task'].__task_name__ for task in tasks] == ['validate', 'provision', 'cleanup']
+        assert all(task['name'] == 'host01' for task in tasks)
+        assert host.get_tasks() is tasks
+        host.reload_tasks()
+        assert host.get_tasks() is not tasks
+
+    def test_host_memory_10k(self, default_host_params, config):
+        tracemalloc = pytest.importorskip('tracemalloc')
+        params = self.__get_params_copy__(default_host_params)
+        params['groups'] = params.pop('role')
+        params['provisioner'] = 'openstack-libcloud'
+        profile = Asset(name='host', parameters=params, config=config).profile()
+        profiles = [dict(copy.deepcopy(profile), name='host_%s' % index, ip_address='127.0.0.1')
+                    for index in range(10000)]
+        tracemalloc.start()
+        try:
+            hosts = [Asset(config=config, parameters=item) for item in profiles]
+            size = tracemalloc.get_traced_memory()[0] // len(hosts)
+        finally:
+            tracemalloc.stop()
+        assert size < 1024
+
     def test_create_host_undefined_credential(self, default_host_params, config):
         params = self.__get_params_copy__(default_host_params)
         params['provider'].pop('credential')
@@ -777,6 +880,47 @@ class TestAssetResource(object):
         setattr(static_host, 'ip_address', '127.0.0.1')
         assert isinstance(static_host.profile(), dict)
 
+    def test_build_profile_cached(self, default_host_params, config):
+        params = self.__get_params_copy__(default_host_params)
+        host = Asset(name='host01', parameters=params, config=config)
+        profile = host.profile()
+        with pytest.raises(TypeError):
+            profile['name'] = 'host02'
+        assert '_profile' in vars(host)
+        assert host.profile() is profile and profile['name'] == 'host01'
+
+        # copies of the profile can be changed
+        for item in [copy_data(profile), copy.deepcopy(profile), pickle.loads(pickle.dumps(profile))]:
+            item['name'] = 'host02'
+            assert item['name'] == 'host02' and list(item)[0] == 'name'
+        assert profile['name'] == 'host01'
+
+    def test_build_profile_attribute_set(self, default_host_params, config):
+        params = self.__get_params_copy__(default_host_params)
+        host = Asset(name='host01', parameters=params, config=config)
+        host.profile()
+        host.ip_address = '10.0.0.1'
+        assert '_profile' not in vars(host)
+        assert host.profile()['ip_address'] == '10.0.0.1'
+
+    def test_build_profile_groups_appended(self, default_host_params, config):
+        params = self.__get_params_copy__(default_host_params)
+        params.pop('role')
+        params['groups'] = ['client']
+        host = Asset(name='host01', parameters=params, config=config)
+        host.profile()
+        host.groups.append('server')
+        assert host.profile()['groups'] == ['client', 'server']
+
+    def test_build_profile_timings_recorded(self, default_host_params, config):
+        params = self.__get_params_copy__(default_host_params)
+        host = Asset(name='host01', parameters=params, config=config)
+        assert 'timings' not in host.profile()
+        host.timings['provision'] = OrderedDict(queued=0.0, run=1.5, retries=0)
+        assert host.profile()['timings'] == dict(provision=dict(queued=0.0, run=1.5, retries=0))
+        host.timings['cleanup'] = OrderedDict(queued=0.0, run=0.5, retries=0)
+        assert list(host.profile()['timings']) == ['provision', 'cleanup']
+
     def test_validate_success(self, host):
         host.validate()
 
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    tests.test_results
+
+    Unit tests for testing carbons results writer.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import json
+import os
+import stat
+from collections import OrderedDict
+
+import mock
+import pytest
+from carbon.helpers import file_mgmt
+from carbon.utils.results import ResultsWriter, dump_yaml, write_atomic
+from ruamel.yaml.comments import CommentedMap
+
+
+@pytest.fixture
+def profile():
+    asset = OrderedDict([('name', 'host01'), ('groups', ['client']), ('ip_address', ['127.0.0.1']),
+                         ('provider', CommentedMap([('name', 'openstack'), ('flavor', 'm1.small')]))])
+    return OrderedDict([('name', 'scenario'), ('description', None), ('resource_check', {}),
+                        ('provision', [asset]), ('orchestrate', []),
+                        ('execute', [OrderedDict([('name', 'execute01'), ('status', 0)])])])
+
+
+class TestResultsWriter(object):
+
+    @staticmethod
+    def test_render_matches_dump(profile):
+        yaml_data, json_data = ResultsWriter().render(profile)
+        assert yaml_data == dump_yaml(profile)
+        assert json.loads(json_data) == json.loads(json.dumps(profile))
+
+    @staticmethod
+    def test_write_results(tmpdir, profile):
+        path = os.path.join(tmpdir.strpath, 'results.yml')
+        ResultsWriter().write(path, profile)
+        data = file_mgmt('r', path)
+        assert list(data.keys()) == list(profile.keys())
+        assert data['provision'][0]['provider']['flavor'] == 'm1.small'
+        assert not os.path.exists(os.path.join(tmpdir.strpath, 'results.json'))
+
+    @staticmethod
+    def test_write_json_sidecar(tmpdir, profile):
+        path = os.path.join(tmpdir.strpath, 'results.yml')
+        ResultsWriter(json_sidecar=True).write(path, profile)
+        data = file_mgmt('r', os.path.join(tmpdir.strpath, 'results.json'))
+        assert data['provision'][0]['name'] == 'host01'
+        assert data['description'] is None
+
+    @staticmethod
+    def test_resources_dumped_when_changed(profile):
+        writer = ResultsWriter()
+        writer.render(profile)
+        with mock.patch('carbon.utils.results.dump_yaml', wraps=dump_yaml) as mock_dump:
+            writer.render(profile)
+            assert [args[0][0] for args in mock_dump.call_args_list if isinstance(args[0][0], list)] == []
+            profile['execute'][0]['status'] = 1
+            yaml_data, _ = writer.render(profile)
+            assert [args[0][0] for args in mock_dump.call_args_list if isinstance(args[0][0], list)] == \
+                [[profile['execute'][0]]]
+        assert 'status: 1' in yaml_data
+
+    @staticmethod
+    def test_flush_cache(profile):
+        writer = ResultsWriter()
+        writer.render(profile)
+        writer.flush_cache()
+        profile['provision'] = []
+        writer.render(profile)
+        writer.flush_cache()
+        assert len(writer._cache) == 1
+
+    @staticmethod
+    def test_write_atomic_keeps_file_on_failure(tmpdir):
+        path = os.path.join(tmpdir.strpath, 'results.yml')
+        write_atomic(path, 'name: scenario\n')
+        with mock.patch('os.fsync', side_effect=OSError('disk full')):
+            with pytest.raises(OSError):
+                write_atomic(path, 'name: other\n')
+        assert open(path).read() == 'name: scenario\n'
+        assert os.listdir(tmpdir.strpath) == ['results.yml']
+
+    @staticmethod
+    def test_write_atomic_file_mode(tmpdir):
+        path = os.path.join(tmpdir.strpath, 'results.yml')
+        umask = os.umask(0o027)
+        try:
+            write_atomic(path, 'name: scenario\n')
+        finally:
+            os.umask(umask)
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+
+        # the file replaced keeps its permissions
+        os.chmod(path, 0o600)
+        write_atomic(path, 'name: other\n')
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    tests.test_scheduler
+
+    Unit tests for testing carbons dependency aware scheduler.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import copy
+import threading
+import time
+
+import mock
+import pytest
+from carbon.exceptions import CarbonSchedulerError
+from carbon.resources import Action, Asset
+from carbon.utils.engine import ThreadEngine
+from carbon.utils.scheduler import DagScheduler, TaskNode
+
+
+class FakeAsset(object):
+    def __init__(self, name, provider=None):
+        self.name = name
+        self.provider = provider
+
+
+class FakeAction(object):
+    def __init__(self, name, hosts):
+        self.name = name
+        self.hosts = hosts
+
+
+class FakeTask(object):
+    def __init__(self, name=None, **kwargs):
+        self.name = name
+
+    def run(self):
+        if self.name.startswith('fail'):
+            raise RuntimeError('failed')
+        return None
+
+
+class CountTask(FakeTask):
+    lock = threading.Lock()
+    running = 0
+    most = 0
+
+    def run(self):
+        with CountTask.lock:
+            CountTask.running += 1
+            CountTask.most = max(CountTask.most, CountTask.running)
+        time.sleep(0.1)
+        with CountTask.lock:
+            CountTask.running -= 1
+
+
+def fake_node(index, stage, name, resource):
+    key = 'asset' if stage == 'provision' else 'package'
+    return TaskNode(index, stage, {'task': FakeTask, 'name': name, 'methods': ['run'], key: resource})
+
+
+@pytest.fixture
+def dag_scenario(scenario_resource1, default_host_params, config):
+    for name in ['host_a', 'host_b']:
+        scenario_resource1.add_assets(Asset(name=name, config=config, parameters=copy.deepcopy(default_host_params)))
+    for name, hosts in [('action_a', ['host_a']), ('action_b', ['host_b'])]:
+        scenario_resource1.add_actions(Action(name=name, config=config,
+                                              parameters=dict(hosts=hosts, orchestrator='ansible')))
+    return scenario_resource1
+
+
+class TestDagScheduler(object):
+
+    @staticmethod
+    def test_stages_follow_task_order():
+        scheduler = DagScheduler(None, {}, ['execute', 'provision'])
+        assert scheduler.stages == ['provision', 'execute']
+
+    @staticmethod
+    def test_build_links_actions_to_their_assets(dag_scenario):
+        scheduler = DagScheduler(dag_scenario, {}, ['provision', 'orchestrate'])
+        nodes = scheduler.build()
+        assert [node.stage for node in nodes] == ['provision', 'provision', 'orchestrate', 'orchestrate']
+        assert nodes[2].depends == {0}
+        assert nodes[3].depends == {1}
+
+    @staticmethod
+    def test_build_links_unresolved_hosts_to_everything(dag_scenario, config):
+        dag_scenario.add_actions(Action(name='action_c', config=config,
+                                        parameters=dict(hosts=['localhost'], orchestrator='ansible')))
+        scheduler = DagScheduler(dag_scenario, {}, ['provision', 'orchestrate'])
+        nodes = scheduler.build()
+        assert nodes[4].depends == {0, 1, 2, 3}
+
+    @staticmethod
+    def test_run_graph():
+        scheduler = DagScheduler(None, {}, ['provision', 'orchestrate'])
+        asset = FakeAsset('host_a')
+        scheduler.nodes = [fake_node(0, 'provision', 'host_a', asset),
+                           fake_node(1, 'orchestrate', 'action_a', FakeAction('action_a', [asset]))]
+        scheduler.nodes[1].depends.add(0)
+        results = scheduler.run()
+        assert list(results.keys()) == ['provision', 'orchestrate']
+        assert results['provision'][0]['status'] == 0
+        assert results['orchestrate'][0]['status'] == 0
+
+    @staticmethod
+    def test_run_graph_failure():
+        scheduler = DagScheduler(None, {}, ['provision', 'orchestrate'])
+        asset_a, asset_b = FakeAsset('host_a'), FakeAsset('fail_b')
+        scheduler.nodes = [fake_node(0, 'provision', 'host_a', asset_a),
+                           fake_node(1, 'provision', 'fail_b', asset_b),
+                           fake_node(2, 'orchestrate', 'action_a', FakeAction('action_a', [asset_a])),
+                           fake_node(3, 'orchestrate', 'action_b', FakeAction('action_b', [asset_b]))]
+        scheduler.nodes[2].depends.add(0)
+        scheduler.nodes[3].depends.add(1)
+        with pytest.raises(CarbonSchedulerError) as ex:
+            scheduler.run()
+        assert ex.value.task == 'provision'
+        assert [item['status'] for item in ex.value.results] == [0, 1]
+        assert ex.value.stage_results['orchestrate'][1]['status'] == 'n/a'
+
+    @staticmethod
+    def test_run_graph_provider_limit():
+        engine = ThreadEngine({'PROVIDER_CONCURRENCY': {'OPENSTACK': '2'}})
+        scheduler = DagScheduler(None, {}, ['provision'], engine=engine)
+        scheduler.nodes = [fake_node(index, 'provision', 'host_%s' % index, FakeAsset('host', 'openstack'))
+                           for index in range(5)]
+        for node in scheduler.nodes:
+            node.task['task'] = CountTask
+        CountTask.most = 0
+        scheduler.run()
+        engine.shutdown()
+        assert CountTask.most == 2
+
+    @staticmethod
+    def test_run_graph_not_concurrent_stage():
+        engine = ThreadEngine()
+        scheduler = DagScheduler(None, {}, ['orchestrate'], engine=engine)
+        scheduler.nodes = [fake_node(index, 'orchestrate', 'action_%s' % index,
+                                     FakeAction('action_%s' % index, [FakeAsset('host_%s' % index)]))
+                           for index in range(3)]
+        task_class = type('SerialTask', (CountTask,), dict(__concurrent__=False))
+        for node in scheduler.nodes:
+            node.task['task'] = task_class
+        CountTask.most = 0
+        scheduler.run()
+        engine.shutdown()
+        assert CountTask.most == 1
+
+    @staticmethod
+    def test_run_graph_stuck_nodes():
+        scheduler = DagScheduler(None, {}, ['provision'])
+        scheduler.nodes = [fake_node(0, 'provision', 'host_a', FakeAsset('host_a'))]
+        scheduler.nodes[0].task['task'] = type('NoSlotTask', (FakeTask,), dict(__concurrency__=0))
+        with pytest.raises(CarbonSchedulerError) as ex:
+            scheduler.run()
+        assert 'host_a' in ex.value.args[0]
+        assert ex.value.task == 'provision'
+        assert [item['status'] for item in ex.value.results] == ['n/a']
+        assert list(ex.value.stage_results.keys()) == ['provision']
+
+    @staticmethod
+    def test_update_assets_rebuilds_inventory():
+        inventory = mock.MagicMock()
+        scheduler = DagScheduler(None, {}, ['provision'], inventory=inventory)
+        asset = FakeAsset('host_a')
+        node = fake_node(0, 'provision', 'host_a', asset)
+        node.result = dict(asset=asset, methods=[dict(name='run', status=0, rvalue=None)], status=0)
+        scheduler._update_assets(node)
+        inventory.create_master.assert_called_once_with(all_hosts=[asset], rebuild=True)
+        inventory.delete_master.assert_not_called()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    tests.test_timing
+
+    Unit tests for testing the timings carbon saves on the resources.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+
+import time
+
+import pytest
+from carbon.core import CarbonTask
+from carbon.resources import Execute
+from carbon.utils.timing import TaskTimer, count_retry
+
+
+class FakeTask(CarbonTask):
+    __task_name__ = 'execute'
+
+    def __init__(self, msg, package, **kwargs):
+        super(FakeTask, self).__init__(resource=package, **kwargs)
+
+    def run(self):
+        count_retry()
+        count_retry()
+        return 'ran'
+
+    def fail(self):
+        raise RuntimeError('failed')
+
+
+@pytest.fixture
+def package(config):
+    return Execute(name='tests', config=config, parameters=dict(
+        description='run tests', executor='runner', hosts='host01', timings=dict(provision=dict(
+            queued=0.0, run=1.0, retries=0))))
+
+
+class TestTaskTimer(object):
+
+    @staticmethod
+    def test_count_retry_without_task():
+        count_retry()
+
+    @staticmethod
+    def test_timer_saves_timings_on_resource(package):
+        timer = TaskTimer('execute', package, queued=time.time() - 2)
+        assert timer.wrap(lambda: 'ran')() == 'ran'
+        assert list(package.timings.keys()) == ['provision', 'execute']
+        assert package.timings['execute']['queued'] >= 2
+        assert package.timings['execute']['retries'] == 0
+
+    @staticmethod
+    def test_task_methods_are_timed(package):
+        task = FakeTask(msg='execute', package=package, name='tests', methods=['run', 'fail'],
+                        queued=time.time())
+        assert task.run() == 'ran'
+        with pytest.raises(RuntimeError):
+            task.fail()
+        assert package.timings['execute']['retries'] == 2
+        assert package.profile()['timings']['execute'] == package.timings['execute']
+
+    @staticmethod
+    def test_profile_timings_are_loaded(package, config):
+        execute = Execute(config=config, parameters=dict(package.profile()))
+        assert execute.timings == package.timings
+        assert 'timings' not in vars(execute)
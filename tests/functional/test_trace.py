@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    tests.test_trace
+
+    Unit tests for testing carbons tracer.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+
+import json
+import multiprocessing
+import os
+import threading
+
+import pytest
+from carbon.core import CarbonTask
+from carbon.utils.trace import Tracer, tracer as carbon_tracer
+
+
+class FakeTask(CarbonTask):
+    __task_name__ = 'provision'
+
+    def run(self):
+        with carbon_tracer.span('ansible-playbook site.yml', 'playbook'):
+            return self.name
+
+
+@pytest.fixture
+def tracer(tmpdir):
+    tracer = Tracer()
+    tracer.start(os.path.join(tmpdir.strpath, '.trace'))
+    yield tracer
+    tracer.stop()
+
+
+def load_trace(path):
+    with open(path) as f:
+        trace = json.load(f)
+    names = dict()
+    for event in trace['traceEvents']:
+        if event['name'] == 'process_name':
+            names[event['pid']] = event['args']['name']
+        elif event['name'] == 'thread_name':
+            names[(event['pid'], event['tid'])] = event['args']['name']
+    spans = [event for event in trace['traceEvents'] if event['ph'] == 'X']
+    return names, spans
+
+
+def run_spans(tracer, resource):
+    with tracer.span('provision %s' % resource, 'task', stage='provision'):
+        with tracer.span('ssh %s' % resource, 'ssh'):
+            pass
+
+
+class TestTracer(object):
+
+    @staticmethod
+    def test_disabled_tracer_records_nothing(tmpdir):
+        tracer = Tracer()
+        with tracer.span('provision', 'stage', stage='provision'):
+            pass
+        assert not tracer.enabled
+        assert tracer.events() == []
+
+    @staticmethod
+    def test_span_records_error(tracer):
+        with pytest.raises(ValueError):
+            with tracer.span('provision host01', 'task', stage='provision'):
+                raise ValueError('failed')
+        event = tracer.events()[0]
+        assert (event['ph'], event['cat'], event['stage']) == ('X', 'task', 'provision')
+        assert event['args'] == dict(error="ValueError('failed')")
+        assert event['dur'] >= 0
+
+    @staticmethod
+    def test_export_nests_spans_under_stage_and_worker(tmpdir, tracer):
+        with tracer.span('provision', 'stage', stage='provision'):
+            workers = [multiprocessing.Process(target=run_spans, args=(tracer, 'host%s' % index))
+                       for index in range(2)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        with tracer.span('orchestrate', 'stage', stage='orchestrate'):
+            thread = threading.Thread(target=run_spans, args=(tracer, 'host0'), name='worker-thread')
+            thread.start()
+            thread.join()
+
+        path = os.path.join(tmpdir.strpath, 'trace.json')
+        assert tracer.export(path) == 8
+        names, spans = load_trace(path)
+
+        stages = dict((span['name'], names[span['pid']]) for span in spans if span['cat'] != 'task')
+        assert stages['provision'] == 'provision'
+        assert stages['orchestrate'] == 'orchestrate'
+
+        tasks = [span for span in spans if span['cat'] == 'task']
+        assert [names[span['pid']] for span in tasks] == ['provision'] * 3
+        for task in tasks:
+            # the ssh wait is on the worker track of its task, within the task span
+            ssh = [span for span in spans if span['cat'] == 'ssh' and span['name'] == 'ssh %s' %
+                   task['name'].split()[1] and (span['pid'], span['tid']) == (task['pid'], task['tid'])]
+            assert len(ssh) == 1
+            assert task['ts'] <= ssh[0]['ts'] and ssh[0]['ts'] + ssh[0]['dur'] <= task['ts'] + task['dur']
+        assert len(set((span['pid'], span['tid']) for span in tasks)) == 3
+        assert 'carbon %s (worker-thread)' % os.getpid() in names.values()
+
+    @staticmethod
+    def test_task_methods_are_traced(tmpdir, monkeypatch):
+        monkeypatch.setattr(carbon_tracer, 'folder', None)
+        carbon_tracer.start(os.path.join(tmpdir.strpath, '.trace'))
+        try:
+            task = FakeTask(name='host01', methods=['run', 'missing'])
+            assert task.run() == 'host01'
+            names, spans = load_trace_events(carbon_tracer, tmpdir)
+        finally:
+            carbon_tracer.stop()
+        assert [(span['name'], span['cat'], names[span['pid']]) for span in spans] == [
+            ('provision host01', 'task', 'provision'), ('ansible-playbook site.yml', 'playbook', 'provision')]
+        assert spans[0]['args'] == dict(method='run')
+        assert FakeTask(name='host01', methods=['run']).run.__func__ is FakeTask.run
+
+
+def load_trace_events(tracer, tmpdir):
+    path = os.path.join(tmpdir.strpath, 'trace.json')
+    tracer.export(path)
+    return load_trace(path)
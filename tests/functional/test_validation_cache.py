@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    tests.test_validation_cache
+
+    Unit tests for testing carbons validation cache.
+
+    :copyright: (c) 2020 Red Hat, Inc.
+    :license: GPLv3, see LICENSE for more details.
+"""
+
+import os
+
+import mock
+import pytest
+from carbon import Carbon
+from carbon.constants import VALIDATE_CACHE_FOLDER
+from carbon.exceptions import CarbonSchedulerError
+from carbon.tasks import ValidateTask
+from carbon.utils.validation_cache import ValidationCache
+
+
+def validate_task(resource):
+    return {'task': ValidateTask, 'name': resource.name, 'resource': resource, 'methods': ['run']}
+
+
+def validate_result(task, status=0):
+    result = dict(task)
+    result.update(status=status, methods=[dict(name='run', status=status, rvalue=None)])
+    return result
+
+
+@pytest.fixture
+def cache(tmpdir):
+    return ValidationCache(os.path.join(tmpdir.strpath, VALIDATE_CACHE_FOLDER))
+
+
+class TestValidationCache(object):
+
+    @staticmethod
+    def test_fingerprint_resource_without_plugin(cache, scenario_resource):
+        assert cache.fingerprint(scenario_resource) is None
+
+    @staticmethod
+    def test_fingerprint_changes_with_the_definition(cache, action_resource):
+        fingerprint = cache.fingerprint(action_resource)
+        assert fingerprint == cache.fingerprint(action_resource)
+        action_resource.status = 1
+        assert fingerprint != cache.fingerprint(action_resource)
+
+    @staticmethod
+    def test_fingerprint_ignores_timings(cache, action_resource):
+        fingerprint = cache.fingerprint(action_resource)
+        action_resource.timings.update(validate=dict(run=1.0))
+        assert fingerprint == cache.fingerprint(action_resource)
+
+    @staticmethod
+    def test_fingerprint_changes_with_the_referenced_files(cache, tmpdir, action_resource):
+        action_resource.config['WORKSPACE'] = tmpdir.strpath
+        playbook = tmpdir.join('site.yml')
+        playbook.write('- hosts: all\n')
+        action_resource.ansible_playbook = dict(name='site.yml')
+        fingerprint = cache.fingerprint(action_resource)
+
+        playbook.write('- hosts: localhost\n')
+        assert fingerprint != ValidationCache(cache.path).fingerprint(action_resource)
+
+    @staticmethod
+    def test_split_skips_resources_which_passed(cache, action_resource, host):
+        skipped, pending = cache.split([validate_task(action_resource), validate_task(host)])
+        assert not skipped and len(pending) == 2
+        assert all(task['fingerprint'] for task in pending)
+
+        cache.record([validate_result(pending[0]), validate_result(pending[1], status=1)])
+        skipped, pending = cache.split([validate_task(action_resource), validate_task(host)])
+        assert [item['name'] for item in skipped] == ['action']
+        assert skipped[0]['status'] == 0 and skipped[0]['methods'][0]['status'] == 0
+        assert [item['name'] for item in pending] == ['host01']
+
+    @staticmethod
+    def test_split_force(cache, action_resource):
+        cache.record([validate_result(dict(validate_task(action_resource),
+                                           fingerprint=cache.fingerprint(action_resource)))])
+        cache.force = True
+        skipped, pending = cache.split([validate_task(action_resource)])
+        assert not skipped and pending[0]['fingerprint'] == cache.fingerprint(action_resource)
+
+    @staticmethod
+    def test_split_runs_resources_without_plugin(cache, scenario_resource):
+        skipped, pending = cache.split([validate_task(scenario_resource)])
+        assert not skipped and 'fingerprint' not in pending[0]
+
+    @staticmethod
+    def test_run_pipeline_skips_cached_resources(tmpdir, action_resource):
+        cbn = Carbon(data_folder=tmpdir.strpath)
+        cbn.scenario.add_actions(action_resource)
+        assert cbn.validation_cache.path == os.path.join(tmpdir.strpath, VALIDATE_CACHE_FOLDER)
+
+        engine = mock.MagicMock()
+        engine.run.side_effect = lambda name, tasks, **kwargs: [validate_result(task) for task in tasks]
+        with mock.patch.object(cbn, '_get_engine', return_value=engine):
+            first = cbn._run_pipeline('validate')
+            second = cbn._run_pipeline('validate')
+
+        # the scenario itself is always validated
+        assert len(engine.run.call_args_list[0][0][1]) == len(first) == 2
+        assert [task['name'] for task in engine.run.call_args_list[1][0][1]] == [cbn.scenario.name]
+        assert sorted(item['name'] for item in second) == sorted(item['name'] for item in first)
+
+    @staticmethod
+    def test_run_pipeline_records_passes_on_failure(tmpdir, action_resource):
+        cbn = Carbon(data_folder=tmpdir.strpath)
+        cbn.scenario.add_actions(action_resource)
+
+        def run(name, tasks, **kwargs):
+            results = [validate_result(task, status=int(task['name'] != 'action')) for task in tasks]
+            raise CarbonSchedulerError('One or more tasks got a status of non zero.', task=name, results=results)
+
+        engine = mock.MagicMock()
+        engine.run.side_effect = run
+        with mock.patch.object(cbn, '_get_engine', return_value=engine):
+            with pytest.raises(CarbonSchedulerError):
+                cbn._run_pipeline('validate')
+            with pytest.raises(CarbonSchedulerError) as ex:
+                cbn._run_pipeline('validate')
+
+        # the action passed the first run, only the scenario is validated again
+        assert [task['name'] for task in engine.run.call_args_list[1][0][1]] == [cbn.scenario.name]
+        assert sorted(item['name'] for item in ex.value.results) == sorted(['action', cbn.scenario.name])
+
+    @staticmethod
+    def test_run_pipeline_rejects_invalid_schemas(tmpdir, action_resource):
+        cbn = Carbon(data_folder=tmpdir.strpath)
+        action_resource.ansible_playbook = 'site.yml'
+        cbn.scenario.add_actions(action_resource)
+
+        engine = mock.MagicMock()
+        engine.run.side_effect = lambda name, tasks, **kwargs: [validate_result(task) for task in tasks]
+        with mock.patch.object(cbn, '_get_engine', return_value=engine):
+            with pytest.raises(CarbonSchedulerError) as ex:
+                cbn._run_pipeline('validate')
+
+        # the batch check fails the action before the engine runs its task
+        assert [task['name'] for task in engine.run.call_args_list[0][0][1]] == [cbn.scenario.name]
+        failed = [item for item in ex.value.results if item['status']]
+        assert [item['name'] for item in failed] == ['action']
+        assert 'Schema validation failed' in failed[0]['methods'][0]['traceback']
+
+    @staticmethod
+    def test_carbon_force_validate(tmpdir):
+        assert Carbon(data_folder=tmpdir.strpath, force_validate=True).validation_cache.force
+        assert not Carbon(data_folder=tmpdir.strpath).validation_cache.force
+
+    @staticmethod
+    def test_carbon_validate_cache_disabled(tmpdir, monkeypatch):
+        monkeypatch.setitem(Carbon.config, 'VALIDATE_CACHE', 'False')
+        assert Carbon(data_folder=tmpdir.strpath).validation_cache is None